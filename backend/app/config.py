@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
@@ -24,6 +24,48 @@ class Settings(BaseSettings):
         ]
     )
     openai_api_key: Optional[str] = Field(default=None, alias="OPENAI_API_KEY")
+    # Override the OpenAI endpoint (e.g. a local stub for benchmarks)
+    openai_base_url: Optional[str] = Field(default=None)
+    # Connection pool and timeouts for the shared OpenAI HTTP client
+    openai_timeout_seconds: float = Field(default=30.0)
+    openai_connect_timeout_seconds: float = Field(default=5.0)
+    openai_max_retries: int = Field(default=2)
+    openai_max_connections: int = Field(default=100)
+    openai_max_keepalive_connections: int = Field(default=20)
+    openai_keepalive_expiry_seconds: float = Field(default=30.0)
+    # Cache identical LLM prompts (chart-insight, summary-insight)
+    llm_cache_enabled: bool = Field(default=True)
+    llm_cache_ttl_seconds: float = Field(default=3600.0)
+    llm_cache_max_entries: int = Field(default=1024)
+    # Round summary-insight net worth deltas to this many dollars before
+    # building the prompt so near-identical results share a cache entry (0 disables)
+    llm_cache_delta_bucket: float = Field(default=0.0)
+    # Prompt size limits for chart-insight (see services/prompt_compaction.py)
+    chart_insight_max_points: int = Field(default=40)
+    chart_insight_payload_token_budget: int = Field(default=3000)
+    chart_insight_history_token_budget: int = Field(default=800)
+    # Abort startup when the ML artifacts fail to load or validate
+    ml_warmup_required: bool = Field(default=False)
+    # Warm up in a background thread so the server binds immediately
+    # (ML_WARMUP_REQUIRED then cannot abort startup)
+    ml_warmup_background: bool = Field(default=False)
+    # Poll ML artifact files and hot-reload on change (0 disables)
+    ml_reload_poll_seconds: float = Field(default=0.0)
+    # Artifact bundle to serve from (see ml/bundle.py). Unset: serve the
+    # loose artifact files, even if a bundle file exists
+    ml_bundle_path: Optional[str] = Field(default=None)
+    # Neighbor fallback for ZIPs without a prediction: only average ZIPs in the same state
+    ml_neighbor_same_state: bool = Field(default=False)
+    # Shared secret for /admin endpoints (unset disables them)
+    admin_token: Optional[str] = Field(default=None)
+    # Logging (see logging_config.py): level and line format of the app loggers
+    log_level: str = Field(default="INFO")
+    log_format: Literal["text", "json"] = Field(default="text")
+    # Honor X-Debug-Trace: 1 (with the admin token) to emit DEBUG traces for a single request
+    log_debug_header_enabled: bool = Field(default=True)
+    # Fraction of requests per path that get a DEBUG trace, e.g.
+    # {"/api/finance/analyze": 0.01}; "*" applies to every other path
+    log_trace_sample_rates: Dict[str, float] = Field(default_factory=dict)
 
     @field_validator("cors_origins", mode="before")
     @classmethod
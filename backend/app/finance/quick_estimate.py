@@ -0,0 +1,147 @@
+"""
+Fast break-even / final-delta estimates without building a timeline.
+
+calculate_unified_analysis walks the horizon month by month and builds a
+pydantic TimelinePoint per month. Quick estimates only need the break-even
+month and the final net worth delta, and those have a closed form: home
+value, rent and the loan balance are geometric in the month index, and the
+buyer-minus-renter investment balance follows the linear recurrence
+
+    X[m] = (X[m-1] + rent[m] - owner_cost[m]) * (1 + r)
+
+whichever side invests the monthly difference. So every month is evaluated
+at once with NumPy. The result matches the calculator up to floating-point
+rounding (see QUICK_ESTIMATE_ERROR_BOUND); the only month-dependent branch,
+PMI, is evaluated per month as well.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+from ..models import ScenarioInputs
+from .calculator import calculate_monthly_payment, get_timeline_based_rates
+
+# Assumptions used when a request only varies price, rent, horizon and ZIP (frontend defaults)
+MARKET_DEFAULTS: Dict[str, float] = {
+    'downPaymentPercent': 20.0,
+    'interestRate': 7.0,
+    'loanTermYears': 30,
+    'propertyTaxRate': 1.0,
+    'homeInsuranceAnnual': 1200.0,
+    'hoaMonthly': 150.0,
+    'maintenanceRate': 1.0,
+    'renterInsuranceAnnual': 240.0,
+    'closingCostsPercent': 3.0,
+    'pmiRate': 0.5,
+    'sellingCostsPercent': 6.0,
+}
+
+# The calculator amortizes over 30 years and cannot run past the last payment
+MAX_HORIZON_YEARS = 30
+
+# Max |quick - calculator| final delta as a fraction of the home price, and
+# break-even month difference, enforced by tests/test_quick_estimate.py
+QUICK_ESTIMATE_ERROR_BOUND = {'final_delta_fraction_of_price': 1e-9, 'break_even_months': 0}
+
+
+@dataclass
+class QuickEstimate:
+    break_even_month: Optional[int]
+    final_net_worth_delta: float
+
+    @property
+    def break_even_year(self) -> Optional[int]:
+        if self.break_even_month is None:
+            return None
+        return (self.break_even_month - 1) // 12 + 1
+
+
+def market_default_inputs(
+    home_price: float,
+    monthly_rent: float,
+    horizon_years: int,
+    home_appreciation_rate: Optional[float] = None,
+    rent_growth_rate: Optional[float] = None,
+) -> ScenarioInputs:
+    """
+    Scenario with the market-default assumptions.
+
+    Growth and investment rates default to the timeline-based rates the
+    frontend uses for the horizon.
+    """
+    rates = get_timeline_based_rates(horizon_years)
+    return ScenarioInputs(
+        homePrice=home_price,
+        monthlyRent=monthly_rent,
+        timeHorizonYears=horizon_years,
+        homeAppreciationRate=rates['homeAppreciationRate'] if home_appreciation_rate is None else home_appreciation_rate,
+        rentGrowthRate=rates['rentGrowthRate'] if rent_growth_rate is None else rent_growth_rate,
+        investmentReturnRate=rates['investmentReturnRate'],
+        **MARKET_DEFAULTS,
+    )
+
+
+def calculate_quick_estimate(inputs: ScenarioInputs) -> QuickEstimate:
+    """
+    Break-even month and final net worth delta, as calculate_unified_analysis would report them.
+
+    Raises:
+        ValueError: If the horizon is longer than the 30-year amortization schedule.
+    """
+    months = inputs.timeHorizonYears * 12
+    if inputs.timeHorizonYears > MAX_HORIZON_YEARS:
+        raise ValueError(f"timeHorizonYears must be at most {MAX_HORIZON_YEARS}")
+
+    closing_costs_percent = inputs.closingCostsPercent if inputs.closingCostsPercent is not None else 3.0
+    selling_costs_percent = inputs.sellingCostsPercent if inputs.sellingCostsPercent is not None else 6.0
+    pmi_rate = inputs.pmiRate if inputs.pmiRate is not None else 0.5
+
+    down_payment = inputs.homePrice * (inputs.downPaymentPercent / 100)
+    loan = max(0.0, inputs.homePrice - down_payment)
+    payment = calculate_monthly_payment(loan, inputs.interestRate, 30)
+
+    m = np.arange(1, months + 1, dtype=np.float64)
+    home_value = inputs.homePrice * (1 + inputs.homeAppreciationRate / 100 / 12) ** m
+    rent = inputs.monthlyRent * (1 + inputs.rentGrowthRate / 100 / 12) ** m
+
+    # Loan balance after each payment; interest accrues on the previous month's balance
+    i = inputs.interestRate / 100 / 12
+    if i > 0:
+        growth = (1 + i) ** m
+        remaining = np.maximum(0.0, loan * growth - payment * (growth - 1) / i)
+    else:
+        remaining = np.maximum(0.0, loan - payment * m)
+    interest = np.concatenate(([loan], remaining[:-1])) * i
+
+    pmi = np.where(remaining / home_value > 0.80, (loan * (pmi_rate / 100)) / 12, 0.0)
+    owner_cost = (
+        interest
+        + (inputs.propertyTaxRate / 100 * home_value) / 12
+        + inputs.homeInsuranceAnnual / 12
+        + (inputs.maintenanceRate / 100 * home_value) / 12
+        + inputs.hoaMonthly
+        + pmi
+    )
+
+    # Buyer cash account minus renter portfolio: X[m] = (X[m-1] + diff[m]) * g
+    g = 1 + inputs.investmentReturnRate / 100 / 12
+    start = -down_payment - inputs.homePrice * (closing_costs_percent / 100) - down_payment
+    diff = rent - owner_cost
+    if g > 0:
+        discounted = np.cumsum(diff * g ** (1 - m))
+        investments = g ** m * (start + discounted)
+    else:  # -100% return wipes both accounts every month
+        investments = np.zeros(months)
+
+    delta = home_value - remaining + investments
+    delta[-1] -= home_value[-1] * (selling_costs_percent / 100)
+
+    reached = np.flatnonzero(delta >= 0)
+    return QuickEstimate(
+        break_even_month=int(reached[0]) + 1 if reached.size else None,
+        final_net_worth_delta=float(delta[-1]),
+    )
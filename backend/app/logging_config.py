@@ -0,0 +1,174 @@
+"""
+Leveled, non-blocking logging for the API.
+
+Records from the ``app`` logger tree go through a QueueHandler; a
+QueueListener thread does the actual (blocking) writes, so request threads
+never wait on stdout/stderr. Messages use %-style arguments and are only
+formatted when a record is actually emitted.
+
+DEBUG traces (the per-request ML / Monte Carlo details) are off by default.
+They are emitted when LOG_LEVEL=DEBUG, for a request that sends
+``X-Debug-Trace: 1`` with a valid ``X-Admin-Token`` (the header is ignored
+while ADMIN_TOKEN is unset), or for a sampled fraction of requests per route
+(LOG_TRACE_SAMPLE_RATES). Loggers from ``get_logger`` honor the per-request
+switch; the decision is made once per request so a trace is never partial.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import secrets
+import sys
+from contextvars import ContextVar
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .config import Settings
+
+APP_LOGGER = "app"
+DEBUG_TRACE_HEADER = b"x-debug-trace"
+ADMIN_TOKEN_HEADER = b"x-admin-token"
+
+_debug_trace: ContextVar[bool] = ContextVar("debug_trace", default=False)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class TraceLogger(logging.LoggerAdapter):
+    """Logger whose DEBUG records are also emitted while a debug trace is active."""
+
+    def isEnabledFor(self, level: int) -> bool:
+        if level >= logging.DEBUG and _debug_trace.get():
+            return True
+        return self.logger.isEnabledFor(level)
+
+    def process(self, msg: Any, kwargs: Any) -> Tuple[Any, Any]:
+        # Keep per-call extra={...} fields (LoggerAdapter replaces them before Python 3.13)
+        return msg, kwargs
+
+    def log(self, level: int, msg: Any, *args: Any, **kwargs: Any) -> None:
+        if self.isEnabledFor(level):
+            msg, kwargs = self.process(msg, kwargs)
+            # Logger._log skips the logger's own level check; the extra stack level
+            # attributes the record to our caller rather than to this method
+            kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
+            self.logger._log(level, msg, args, **kwargs)
+
+
+def get_logger(name: str) -> TraceLogger:
+    return TraceLogger(logging.getLogger(name), {})
+
+
+def debug_enabled() -> bool:
+    """True if DEBUG records are emitted for the current request (guard for costly log arguments)."""
+    return _debug_trace.get() or logging.getLogger(APP_LOGGER).isEnabledFor(logging.DEBUG)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(settings: Settings) -> None:
+    """Route the ``app`` logger tree through a queue to a background writer thread (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stderr)
+    if settings.log_format == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    app_logger = logging.getLogger(APP_LOGGER)
+    app_logger.setLevel(settings.log_level.upper())
+    app_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    app_logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    app_logger = logging.getLogger(APP_LOGGER)
+    for handler in list(app_logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            app_logger.removeHandler(handler)
+    app_logger.propagate = True
+    app_logger.setLevel(logging.NOTSET)
+    _listener = None
+
+
+def should_trace(path: str, header: Optional[str], settings: Settings, admin_token: Optional[str] = None) -> bool:
+    """
+    Debug-trace decision for one request: explicit header first, then the route's sample rate.
+
+    The header only counts when it comes with the admin token, so clients
+    cannot make the server log DEBUG details of their requests at will.
+    """
+    if header is not None and settings.log_debug_header_enabled and _is_admin(admin_token, settings):
+        return header.strip().lower() in ("1", "true", "yes", "on")
+    rate = _sample_rate(path, settings.log_trace_sample_rates)
+    return rate > 0 and random.random() < rate
+
+
+def _is_admin(token: Optional[str], settings: Settings) -> bool:
+    if not settings.admin_token or token is None:
+        return False
+    return secrets.compare_digest(token.encode("utf-8"), settings.admin_token.encode("utf-8"))
+
+
+def _sample_rate(path: str, rates: Mapping[str, float]) -> float:
+    if path in rates:
+        return rates[path]
+    return rates.get("*", 0.0)
+
+
+class DebugTraceMiddleware:
+    """ASGI middleware that turns debug traces on for requests selected by should_trace."""
+
+    def __init__(self, app, settings: Settings) -> None:
+        self.app = app
+        self.settings = settings
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = admin_token = None
+        for name, value in scope.get("headers", ()):
+            if name == DEBUG_TRACE_HEADER:
+                header = value.decode("latin-1")
+            elif name == ADMIN_TOKEN_HEADER:
+                admin_token = value.decode("latin-1")
+        token = _debug_trace.set(should_trace(scope["path"], header, self.settings, admin_token))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _debug_trace.reset(token)
@@ -3,38 +3,85 @@
 from __future__ import annotations
 
 import json
+import secrets
+import threading
+from contextlib import asynccontextmanager
 from typing import List, Literal, Optional
 
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
 from .config import get_settings
-from .finance.calculator import (
-    calculate_analysis, calculate_cash_flow, calculate_cumulative_costs, calculate_liquidity_timeline,
-    calculate_tax_savings, calculate_sensitivity, calculate_scenarios, calculate_heatmap, calculate_monte_carlo)
+from .logging_config import DebugTraceMiddleware, configure_logging, debug_enabled, get_logger, shutdown_logging
+from .metrics import TimingMiddleware, render_prometheus, span
+from .profiling import MAX_WINDOW_SECONDS, ProfiledRoute, ProfilingMiddleware, get_profile, profile_window, window_lock
 from .models import (
     AnalysisRequest, AnalysisResponse, TimelinePoint, ScenarioRequest, SensitivityRequest,
     HeatmapRequest, MonteCarloRequest, HomePricePathSummary, ChartInsightRequest, ChartInsightResponse,
-    SummaryInsightRequest, SummaryInsightResponse
+    SummaryInsightRequest, SummaryInsightResponse, QuickEstimateRequest, QuickEstimateResponse
 )
-from .services.openai_service import OpenAIService
+from .services.llm_cache import LLMResponseCache, bucket, get_llm_cache
+from .services.openai_service import (
+    AsyncOpenAIService, close_openai_services, get_shared_async_openai_service, reload_openai_service)
+from .single_flight import request_key, single_flight
+
+# Heavy dependencies (numpy via the calculator, joblib/sklearn via the ML
+# registry, the OpenAI SDK) are imported inside the functions that need
+# them, so importing this module stays cheap; tests/test_import_budget.py
+# enforces that.
 
 settings = get_settings()
+logger = get_logger(__name__)
 
-app = FastAPI(title="Rent vs Buy AI Backend", version="0.1.0")
 
-@app.on_event("startup")
-async def startup_event():
-    """Log configuration status on startup."""
-    api_key_loaded = bool(settings.openai_api_key)
-    print(f"[Startup] OpenAI API key loaded: {api_key_loaded}")
-    if api_key_loaded:
-        print(f"[Startup] API key length: {len(settings.openai_api_key)}")
-        print(f"[Startup] API key starts with 'sk-': {settings.openai_api_key.startswith('sk-')}")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Log configuration status and warm up ML artifacts on startup."""
+    configure_logging(settings)
+    api_key = settings.openai_api_key
+    if api_key:
+        logger.info("OpenAI API key loaded (length %d, starts with 'sk-': %s)", len(api_key), api_key.startswith("sk-"))
     else:
-        print("[Startup] WARNING: OpenAI API key not found. AI features will use mock mode.")
+        logger.warning("OpenAI API key not found. AI features will use mock mode.")
+
+    from .ml.registry import ArtifactWatcher
+    from .ml.warmup import run_warmup
+
+    if settings.ml_warmup_background:
+        # Start serving immediately; /ready stays 503 until the warmup thread finishes
+        logger.info("ML warmup running in background")
+        threading.Thread(target=run_warmup, name="ml-warmup", daemon=True).start()
+    else:
+        report = await run_in_threadpool(run_warmup)
+        if report.ready:
+            logger.info("ML warmup complete in %.1f ms", report.total_ms)
+        else:
+            logger.warning("ML warmup failed (%s). ZIP predictions will use fallback rates.", report.error)
+            if settings.ml_warmup_required:
+                raise RuntimeError(f"ML warmup failed: {report.error}")
+
+    watcher = None
+    if settings.ml_reload_poll_seconds > 0:
+        watcher = ArtifactWatcher(settings.ml_reload_poll_seconds, on_change=run_warmup)
+        watcher.start()
+
+    # Build the shared OpenAI client up front rather than on the first AI request
+    get_shared_async_openai_service()
+
+    yield
+
+    if watcher is not None:
+        watcher.stop()
+    await close_openai_services()
+    shutdown_logging()
+
+
+app = FastAPI(title="Rent vs Buy AI Backend", version="0.1.0", lifespan=lifespan)
+# Lets a single request be profiled (X-Profile: 1, admin only); set before any route is declared
+app.router.route_class = ProfiledRoute
 
 app.add_middleware(
     CORSMiddleware,
@@ -42,7 +89,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Per-stage Server-Timing header on every response, histograms at /metrics
+app.add_middleware(TimingMiddleware)
+# DEBUG traces for requests with X-Debug-Trace: 1 or sampled via LOG_TRACE_SAMPLE_RATES
+app.add_middleware(DebugTraceMiddleware, settings=settings)
+app.add_middleware(ProfilingMiddleware, settings=settings)
 
 
 @app.get("/")
@@ -54,7 +107,10 @@ def root() -> dict:
         "status": "running",
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
+            "metrics": "/metrics",
             "finance_analyze": f"{settings.api_prefix}/finance/analyze",
+            "finance_quick_estimate": f"{settings.api_prefix}/finance/quick-estimate",
             "finance_heatmap": f"{settings.api_prefix}/finance/heatmap",
             "finance_scenarios": f"{settings.api_prefix}/finance/scenarios",
             "finance_sensitivity": f"{settings.api_prefix}/finance/sensitivity",
@@ -71,23 +127,107 @@ def root() -> dict:
 def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
+
+@app.get("/ready")
+def readiness_check() -> JSONResponse:
+    """Readiness probe - 200 once ML artifacts are loaded and validated, 503 otherwise."""
+    from .ml.warmup import get_warmup_report
+
+    report = get_warmup_report()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if report.ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if report.ready else "not_ready", "warmup": report.to_dict()},
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Request and per-stage latency histograms in the Prometheus text format."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/debug/config")
 def debug_config() -> dict:
     """Debug endpoint to check configuration status."""
-    from app.services.openai_service import OpenAIService
     try:
-        service = OpenAIService()
+        service = get_shared_async_openai_service()
+        llm_cache = get_llm_cache()
+        current_settings = get_settings()
+        api_key = current_settings.openai_api_key
         return {
-            "api_key_loaded": bool(settings.openai_api_key),
-            "api_key_length": len(settings.openai_api_key) if settings.openai_api_key else 0,
-            "api_key_starts_with_sk": settings.openai_api_key.startswith("sk-") if settings.openai_api_key else False,
+            "api_key_loaded": bool(api_key),
+            "api_key_length": len(api_key) if api_key else 0,
+            "api_key_starts_with_sk": api_key.startswith("sk-") if api_key else False,
             "service_mock_mode": service._is_mock_mode,
             "service_client_exists": service._client is not None,
+            "llm_cache": llm_cache.stats() if llm_cache is not None else None,
         }
     except Exception as e:
         return {"error": str(e)}
 
 
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Guard for /admin endpoints; they are disabled unless ADMIN_TOKEN is set."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+@app.post("/admin/ml/reload", dependencies=[Depends(require_admin)])
+def reload_ml_models() -> JSONResponse:
+    """Hot-reload ML artifacts from disk; the previous version keeps serving if validation fails."""
+    from .ml.registry import registry
+    from .ml.warmup import run_warmup
+
+    previous_version = registry.version
+    report = run_warmup()
+    reloaded = report.error is None
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if reloaded else status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={
+            "reloaded": reloaded,
+            "previous_version": previous_version,
+            "model_version": report.model_version,
+            "warmup": report.to_dict(),
+        },
+    )
+
+
+@app.post("/admin/openai/reload", dependencies=[Depends(require_admin)])
+def reload_openai_client() -> dict:
+    """Re-read settings (e.g. a rotated OPENAI_API_KEY) and replace the shared OpenAI client."""
+    service = reload_openai_service()
+    return {
+        "reloaded": True,
+        "service_mock_mode": service._is_mock_mode,
+        "service_client_exists": service._client is not None,
+    }
+
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+def profile_all_requests(
+    seconds: float = Query(default=10.0, gt=0, le=MAX_WINDOW_SECONDS),
+    interval_ms: float = Query(default=5.0, ge=1.0, le=1000.0),
+) -> PlainTextResponse:
+    """Sample every busy thread for a time window; returns folded stacks for flamegraph tools."""
+    if not window_lock.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+    try:
+        profiler = profile_window(seconds, interval=interval_ms / 1000.0)
+    finally:
+        window_lock.release()
+    return PlainTextResponse(profiler.folded(), headers={"X-Profile-Samples": str(profiler.samples)})
+
+
+@app.get("/admin/profile/{profile_id}", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+def get_request_profile(profile_id: str) -> PlainTextResponse:
+    """Folded stacks of a request profiled with X-Profile: 1 (see the X-Profile-Id response header)."""
+    folded = get_profile(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown profile id")
+    return PlainTextResponse(folded)
+
+
 class ChatMessage(BaseModel):
     role: Literal["user", "assistant", "system"]
     content: str
@@ -100,15 +240,10 @@ class ChatRequest(BaseModel):
     max_tokens: int = 200
 
 
-def get_openai_service() -> OpenAIService:
+def get_openai_service() -> AsyncOpenAIService:
+    # Shared, pooled async client; rotate keys via POST /admin/openai/reload
     try:
-        # Clear settings cache to ensure fresh API key
-        get_settings.cache_clear()
-        fresh_settings = get_settings()
-        print(f"[get_openai_service] API key present: {bool(fresh_settings.openai_api_key)}")
-        service = OpenAIService()
-        print(f"[get_openai_service] Service created - mock_mode: {service._is_mock_mode}, client_exists: {service._client is not None}")
-        return service
+        return get_shared_async_openai_service()
     except ValueError as exc:  # pragma: no cover - configuration issue
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -116,65 +251,72 @@ def get_openai_service() -> OpenAIService:
         ) from exc
 
 
+def _model_version() -> Optional[str]:
+    """Active ML model version without triggering a load (part of coalescing keys)."""
+    from .ml.registry import registry
+
+    return registry.version
+
+
 @app.post(f"{settings.api_prefix}/finance/analyze", response_model=AnalysisResponse)
-def analyze_finance(request: AnalysisRequest) -> AnalysisResponse:
+def analyze_finance(request: AnalysisRequest) -> Response:
     """Unified analysis endpoint - returns single AnalysisResult with all data."""
+
+    def compute() -> bytes:
+        response = _run_analysis(request)
+        # Serialize here (timed, and once for all coalesced callers) instead of in FastAPI
+        with span("serialize"):
+            return response.model_dump_json().encode("utf-8")
+
+    # Identical concurrent requests (several charts mounting at once) share one computation
+    key = request_key("finance/analyze", request.model_dump(mode="json"), _model_version())
+    return Response(content=single_flight.do(key, compute), media_type="application/json")
+
+
+def _run_analysis(request: AnalysisRequest) -> AnalysisResponse:
     from .finance.calculator import calculate_unified_analysis
+    from .ml.registry import registry
     
     # Apply ML predictions if ZIP code is provided
     inputs = request.inputs
     ml_rates_used = None  # Initialize
+    snapshot = None  # Model snapshot pinned for this request
     if request.zipCode:
-        print(f"[ML DEBUG] ========== ML Prediction Request ==========")
-        print(f"[ML DEBUG] ZIP code provided: {request.zipCode}")
-        print(f"[ML DEBUG] Original rates: home={inputs.homeAppreciationRate:.3f}%, rent={inputs.rentGrowthRate:.3f}%")
+        logger.debug(
+            "ML prediction for ZIP %s (original rates: home=%.3f%%, rent=%.3f%%)",
+            request.zipCode, inputs.homeAppreciationRate, inputs.rentGrowthRate,
+        )
         try:
-            from .ml.growth_model import (
-                load_models,
-                predict_zip_growth_with_fallback,
-                get_zip_home_volatility,
-            )
+            from .ml.growth_model import predict_zip_growth_with_fallback
             
             # Store fallback rates (original percentage values)
             fallback_home = inputs.homeAppreciationRate
             fallback_rent = inputs.rentGrowthRate
             
-            # Ensure models are loaded
-            print(f"[ML DEBUG] Loading ML models...")
-            load_models()
-            print(f"[ML DEBUG] Models loaded successfully")
-            
-            # Convert fallback rates from percent to decimal for ML function
-            fallback_home_decimal = fallback_home / 100.0
-            fallback_rent_decimal = fallback_rent / 100.0
-            print(f"[ML DEBUG] Calling predict_zip_growth_with_fallback with fallback: home={fallback_home_decimal:.6f}, rent={fallback_rent_decimal:.6f}")
+            # Ensure models are loaded and pin one version for the whole request
+            with span("model_load"):
+                snapshot = registry.get()
+            logger.debug("Models loaded (version %s)", snapshot.version)
             
             # Get ML predictions with fallback to similar ZIPs (returns as decimals, e.g., 0.03 = 3%)
             ml_home, ml_rent = predict_zip_growth_with_fallback(
                 request.zipCode,
-                fallback_home_rate=fallback_home_decimal,
-                fallback_rent_rate=fallback_rent_decimal,
+                fallback_home_rate=fallback_home / 100.0,
+                fallback_rent_rate=fallback_rent / 100.0,
                 k=10,  # Use 10 similar ZIPs for fallback
+                snapshot=snapshot,
             )
-            print(f"[ML DEBUG] Function returned: home={ml_home:.6f}, rent={ml_rent:.6f}")
             
             # Convert ML predictions from decimal to percentage
             # ML returns 0.03 (3%), calculator expects 3.0 (percentage)
-            ml_home_pct = ml_home * 100.0
-            ml_rent_pct = ml_rent * 100.0
-            
-            # Debug log (updated to mention fallback may have been used)
-            print(
-                f"[ML DEBUG] ZIP={request.zipCode} "
-                f"fallback_home={fallback_home:.3f}%, fallback_rent={fallback_rent:.3f}% "
-                f"-> ml_home={ml_home_pct:.3f}%, ml_rent={ml_rent_pct:.3f}% "
-                f"(may include fallback to similar ZIPs if direct prediction unavailable)"
+            homeAppreciationRate = ml_home * 100.0
+            rentGrowthRate = ml_rent * 100.0
+            logger.debug(
+                "ZIP=%s fallback_home=%.3f%%, fallback_rent=%.3f%% -> ml_home=%.3f%%, ml_rent=%.3f%% "
+                "(may include fallback to similar ZIPs)",
+                request.zipCode, fallback_home, fallback_rent, homeAppreciationRate, rentGrowthRate,
             )
             
-            # Override rates with ML predictions
-            homeAppreciationRate = ml_home_pct
-            rentGrowthRate = ml_rent_pct
-            
             # Create new inputs with ML-predicted rates
             inputs_dict = inputs.model_dump()
             inputs_dict['homeAppreciationRate'] = homeAppreciationRate
@@ -187,19 +329,18 @@ def analyze_finance(request: AnalysisRequest) -> AnalysisResponse:
                 'rent_growth_rate': rentGrowthRate
             }
         except Exception as e:
-            # Debug log for errors
-            print(f"[ML DEBUG] Error using ML growth model for ZIP={getattr(request, 'zipCode', None)}: {e}")
             # Log warning but continue with original rates
-            import logging
-            logging.warning(f"ML prediction failed for ZIP {request.zipCode}: {e}. Using original rates.")
+            logger.warning("ML prediction failed for ZIP %s: %s. Using original rates.", request.zipCode, e)
             ml_rates_used = None
     
-    analysis = calculate_unified_analysis(inputs)
+    with span("timeline"):
+        analysis = calculate_unified_analysis(inputs)
     
     # Add the rates that were actually used to the response
     if ml_rates_used:
         analysis.home_appreciation_rate = ml_rates_used['home_appreciation_rate']
         analysis.rent_growth_rate = ml_rates_used['rent_growth_rate']
+        analysis.model_version = snapshot.version
     else:
         # Use the rates from inputs (fallback rates)
         analysis.home_appreciation_rate = inputs.homeAppreciationRate
@@ -208,59 +349,49 @@ def analyze_finance(request: AnalysisRequest) -> AnalysisResponse:
     # Monte Carlo home price path simulation
     # Only run Monte Carlo if explicitly requested (it's computationally expensive)
     if request.includeMonteCarlo:
-        print(f"[MC DEBUG] ========== Starting Monte Carlo Simulation ==========")
         try:
             from .finance.monte_carlo import simulate_home_price_paths, summarize_paths
             from .ml.growth_model import get_zip_home_volatility
             
-            # Get the starting home value (same as used in projections)
-            initial_price = inputs.homePrice
-            print(f"[MC DEBUG] Initial price: ${initial_price:,.2f}")
-            
-            # Get the projection horizon in years (same as used in other charts)
-            years = inputs.timeHorizonYears
-            print(f"[MC DEBUG] Time horizon: {years} years")
-            
             # Get the home appreciation rate in decimal form (already includes ML override if ZIP provided)
-            home_appreciation_rate_pct = analysis.home_appreciation_rate
-            mu = home_appreciation_rate_pct / 100.0
-            print(f"[MC DEBUG] Home appreciation rate: {home_appreciation_rate_pct:.4f}% (mu={mu:.6f} decimal)")
+            mu = analysis.home_appreciation_rate / 100.0
             
             # Define fallback volatility (15% annual)
             fallback_sigma = 0.15
             
             # Get ZIP-specific volatility if ZIP code is provided
             if request.zipCode:
-                print(f"[MC DEBUG] ZIP code provided: {request.zipCode}, looking up volatility...")
-                sigma = get_zip_home_volatility(request.zipCode, fallback_sigma)
-                print(f"[MC DEBUG] ZIP={request.zipCode} -> sigma={sigma:.4f} ({sigma*100:.2f}% annual volatility, fallback={fallback_sigma:.4f})")
+                with span("zip_volatility"):
+                    sigma = get_zip_home_volatility(request.zipCode, fallback_sigma, snapshot=snapshot)
             else:
                 sigma = fallback_sigma
-                print(f"[MC DEBUG] No ZIP code -> using fallback sigma={sigma:.4f} ({sigma*100:.2f}% annual volatility)")
             
             runs = request.monteCarloRuns or 150
-            # Run Monte Carlo simulation
-            print(f"[MC DEBUG] Running Monte Carlo simulation with {runs} paths...")
-            paths = simulate_home_price_paths(
-                initial_price=initial_price,
-                annual_mu=mu,
-                annual_sigma=sigma,
-                years=years,
-                n_paths=runs,
+            logger.debug(
+                "Monte Carlo: price=%.2f, years=%d, mu=%.6f, sigma=%.4f (fallback=%.4f, ZIP=%s), paths=%d",
+                inputs.homePrice, inputs.timeHorizonYears, mu, sigma, fallback_sigma, request.zipCode, runs,
             )
-            print(f"[MC DEBUG] Generated {len(paths)} price paths, each with {len(paths[0]) if paths else 0} time steps")
-            
-            # Summarize paths
-            print(f"[MC DEBUG] Summarizing paths to compute percentiles...")
-            summary = summarize_paths(paths)
-            print(f"[MC DEBUG] Summary computed: {len(summary['years'])} years, p10/p50/p90 arrays all length {len(summary['p10'])}")
+            with span("monte_carlo_simulate"):
+                # Same starting value and horizon as the other charts
+                paths = simulate_home_price_paths(
+                    initial_price=inputs.homePrice,
+                    annual_mu=mu,
+                    annual_sigma=sigma,
+                    years=inputs.timeHorizonYears,
+                    n_paths=runs,
+                )
             
-            # Show sample values
-            if len(summary['years']) > 0:
-                print(f"[MC DEBUG] Sample values (Year {summary['years'][0]}): p10=${summary['p10'][0]:,.2f}, p50=${summary['p50'][0]:,.2f}, p90=${summary['p90'][0]:,.2f}")
-                if len(summary['years']) > 1:
-                    final_idx = len(summary['years']) - 1
-                    print(f"[MC DEBUG] Final values (Year {summary['years'][final_idx]}): p10=${summary['p10'][final_idx]:,.2f}, p50=${summary['p50'][final_idx]:,.2f}, p90=${summary['p90'][final_idx]:,.2f}")
+            with span("monte_carlo_summarize"):
+                summary = summarize_paths(paths)
+            if debug_enabled() and summary['years']:
+                # Only build the sample values when the trace is actually emitted
+                last = len(summary['years']) - 1
+                logger.debug(
+                    "Monte Carlo summary: %d years; year %s p10/p50/p90=%.2f/%.2f/%.2f; year %s p10/p50/p90=%.2f/%.2f/%.2f",
+                    len(summary['years']),
+                    summary['years'][0], summary['p10'][0], summary['p50'][0], summary['p90'][0],
+                    summary['years'][last], summary['p10'][last], summary['p50'][last], summary['p90'][last],
+                )
             
             # Convert to Pydantic model
             analysis.monte_carlo_home_prices = HomePricePathSummary(
@@ -269,34 +400,76 @@ def analyze_finance(request: AnalysisRequest) -> AnalysisResponse:
                 p50=summary["p50"],
                 p90=summary["p90"]
             )
-            
-            print(f"[MC DEBUG] ✅ Monte Carlo simulation complete and attached to analysis result")
-            print(f"[MC DEBUG] ========== Monte Carlo Simulation Complete ==========")
         except Exception as e:
             # Log warning but don't break the analysis
-            import logging
-            import traceback
-            logging.warning(f"Monte Carlo simulation failed: {e}. Continuing without Monte Carlo data.")
-            print(f"[MC DEBUG] ❌ Error in Monte Carlo simulation: {e}")
-            print(f"[MC DEBUG] Traceback: {traceback.format_exc()}")
-            print(f"[MC DEBUG] ========== Monte Carlo Simulation Failed ==========")
+            logger.warning(
+                "Monte Carlo simulation failed: %s. Continuing without Monte Carlo data.", e, exc_info=True
+            )
             # Leave monte_carlo_home_prices as None (already default)
-    else:
-        print(f"[MC DEBUG] Monte Carlo simulation skipped (includeMonteCarlo=False)")
     
     return AnalysisResponse(analysis=analysis)
 
 
+@app.post(f"{settings.api_prefix}/finance/quick-estimate", response_model=QuickEstimateResponse)
+def quick_estimate(request: QuickEstimateRequest) -> QuickEstimateResponse:
+    """
+    Break-even and final net worth delta for a market-default scenario.
+
+    Same numbers as /finance/analyze for these inputs (within errorBound)
+    without building the monthly timeline.
+    """
+    from .finance.calculator import get_timeline_based_rates
+    from .finance.quick_estimate import QUICK_ESTIMATE_ERROR_BOUND, calculate_quick_estimate, market_default_inputs
+
+    rates = get_timeline_based_rates(request.timeHorizonYears)
+    home_rate, rent_rate = rates['homeAppreciationRate'], rates['rentGrowthRate']
+    model_version = None
+    if request.zipCode:
+        try:
+            from .ml.growth_model import predict_zip_growth_with_fallback
+            from .ml.registry import registry
+
+            snapshot = registry.get()
+            ml_home, ml_rent = predict_zip_growth_with_fallback(
+                request.zipCode,
+                fallback_home_rate=home_rate / 100.0,
+                fallback_rent_rate=rent_rate / 100.0,
+                snapshot=snapshot,
+            )
+            home_rate, rent_rate = ml_home * 100.0, ml_rent * 100.0
+            model_version = snapshot.version
+        except Exception as e:
+            logger.warning("ML prediction failed for ZIP %s: %s. Using default rates.", request.zipCode, e)
+
+    inputs = market_default_inputs(
+        request.homePrice, request.monthlyRent, request.timeHorizonYears, home_rate, rent_rate
+    )
+    estimate = calculate_quick_estimate(inputs)
+    return QuickEstimateResponse(
+        breakEvenMonth=estimate.break_even_month,
+        breakEvenYear=estimate.break_even_year,
+        finalNetWorthDelta=estimate.final_net_worth_delta,
+        homeAppreciationRate=inputs.homeAppreciationRate,
+        rentGrowthRate=inputs.rentGrowthRate,
+        investmentReturnRate=inputs.investmentReturnRate,
+        modelVersion=model_version,
+        errorBound=QUICK_ESTIMATE_ERROR_BOUND,
+    )
+
+
 @app.post(f"{settings.api_prefix}/finance/heatmap")
 def break_even_heatmap(req: HeatmapRequest) -> list:
+    from .finance.calculator import calculate_heatmap
     return calculate_heatmap(req.timelines, req.downPayments, req.base)
 
 @app.post(f"{settings.api_prefix}/finance/scenarios")
 def scenario_overlay_chart(req: ScenarioRequest) -> list:
+    from .finance.calculator import calculate_scenarios
     return calculate_scenarios(req.scenarios)
 
 @app.post(f"{settings.api_prefix}/finance/sensitivity")
 def sensitivity_chart(req: SensitivityRequest) -> list:
+    from .finance.calculator import calculate_sensitivity
     return calculate_sensitivity(
         req.base,
         interest_rate_delta=req.interestRateDelta,
@@ -307,6 +480,7 @@ def sensitivity_chart(req: SensitivityRequest) -> list:
 @app.post(f"{settings.api_prefix}/finance/tax-savings")
 def tax_savings(inputs: dict) -> list:
     # expects inputs matching ScenarioInputs + optional income/tax_bracket
+    from .finance.calculator import calculate_analysis, calculate_tax_savings
     from .models import ScenarioInputs
     scenario = ScenarioInputs(**inputs)
     analysis = calculate_analysis(scenario)
@@ -317,22 +491,26 @@ def tax_savings(inputs: dict) -> list:
 
 @app.post(f"{settings.api_prefix}/finance/monte-carlo")
 def monte_carlo_endpoint(req: MonteCarloRequest) -> dict:
-    return calculate_monte_carlo(req.inputs, req.runs)
+    from .finance.calculator import calculate_monte_carlo
+    key = request_key("finance/monte-carlo", req.model_dump(mode="json"))
+    return single_flight.do(key, lambda: calculate_monte_carlo(req.inputs, req.runs))
 
 
 @app.post(f"{settings.api_prefix}/finance/chart-insight")
-def chart_insight_endpoint(
-    request: ChartInsightRequest, openai_service: OpenAIService = Depends(get_openai_service)
+async def chart_insight_endpoint(
+    request: ChartInsightRequest,
+    openai_service: AsyncOpenAIService = Depends(get_openai_service),
+    llm_cache: Optional[LLMResponseCache] = Depends(get_llm_cache),
 ):
     """Generate a natural-language explanation for a specific chart + dataset (streaming)."""
-    try:
-        chart_payload = json.dumps(
-            request.chartData,
-            default=lambda obj: getattr(obj, "__dict__", str(obj)),
-            ensure_ascii=False,
-        )
-    except (TypeError, ValueError):
-        chart_payload = str(request.chartData)
+    from .services.prompt_compaction import compact_chart_payload, trim_history
+
+    # Yearly points, rounded numbers, no empty fields: keeps large charts within a token budget
+    chart_payload = compact_chart_payload(
+        request.chartData,
+        max_points=settings.chart_insight_max_points,
+        token_budget=settings.chart_insight_payload_token_budget,
+    )
 
     messages = [
         {
@@ -352,16 +530,20 @@ def chart_insight_endpoint(
         },
     ]
     
-    # Add conversation history if present
+    # Add the most recent conversation history that fits the budget
     if request.conversation:
-        for msg in request.conversation:
+        history = trim_history(
+            [(msg.question, msg.answer) for msg in request.conversation],
+            token_budget=settings.chart_insight_history_token_budget,
+        )
+        for question, answer in history:
             messages.append({
                 "role": "user",
-                "content": f"Question: {msg.question}",
+                "content": f"Question: {question}",
             })
             messages.append({
                 "role": "assistant",
-                "content": msg.answer,
+                "content": answer,
             })
     
     # Detect if user is confused
@@ -391,13 +573,14 @@ def chart_insight_endpoint(
         ),
     })
 
-    def generate():
+    async def generate():
         try:
-            for chunk in openai_service.chat_completion_stream(
+            async for chunk in openai_service.chat_completion_stream(
                 model="gpt-4o-mini",
                 messages=messages,
                 temperature=0.4,
                 max_tokens=100,
+                cache=llm_cache,
             ):
                 yield f"data: {json.dumps({'chunk': chunk})}\n\n"
             yield "data: [DONE]\n\n"
@@ -415,11 +598,16 @@ def chart_insight_endpoint(
     )
 
 @app.post(f"{settings.api_prefix}/finance/summary-insight", response_model=SummaryInsightResponse)
-def summary_insight_endpoint(
-    request: SummaryInsightRequest, openai_service: OpenAIService = Depends(get_openai_service)
+async def summary_insight_endpoint(
+    request: SummaryInsightRequest,
+    openai_service: AsyncOpenAIService = Depends(get_openai_service),
+    llm_cache: Optional[LLMResponseCache] = Depends(get_llm_cache),
 ) -> SummaryInsightResponse:
     """Generate a natural-language summary explaining the net worth comparison scenario."""
     try:
+        # Bucket the delta before it reaches the prompt so near-identical results share a cache entry
+        final_delta = bucket(request.finalDelta, settings.llm_cache_delta_bucket)
+
         # Build context for the prompt
         location_context = ""
         if request.zipCode:
@@ -433,9 +621,9 @@ def summary_insight_endpoint(
         
         winner_text = ""
         if request.finalDelta > 0:
-            winner_text = f"By the end of your {request.timelineYears}-year timeline, buying puts you ahead by ${abs(request.finalDelta):,.0f} in net worth compared to renting."
+            winner_text = f"By the end of your {request.timelineYears}-year timeline, buying puts you ahead by ${abs(final_delta):,.0f} in net worth compared to renting."
         else:
-            winner_text = f"By the end of your {request.timelineYears}-year timeline, renting puts you ahead by ${abs(request.finalDelta):,.0f} in net worth compared to buying."
+            winner_text = f"By the end of your {request.timelineYears}-year timeline, renting puts you ahead by ${abs(final_delta):,.0f} in net worth compared to buying."
         
         # Build the prompt
         prompt = f"""You are a friendly financial advisor explaining a rent-vs-buy analysis to someone considering purchasing a home{location_context}.
@@ -457,7 +645,7 @@ Write a clear, conversational 3-4 sentence summary that:
 
 Keep it friendly, accessible, and avoid jargon. Write as if you're talking to a friend who's making a big decision."""
 
-        response_text = openai_service.chat_completion(
+        response_text = await openai_service.chat_completion(
             model="gpt-4o-mini",
             messages=[
                 {
@@ -471,6 +659,7 @@ Keep it friendly, accessible, and avoid jargon. Write as if you're talking to a
             ],
             temperature=0.7,
             max_tokens=300,
+            cache=llm_cache,
         )
         
         return SummaryInsightResponse(insight=response_text)
@@ -482,10 +671,10 @@ Keep it friendly, accessible, and avoid jargon. Write as if you're talking to a
 
 
 @app.post(f"{settings.api_prefix}/ai/chat")
-def chat_completion(
-    request: ChatRequest, openai_service: OpenAIService = Depends(get_openai_service)
+async def chat_completion(
+    request: ChatRequest, openai_service: AsyncOpenAIService = Depends(get_openai_service)
 ) -> dict[str, str]:
-    response_text = openai_service.chat_completion(
+    response_text = await openai_service.chat_completion(
         model=request.model,
         messages=[message.model_dump() for message in request.messages],
         temperature=request.temperature,
@@ -0,0 +1,199 @@
+"""
+Per-stage timing spans, Server-Timing headers and Prometheus histograms.
+
+Code wraps a stage in ``with span("timeline"):``. The duration is observed
+in the process-wide ``stage_duration_seconds`` histogram and, while a
+request is being served, also recorded on that request so the middleware
+can report it in a ``Server-Timing`` response header. ``render_prometheus``
+produces the text exposition format served at ``/metrics``.
+
+Metrics live in process memory: with several uvicorn workers each worker
+reports its own numbers.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; covers sub-millisecond lookups up to multi-second Monte Carlo runs
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label combination."""
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then [sum]
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[key] = series
+            counts, total = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            return sum(series[0]) if series else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(counts), total[0]) for key, (counts, total) in sorted(self._series.items())]
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    pairs = (f'{name}="{_escape_label(value)}"' for name, value in key)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route, method and status.",
+)
+STAGE_DURATION = Histogram(
+    "stage_duration_seconds",
+    "Latency of instrumented stages (model load, ZIP resolution, timeline build, ...).",
+)
+_HISTOGRAMS = (REQUEST_DURATION, STAGE_DURATION)
+
+
+def render_prometheus() -> str:
+    """All histograms in the Prometheus text exposition format (version 0.0.4)."""
+    lines: List[str] = []
+    for histogram in _HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+# (stage, milliseconds) pairs recorded for the request being served. The list
+# is shared with threadpool workers, which run in a copy of the request context.
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+
+@contextmanager
+def collect_spans() -> Iterator[List[Tuple[str, float]]]:
+    """Record the spans of everything run inside the block (and its threadpool calls)."""
+    spans: List[Tuple[str, float]] = []
+    token = _request_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _request_spans.reset(token)
+
+
+def record_span(stage: str, seconds: float) -> None:
+    STAGE_DURATION.observe(seconds, stage=stage)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds * 1000))
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the enclosed block as one stage (recorded even if it raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, time.perf_counter() - start)
+
+
+def server_timing_header(spans: Sequence[Tuple[str, float]], total_ms: Optional[float] = None) -> str:
+    """Server-Timing value, e.g. ``timeline;dur=12.3, total;dur=15.0``; repeated stages are summed."""
+    totals: Dict[str, float] = {}
+    for stage, ms in spans:
+        totals[stage] = totals.get(stage, 0.0) + ms
+    if total_ms is not None:
+        totals["total"] = total_ms
+    return ", ".join(f"{stage};dur={ms:.2f}" for stage, ms in totals.items())
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware that collects spans per request, adds the Server-Timing
+    header and observes ``http_request_duration_seconds``.
+
+    Written as plain ASGI rather than BaseHTTPMiddleware so streamed (SSE)
+    responses pass through untouched; their header reports the spans
+    finished before the first byte.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                header = server_timing_header(spans, (time.perf_counter() - start) * 1000)
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1")),
+                ]
+            await send(message)
+
+        with collect_spans() as spans:
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                # The router stores the matched route in scope; unmatched paths share one label
+                route = scope.get("route")
+                REQUEST_DURATION.observe(
+                    time.perf_counter() - start,
+                    route=getattr(route, "path", "unmatched"),
+                    method=scope["method"],
+                    status=str(status_code),
+                )
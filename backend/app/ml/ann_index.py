@@ -0,0 +1,195 @@
+"""
+Inverted-file (IVF) index for approximate nearest-neighbor ZIP search.
+
+k-means splits the standardized ZIP embeddings into ``n_lists`` cells, and
+each ZIP is stored in the list of its nearest centroid. The vectors are
+reordered so every list is one contiguous block. A query scans only the
+``n_probe`` lists whose centroids are closest to it, about n_probe / n_lists
+of the table instead of all of it. n_probe trades recall for speed;
+n_probe == n_lists is an exact search. The index is built once (see
+scripts/ml_build_artifact_bundle.py) and stored as plain arrays.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Arrays stored by save()/load(), besides n_probe
+_ARRAYS = ('centroids', 'list_offsets', 'ids', 'vectors')
+# Rows per block when assigning vectors to centroids (bounds temporary memory)
+_ASSIGN_BLOCK = 8192
+
+
+def top_k(ids: np.ndarray, distances: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The k smallest distances and their ids, sorted by (distance, id).
+
+    Ties are broken by id, so the result matches a stable full sort of
+    the candidates in id order.
+    """
+    if k < len(distances):
+        kth = np.partition(distances, k - 1)[k - 1]
+        keep = distances <= kth
+        ids, distances = ids[keep], distances[keep]
+    order = np.lexsort((ids, distances))[:k]
+    return ids[order], distances[order]
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, end) for each pair, without a Python loop."""
+    lengths = ends - starts
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(lengths.sum()) + np.repeat(starts - offsets, lengths)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid for every vector."""
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _ASSIGN_BLOCK):
+        block = vectors[start:start + _ASSIGN_BLOCK]
+        # |x - c|^2 minus the per-row constant |x|^2
+        scores = centroid_norms - 2 * block @ centroids.T
+        assignment[start:start + _ASSIGN_BLOCK] = scores.argmin(axis=1)
+    return assignment
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, n_iter: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Lloyd's k-means from a random sample of the vectors; empty cells keep their centroid."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    assignment = _assign(vectors, centroids)
+    for _ in range(n_iter):
+        counts = np.bincount(assignment, minlength=n_lists)
+        sums = np.column_stack([
+            np.bincount(assignment, weights=vectors[:, j], minlength=n_lists) for j in range(vectors.shape[1])
+        ])
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        new_assignment = _assign(vectors, centroids)
+        if np.array_equal(new_assignment, assignment):
+            break
+        assignment = new_assignment
+    return centroids, assignment
+
+
+@dataclass(frozen=True)
+class IVFIndex:
+    """Standardized embeddings grouped into k-means cells."""
+    centroids: np.ndarray       # float64 (n_lists, dim)
+    list_offsets: np.ndarray    # int64 (n_lists + 1,); list i holds rows list_offsets[i]:list_offsets[i + 1]
+    ids: np.ndarray             # int32 (n,), embedding row of each stored vector
+    vectors: np.ndarray         # float64 (n, dim), grouped by list
+    n_probe: int                # lists scanned per query unless overridden
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: np.ndarray, k: int, n_probe: Optional[int] = None,
+               exclude: int = -1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate k nearest neighbors of one standardized query vector.
+
+        Args:
+            query: (dim,) vector, standardized like the indexed embeddings
+            k: Number of neighbors
+            n_probe: Lists to scan (default: the index's tuned value)
+            exclude: Embedding row to leave out (the query ZIP itself), or -1
+
+        Returns:
+            (rows, distances): embedding rows and Euclidean distances, nearest first.
+        """
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        if n_probe < self.n_lists:
+            centroid_distances = ((self.centroids - query) ** 2).sum(axis=1)
+            lists = np.argpartition(centroid_distances, n_probe - 1)[:n_probe]
+            positions = _ranges(self.list_offsets[lists], self.list_offsets[lists + 1])
+            ids, vectors = self.ids[positions], self.vectors[positions]
+        else:
+            ids, vectors = self.ids, self.vectors
+        distances = np.linalg.norm(vectors - query, axis=1)
+        if exclude >= 0:
+            keep = ids != exclude
+            ids, distances = ids[keep], distances[keep]
+        return top_k(ids, distances, k)
+
+    def recall(self, queries: np.ndarray, exact_ids: np.ndarray, k: int, n_probe: int) -> float:
+        """Mean recall@k of search() for embedding rows `queries` against exact neighbor rows."""
+        position = np.empty(len(self.ids), dtype=np.int64)
+        position[self.ids] = np.arange(len(self.ids))
+        hits = 0
+        for row, expected in zip(queries, exact_ids):
+            found, _ = self.search(self.vectors[position[row]], k, n_probe, exclude=int(row))
+            hits += len(np.intersect1d(found, expected[:k]))
+        return hits / (len(queries) * k)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, n_lists: int, n_probe: int = 1,
+              n_iter: int = 25, seed: int = 0) -> "IVFIndex":
+        """Cluster standardized (n, dim) embeddings into n_lists lists (row i gets id i)."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float64)
+        n_lists = max(1, min(n_lists, len(vectors)))
+        centroids, assignment = _kmeans(vectors, n_lists, n_iter, seed)
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=n_lists)
+        return cls(
+            centroids=centroids,
+            list_offsets=np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            ids=order.astype(np.int32),
+            vectors=vectors[order],
+            n_probe=max(1, min(n_probe, n_lists)),
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: getattr(self, name) for name in _ARRAYS}
+        arrays['n_probe'] = np.asarray(self.n_probe)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "IVFIndex":
+        return cls(**{name: np.asarray(arrays[name]) for name in _ARRAYS}, n_probe=int(arrays['n_probe']))
+
+    def save(self, path: Path) -> None:
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: Path) -> "IVFIndex":
+        with np.load(path) as npz:
+            return cls.from_arrays(npz)
+
+
+def exact_neighbors(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Exact k nearest rows (excluding the row itself) for each query row, nearest first."""
+    ids = np.arange(len(vectors))
+    neighbors = np.empty((len(queries), k), dtype=np.int64)
+    for i, row in enumerate(queries):
+        distances = np.linalg.norm(vectors - vectors[row], axis=1)
+        keep = ids != row
+        neighbors[i], _ = top_k(ids[keep], distances[keep], k)
+    return neighbors
+
+
+def tune_n_probe(index: IVFIndex, vectors: np.ndarray, k: int, target_recall: float,
+                 n_queries: int = 200, seed: int = 0) -> Tuple[int, Dict[int, float]]:
+    """
+    Smallest power-of-two n_probe whose recall@k on sampled rows reaches target_recall.
+
+    Returns the chosen n_probe and the recall measured for each n_probe tried.
+    """
+    rng = np.random.default_rng(seed)
+    queries = rng.choice(len(vectors), min(n_queries, len(vectors)), replace=False)
+    exact = exact_neighbors(vectors, queries, k)
+    recalls: Dict[int, float] = {}
+    n_probe = 1
+    while True:
+        n_probe = min(n_probe, index.n_lists)
+        recalls[n_probe] = index.recall(queries, exact, k, n_probe)
+        if recalls[n_probe] >= target_recall or n_probe == index.n_lists:
+            return n_probe, recalls
+        n_probe *= 2
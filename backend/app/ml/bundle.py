@@ -0,0 +1,164 @@
+"""
+Single-file, checksummed bundle of the ML serving artifacts.
+
+A bundle holds everything a ModelSnapshot is built from: the exported
+growth model trees, the imputed feature table and the ZIP embeddings, each
+with its ZIP index stored as a binary int32 array. It replaces five loose
+files in two directories. The layout is:
+
+    magic (8 bytes) | format version (uint32) | reserved (uint32)
+    | header length (uint64) | JSON header | padding | array sections
+
+The JSON header is the manifest: the bundle version, metadata (feature
+columns, state encoding, ...) and each array's dtype, shape, offset and
+sha256. Array sections are 64-byte aligned, so read_bundle() memory-maps
+the file once and every array is a zero-copy, read-only view into it.
+
+write_bundle() writes to a temporary file and renames it into place, so a
+reader sees either the old bundle or the new one, never a partial deploy.
+"""
+
+import hashlib
+import json
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+MAGIC = b'ZGBUNDLE'
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct('<8sIIQ')  # magic, format version, reserved, header length
+_ALIGNMENT = 64
+
+
+class BundleError(ValueError):
+    """The bundle file is malformed, truncated or fails its checksums."""
+
+
+@dataclass(frozen=True)
+class ArtifactBundle:
+    """A loaded bundle: version, metadata and read-only arrays backed by one memory map."""
+    version: str
+    metadata: Dict[str, Any]
+    arrays: Dict[str, np.ndarray]
+    created_at: str
+
+    def group(self, prefix: str) -> Dict[str, np.ndarray]:
+        """Arrays named '<prefix>/<name>', keyed by name."""
+        start = f'{prefix}/'
+        return {name[len(start):]: array for name, array in self.arrays.items() if name.startswith(start)}
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _bundle_version(metadata: Dict[str, Any], entries: Dict[str, dict]) -> str:
+    """Content version: a hash of the metadata and every array's checksum."""
+    digest = hashlib.sha256(json.dumps(metadata, sort_keys=True).encode())
+    for name in sorted(entries):
+        digest.update(f'{name}:{entries[name]["sha256"]};'.encode())
+    return digest.hexdigest()[:12]
+
+
+def write_bundle(path: Path, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any], created_at: str) -> str:
+    """Atomically write a bundle; returns its version."""
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise ValueError(f"Array {name!r} has dtype {array.dtype}; only plain numeric arrays can be bundled")
+
+    entries: Dict[str, dict] = {}
+    relative_offset = 0
+    for name, array in arrays.items():
+        relative_offset = _aligned(relative_offset)
+        entries[name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': relative_offset,
+            'nbytes': array.nbytes,
+            'sha256': hashlib.sha256(array.data).hexdigest(),
+        }
+        relative_offset += array.nbytes
+
+    version = _bundle_version(metadata, entries)
+    header = json.dumps({
+        'version': version,
+        'created_at': created_at,
+        'metadata': metadata,
+        'arrays': entries,
+    }, sort_keys=True).encode()
+    data_start = _aligned(_PREAMBLE.size + len(header))
+
+    path = Path(path)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, 0, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.write(b'\0' * (data_start + entries[name]['offset'] - f.tell()))
+            f.write(array.data)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp_path.replace(path)
+    return version
+
+
+def read_header(path: Path) -> Dict[str, Any]:
+    """The bundle's JSON header, without mapping or verifying the arrays."""
+    with open(path, 'rb') as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size:
+            raise BundleError(f"{path} is too short to be an artifact bundle")
+        magic, format_version, _, header_length = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise BundleError(f"{path} is not an artifact bundle")
+        if format_version != FORMAT_VERSION:
+            raise BundleError(f"{path} has bundle format {format_version}, expected {FORMAT_VERSION}")
+        header = f.read(header_length)
+    if len(header) < header_length:
+        raise BundleError(f"{path} is truncated (incomplete header)")
+    header = json.loads(header)
+    header['data_start'] = _aligned(_PREAMBLE.size + header_length)
+    return header
+
+
+def read_bundle(path: Path, verify: bool = True) -> ArtifactBundle:
+    """
+    Memory-map a bundle and return its arrays as read-only views.
+
+    Args:
+        path: Bundle file
+        verify: Check every array's sha256 and the bundle version against the header
+
+    Raises:
+        BundleError: If the file is not a bundle, is truncated or fails verification.
+    """
+    header = read_header(path)
+    entries = header['arrays']
+    data_start = header['data_start']
+    end = max((data_start + e['offset'] + e['nbytes'] for e in entries.values()), default=data_start)
+    size = os.path.getsize(path)
+    if size < end:
+        raise BundleError(f"{path} is truncated ({size} bytes, expected {end})")
+
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays: Dict[str, np.ndarray] = {}
+    for name, entry in entries.items():
+        start = data_start + entry['offset']
+        section = buffer[start:start + entry['nbytes']]
+        if verify and hashlib.sha256(section).hexdigest() != entry['sha256']:
+            raise BundleError(f"{path}: checksum mismatch for array {name!r}")
+        arrays[name] = section.view(np.dtype(entry['dtype'])).reshape(entry['shape'])
+
+    if verify and _bundle_version(header['metadata'], entries) != header['version']:
+        raise BundleError(f"{path}: header does not match bundle version {header['version']}")
+    return ArtifactBundle(
+        version=header['version'],
+        metadata=header['metadata'],
+        arrays=arrays,
+        created_at=header['created_at'],
+    )
@@ -0,0 +1,108 @@
+"""
+Compact ZIP feature store for serving-time lookups.
+
+Holds the imputed model features as one C-contiguous float32 matrix plus a
+ZIP -> row index, so a prediction needs a dict lookup and an array view
+instead of pandas indexing. pandas is not used here at all.
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Columns in the training CSV that are not model features
+NON_FEATURE_COLUMNS = {'zip', 'state', 'city', 'y_home_growth_next', 'y_rent_growth_next'}
+
+
+def normalize_zip(zip_code) -> Optional[int]:
+    """Normalize a ZIP code to the integer key used by the store (None if not numeric)."""
+    try:
+        return int(str(zip_code).strip())
+    except ValueError:
+        return None
+
+
+class FeatureStore:
+    """Read-only ZIP -> feature vector lookup backed by a float32 matrix."""
+
+    def __init__(self, matrix: np.ndarray, zips: Iterable[int], columns: Iterable[str]) -> None:
+        self.columns: List[str] = list(columns)
+        self.zips: List[int] = [int(z) for z in zips]
+
+        # Memory-mapped float32 input is used as-is (no copy); anything else is converted once
+        if matrix.dtype != np.float32 or not matrix.flags.c_contiguous:
+            matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        if matrix.shape != (len(self.zips), len(self.columns)):
+            raise ValueError(
+                f"Feature matrix shape {matrix.shape} does not match "
+                f"{len(self.zips)} ZIPs x {len(self.columns)} columns"
+            )
+        self.matrix = matrix
+
+        self._row_index: Dict[int, int] = {z: i for i, z in enumerate(self.zips)}
+        self._column_index: Dict[str, int] = {c: i for i, c in enumerate(self.columns)}
+
+    def __len__(self) -> int:
+        return len(self.zips)
+
+    def __contains__(self, zip_code) -> bool:
+        return self.row(zip_code) != -1
+
+    def row(self, zip_code) -> int:
+        """Row index of a ZIP code, or -1 if not present."""
+        key = normalize_zip(zip_code)
+        if key is None:
+            return -1
+        return self._row_index.get(key, -1)
+
+    def vector(self, zip_code) -> Optional[np.ndarray]:
+        """Feature vector for a ZIP as a (1, n_features) view, or None if not present."""
+        row = self.row(zip_code)
+        if row == -1:
+            return None
+        return self.matrix[row:row + 1]
+
+    def value(self, zip_code, column: str) -> Optional[float]:
+        """Single feature value for a ZIP, or None if the ZIP or column is not present."""
+        row = self.row(zip_code)
+        col = self._column_index.get(column)
+        if row == -1 or col is None:
+            return None
+        return float(self.matrix[row, col])
+
+    @classmethod
+    def from_files(cls, matrix_path: Path, meta_path: Path) -> "FeatureStore":
+        """Load an exported feature table; the matrix is memory-mapped read-only."""
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        matrix = np.load(matrix_path, mmap_mode='r')
+        return cls(matrix, meta['zips'], meta['columns'])
+
+    @classmethod
+    def from_csv(cls, csv_path: Path) -> "FeatureStore":
+        """
+        Build the store from the raw training CSV.
+
+        Applies the same median imputation as the training script; values still
+        missing afterwards (an all-empty column) become 0.0.
+        """
+        with open(csv_path, 'r', newline='') as f:
+            reader = csv.DictReader(f)
+            columns = [c for c in reader.fieldnames if c not in NON_FEATURE_COLUMNS]
+            zips: List[int] = []
+            rows: List[List[float]] = []
+            for record in reader:
+                zips.append(int(float(record['zip'])))
+                rows.append([float(record[c]) if record[c] != '' else np.nan for c in columns])
+
+        matrix = np.array(rows, dtype=np.float64).reshape(len(rows), len(columns))
+        if len(rows):
+            missing = np.isnan(matrix)
+            if missing.any():
+                medians = np.nanmedian(np.where(missing.all(axis=0), 0.0, matrix), axis=0)
+                matrix = np.where(missing, medians, matrix)
+        matrix = np.nan_to_num(matrix, nan=0.0)
+        return cls(matrix, zips, columns)
@@ -0,0 +1,144 @@
+"""
+Precomputed neighbor lists for the ZIP growth fallback.
+
+A ZIP without a usable model prediction (embedded but not in the feature
+table, or with a NaN prediction) gets the distance-weighted average of its
+nearest neighbors' predictions. Everything that average needs is computed
+once per snapshot:
+
+- the model prediction for every embedded ZIP (NaN when it has none);
+- each ZIP's nearest neighbors among the ZIPs with a prediction, with their
+  distances in standardized embedding space;
+- the same lists restricted to the ZIP's own state (the state code is the
+  last embedding column).
+
+At request time the fallback is one gather from the predictions array plus
+an inverse-distance weighted sum, with no similarity search or model call.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Neighbors kept per ZIP; requests can use any k up to this
+NEIGHBOR_K = 20
+# Distances are clamped to this before weighting, so an identical embedding
+# dominates instead of dividing by zero
+_MIN_DISTANCE = 1e-6
+# Query rows per block when computing distances (bounds temporary memory)
+_BLOCK_ROWS = 512
+
+_ARRAYS = ('predictions', 'rows', 'distances', 'state_rows', 'state_distances')
+
+
+@dataclass(frozen=True)
+class NeighborTable:
+    """Per-ZIP fallback inputs, row-aligned with the snapshot's embeddings."""
+    predictions: np.ndarray      # float64 (n_zips, 2): model (home, rent), NaN without a prediction
+    rows: np.ndarray             # int32 (n_zips, NEIGHBOR_K): nearest ZIPs with a prediction, -1 padded
+    distances: np.ndarray        # float64 (n_zips, NEIGHBOR_K), inf padded
+    state_rows: np.ndarray       # int32, like rows but within the ZIP's state
+    state_distances: np.ndarray  # float64, like distances but within the ZIP's state
+
+    @property
+    def k(self) -> int:
+        return self.rows.shape[1]
+
+    def estimate(self, row: int, k: int, same_state: bool = False) -> Optional[Tuple[float, float]]:
+        """
+        Inverse-distance weighted (home, rent) of a ZIP's k nearest neighbors.
+
+        Args:
+            row: Embedding row of the ZIP
+            k: Neighbors to average (at most the table's k)
+            same_state: Only use neighbors in the ZIP's own state
+
+        Returns:
+            (home, rent), or None if the ZIP has no neighbors with a prediction.
+        """
+        rows = (self.state_rows if same_state else self.rows)[row, :k]
+        distances = (self.state_distances if same_state else self.distances)[row, :k]
+        valid = rows >= 0
+        if not valid.any():
+            return None
+        weights = 1.0 / np.maximum(distances[valid], _MIN_DISTANCE)
+        home, rent = weights @ self.predictions[rows[valid]] / weights.sum()
+        return float(home), float(rent)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in _ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "NeighborTable":
+        return cls(**{name: np.asarray(arrays[name]) for name in _ARRAYS})
+
+    def save(self, path: Path) -> None:
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: Path) -> "NeighborTable":
+        with np.load(path) as npz:
+            return cls.from_arrays(npz)
+
+
+def _nearest(vectors: np.ndarray, queries: np.ndarray, candidates: np.ndarray,
+             k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """k nearest candidate rows (never the query row itself) for each query row, nearest first."""
+    rows = np.full((len(queries), k), -1, dtype=np.int32)
+    distances = np.full((len(queries), k), np.inf)
+    if len(candidates) == 0:
+        return rows, distances
+    candidate_vectors = vectors[candidates]
+    candidate_norms = (candidate_vectors ** 2).sum(axis=1)
+    width = min(k, len(candidates))
+    for start in range(0, len(queries), _BLOCK_ROWS):
+        block = queries[start:start + _BLOCK_ROWS]
+        query_vectors = vectors[block]
+        squared = (query_vectors ** 2).sum(axis=1)[:, None] - 2 * query_vectors @ candidate_vectors.T + candidate_norms
+        squared[block[:, None] == candidates[None, :]] = np.inf
+        nearest = np.argpartition(squared, width - 1, axis=1)[:, :width]
+        nearest_squared = np.take_along_axis(squared, nearest, axis=1)
+        order = np.argsort(nearest_squared, axis=1, kind='stable')
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        nearest_squared = np.take_along_axis(nearest_squared, order, axis=1)
+        found = np.isfinite(nearest_squared)
+        rows[start:start + len(block), :width] = np.where(found, candidates[nearest], -1)
+        distances[start:start + len(block), :width] = np.sqrt(np.maximum(nearest_squared, 0.0))
+    return rows, distances
+
+
+def build_neighbor_table(vectors: np.ndarray, predictions: np.ndarray, states: np.ndarray,
+                         k: int = NEIGHBOR_K) -> NeighborTable:
+    """
+    Neighbor lists for every embedded ZIP.
+
+    Args:
+        vectors: (n_zips, dim) standardized embeddings
+        predictions: (n_zips, 2) model (home, rent) per ZIP, NaN where there is none
+        states: (n_zips,) state code per ZIP
+        k: Neighbors kept per ZIP
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float64)
+    predictions = np.asarray(predictions, dtype=np.float64)
+    all_rows = np.arange(len(vectors))
+    has_prediction = ~np.isnan(predictions).any(axis=1)
+
+    rows, distances = _nearest(vectors, all_rows, all_rows[has_prediction], k)
+
+    state_rows = np.full_like(rows, -1)
+    state_distances = np.full_like(distances, np.inf)
+    for state in np.unique(states):
+        in_state = all_rows[states == state]
+        found_rows, found_distances = _nearest(vectors, in_state, in_state[has_prediction[in_state]], k)
+        state_rows[in_state] = found_rows
+        state_distances[in_state] = found_distances
+
+    return NeighborTable(
+        predictions=predictions,
+        rows=rows,
+        distances=distances,
+        state_rows=state_rows,
+        state_distances=state_distances,
+    )
@@ -0,0 +1,495 @@
+"""
+Versioned registry for the ML growth models and ZIP embeddings.
+
+All serving artifacts (home model, rent model, feature table, embeddings) are
+loaded together into one immutable ModelSnapshot. Requests grab the current
+snapshot once and use it throughout, and reloads build a complete new
+snapshot before swapping the reference, so no request ever mixes versions.
+
+Artifacts come from the loose files the training scripts write, or from a
+single checksummed bundle file (see bundle.py) when ML_BUNDLE_PATH points
+at one.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .ann_index import IVFIndex
+from .bundle import read_bundle, write_bundle
+from .feature_store import FeatureStore
+from .neighbors import NeighborTable, build_neighbor_table
+from .tree_predictor import TreeEnsemble
+
+logger = logging.getLogger(__name__)
+
+# Paths
+# __file__ is backend/app/ml/registry.py
+# Go up to repo root, then to backend/app/ml/models and src/data
+BASE_DIR = Path(__file__).parent.parent.parent.parent
+MODEL_DIR = BASE_DIR / 'backend' / 'app' / 'ml' / 'models'
+DATA_DIR = BASE_DIR / 'src' / 'data'
+
+HOME_MODEL_PATH = MODEL_DIR / 'zip_home_growth_model.joblib'
+RENT_MODEL_PATH = MODEL_DIR / 'zip_rent_growth_model.joblib'
+# Both models' trees as arrays, exported by scripts/ml_train_growth_model.py;
+# used instead of the joblib pickles when present
+TREES_PATH = MODEL_DIR / 'zip_growth_trees.npz'
+TRAINING_DATA_PATH = DATA_DIR / 'zip_growth_training.csv'
+# Imputed feature table exported by scripts/ml_train_growth_model.py
+FEATURE_TABLE_PATH = DATA_DIR / 'zip_growth_features.npy'
+FEATURE_TABLE_META_PATH = DATA_DIR / 'zip_growth_features_meta.json'
+FEATURE_MATRIX_PATH = DATA_DIR / 'zip_feature_matrix.npy'
+ZIP_META_PATH = DATA_DIR / 'zip_feature_meta.json'
+STATE_ENCODING_PATH = DATA_DIR / 'state_encoding.json'
+# All of the above in one file, written by scripts/ml_build_artifact_bundle.py;
+# served only when ML_BUNDLE_PATH points at it
+DEFAULT_BUNDLE_PATH = MODEL_DIR / 'zip_growth_bundle.bin'
+
+_EPSILON = 1e-8  # Small value to avoid division by zero
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """One consistent, immutable set of serving artifacts."""
+    version: str
+    home_model: object
+    rent_model: object
+    features: FeatureStore
+    zip_features: np.ndarray
+    zip_codes: List[str]
+    zip_index: Dict[str, int]
+    zip_features_mean: np.ndarray
+    zip_features_std: np.ndarray
+    loaded_at: float
+    load_timings_ms: Dict[str, float] = field(default_factory=dict)
+    # Home and rent models packed for the NumPy predictor (outputs: home, rent);
+    # when set, home_model and rent_model are None
+    predictor: Optional[TreeEnsemble] = None
+    # Approximate nearest-neighbor index over the standardized embeddings
+    # (bundles built for large ZIP tables); None means exact search
+    ann_index: Optional[IVFIndex] = None
+    # Precomputed neighbor lists and predictions for the growth fallback
+    neighbors: Optional[NeighborTable] = None
+
+
+def _feature_table_paths() -> List[Path]:
+    """Feature table files used by load_snapshot(), in load order."""
+    if FEATURE_TABLE_PATH.exists() and FEATURE_TABLE_META_PATH.exists():
+        return [FEATURE_TABLE_PATH, FEATURE_TABLE_META_PATH]
+    return [TRAINING_DATA_PATH]
+
+
+def _model_paths() -> List[Path]:
+    """Model files used by load_snapshot(), in load order."""
+    if TREES_PATH.exists():
+        return [TREES_PATH]
+    return [HOME_MODEL_PATH, RENT_MODEL_PATH]
+
+
+def bundle_path() -> Optional[Path]:
+    """
+    The artifact bundle to serve from, or None to use the loose files.
+
+    Bundles are opt-in: a bundle file that merely exists (e.g. the default
+    one the bundle script writes) is never picked up on its own, so loose
+    artifacts retrained after it was built are still served and reloaded.
+    """
+    from ..config import get_settings
+
+    configured = get_settings().ml_bundle_path
+    return Path(configured) if configured else None
+
+
+def _loose_artifact_paths() -> List[Path]:
+    return [*_model_paths(), *_feature_table_paths(), FEATURE_MATRIX_PATH, ZIP_META_PATH]
+
+
+def artifact_paths() -> List[Path]:
+    """All files a snapshot is built from."""
+    path = bundle_path()
+    if path is not None:
+        return [path]
+    return _loose_artifact_paths()
+
+
+def artifact_fingerprint() -> Tuple:
+    """Cheap (path, mtime, size) fingerprint used to detect changed artifacts."""
+    fingerprint = []
+    for path in artifact_paths():
+        try:
+            stat = path.stat()
+            fingerprint.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            fingerprint.append((str(path), None, None))
+    return tuple(fingerprint)
+
+
+def _content_version(paths: List[Path]) -> str:
+    """Short content hash identifying a set of artifact files."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.name.encode())
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _load_features() -> FeatureStore:
+    """Load the feature store, preferring the memory-mappable export over the raw CSV."""
+    if FEATURE_TABLE_PATH.exists() and FEATURE_TABLE_META_PATH.exists():
+        logger.info("Memory-mapping feature table from %s", FEATURE_TABLE_PATH)
+        return FeatureStore.from_files(FEATURE_TABLE_PATH, FEATURE_TABLE_META_PATH)
+    logger.info("Loading training data from %s", TRAINING_DATA_PATH)
+    return FeatureStore.from_csv(TRAINING_DATA_PATH)
+
+
+def _bind_feature_order(model: object, columns: List[str]) -> object:
+    """
+    Check that a model was trained on the store's column order; returns the model to serve.
+
+    The store passes plain float32 arrays to predict(), so once the order is
+    verified the served model is a shallow copy without the fitted feature
+    names, which skips sklearn's per-call name check (and its warning about
+    unnamed input). The copy shares the fitted trees; the loaded estimator
+    itself is left untouched.
+    """
+    trained_columns = getattr(model, 'feature_names_in_', None)
+    if trained_columns is None:
+        return model
+    if list(trained_columns) != columns:
+        raise ValueError(
+            f"Model was trained on columns {list(trained_columns)}, feature table has {columns}"
+        )
+    serving = copy.copy(model)
+    del serving.feature_names_in_
+    return serving
+
+
+def _load_embeddings() -> Tuple[np.ndarray, List[str]]:
+    """Load the ZIP embedding matrix (memory-mapped) and its row-aligned ZIP codes."""
+    if not FEATURE_MATRIX_PATH.exists():
+        raise FileNotFoundError(
+            f"Feature matrix not found at {FEATURE_MATRIX_PATH}. "
+            "Run scripts/ml_build_zip_embeddings.py first."
+        )
+    if not ZIP_META_PATH.exists():
+        raise FileNotFoundError(
+            f"ZIP metadata not found at {ZIP_META_PATH}. "
+            "Run scripts/ml_build_zip_embeddings.py first."
+        )
+
+    # Read-only memory map: worker processes share pages via the OS page cache
+    zip_features = np.load(FEATURE_MATRIX_PATH, mmap_mode='r')
+    with open(ZIP_META_PATH, 'r') as f:
+        metadata = json.load(f)
+    zip_codes = [entry['zip'] for entry in metadata]
+
+    # Validate that dimensions match
+    if len(zip_codes) != zip_features.shape[0]:
+        raise ValueError(
+            f"Mismatch: {len(zip_codes)} ZIP codes but {zip_features.shape[0]} rows in feature matrix"
+        )
+    return zip_features, zip_codes
+
+
+def neighbor_table(snapshot: ModelSnapshot) -> NeighborTable:
+    """Neighbor lists for a snapshot's embedded ZIPs, with every ZIP's model prediction."""
+    feature_rows = np.array([snapshot.features.row(zip_code) for zip_code in snapshot.zip_codes], dtype=np.int64)
+    has_features = feature_rows != -1
+    predictions = np.full((len(snapshot.zip_codes), 2), np.nan)
+    if has_features.any():
+        X = snapshot.features.matrix[feature_rows[has_features]]
+        if snapshot.predictor is not None:
+            predictions[has_features] = snapshot.predictor.predict(X)
+        else:
+            predictions[has_features] = np.column_stack([snapshot.home_model.predict(X), snapshot.rent_model.predict(X)])
+    zip_features = np.asarray(snapshot.zip_features)
+    vectors = (zip_features - snapshot.zip_features_mean) / snapshot.zip_features_std
+    # The state code is the last embedding column
+    return build_neighbor_table(vectors, predictions, states=zip_features[:, -1])
+
+
+def load_snapshot() -> ModelSnapshot:
+    """
+    Build a new snapshot from the artifact bundle, or the loose files if there is none.
+
+    Raises:
+        FileNotFoundError: If any artifact is missing.
+        ValueError: If artifacts are inconsistent (BundleError if the bundle is corrupt).
+    """
+    path = bundle_path()
+    if path is not None:
+        return load_bundle_snapshot(path)
+    return load_loose_snapshot()
+
+
+def _warn_if_stale(path: Path) -> None:
+    """Warn when a loose artifact was written after the bundle was built."""
+    bundle_mtime = path.stat().st_mtime
+    newer = [p.name for p in _loose_artifact_paths() if p.exists() and p.stat().st_mtime > bundle_mtime]
+    if newer:
+        logger.warning(
+            "Artifact bundle %s is older than %s; serving the bundle. "
+            "Rebuild it with scripts/ml_build_artifact_bundle.py to serve the new artifacts.",
+            path, ", ".join(newer),
+        )
+
+
+def load_bundle_snapshot(path: Path) -> ModelSnapshot:
+    """Build a new snapshot from an artifact bundle; the arrays stay memory-mapped."""
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Artifact bundle not found at {path}. Run scripts/ml_build_artifact_bundle.py first."
+        )
+    _warn_if_stale(path)
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    logger.info("Memory-mapping artifact bundle from %s", path)
+    bundle = read_bundle(path)
+    timings['bundle'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    metadata = bundle.metadata
+    predictor = TreeEnsemble.from_arrays({**bundle.group('trees'), **metadata['trees']})
+    features = FeatureStore(
+        bundle.arrays['features/matrix'], bundle.arrays['features/zips'].tolist(), metadata['feature_columns']
+    )
+    if predictor.columns != features.columns:
+        raise ValueError(
+            f"Model was trained on columns {predictor.columns}, feature table has {features.columns}"
+        )
+    zip_features = bundle.arrays['embeddings/matrix']
+    ann_index = None
+    if metadata.get('ann') is not None:
+        ann_index = IVFIndex.from_arrays({**bundle.group('ann'), **metadata['ann']})
+    neighbor_arrays = bundle.group('neighbors')
+    neighbors = NeighborTable.from_arrays(neighbor_arrays) if neighbor_arrays else None
+    zip_codes = [str(z) for z in bundle.arrays['embeddings/zips'].tolist()]
+    if len(zip_codes) != zip_features.shape[0]:
+        raise ValueError(
+            f"Mismatch: {len(zip_codes)} ZIP codes but {zip_features.shape[0]} rows in feature matrix"
+        )
+    timings['unpack'] = (time.perf_counter() - start) * 1000
+
+    snapshot = ModelSnapshot(
+        version=bundle.version,
+        home_model=None,
+        rent_model=None,
+        features=features,
+        zip_features=zip_features,
+        zip_codes=zip_codes,
+        zip_index={zip_code: i for i, zip_code in enumerate(zip_codes)},
+        zip_features_mean=bundle.arrays['embeddings/mean'],
+        zip_features_std=bundle.arrays['embeddings/std'],
+        loaded_at=time.time(),
+        load_timings_ms=timings,
+        predictor=predictor,
+        ann_index=ann_index,
+        neighbors=neighbors,
+    )
+    if neighbors is None:
+        # Bundle written before neighbor lists were precomputed
+        start = time.perf_counter()
+        snapshot = replace(snapshot, neighbors=neighbor_table(snapshot))
+        timings['neighbors'] = (time.perf_counter() - start) * 1000
+    logger.info("Loaded model snapshot %s from bundle: %d ZIP codes available.", bundle.version, len(features))
+    return snapshot
+
+
+def save_bundle(snapshot: ModelSnapshot, path: Path, state_encoding: Optional[Dict[str, int]] = None) -> str:
+    """
+    Write a snapshot's artifacts as one bundle; returns the bundle version.
+
+    The snapshot must use the exported trees (the joblib models are not bundled).
+    """
+    if snapshot.predictor is None:
+        raise ValueError("Bundles hold the exported trees; run scripts/ml_train_growth_model.py to write them")
+    tree_arrays = snapshot.predictor.to_arrays()
+    tree_metadata = {
+        'depth': snapshot.predictor.depth,
+        'input_dtype': snapshot.predictor.input_dtype,
+        'columns': snapshot.predictor.columns,
+    }
+    arrays = {f'trees/{name}': array for name, array in tree_arrays.items() if name not in tree_metadata}
+    arrays.update({
+        'features/matrix': snapshot.features.matrix,
+        'features/zips': np.asarray(snapshot.features.zips, dtype=np.int32),
+        'embeddings/matrix': np.asarray(snapshot.zip_features),
+        'embeddings/zips': np.asarray([int(z) for z in snapshot.zip_codes], dtype=np.int32),
+        'embeddings/mean': snapshot.zip_features_mean,
+        'embeddings/std': snapshot.zip_features_std,
+    })
+    if snapshot.neighbors is not None:
+        arrays.update({f'neighbors/{name}': array for name, array in snapshot.neighbors.to_arrays().items()})
+    ann_metadata = None
+    if snapshot.ann_index is not None:
+        ann_metadata = {'n_probe': snapshot.ann_index.n_probe}
+        arrays.update({f'ann/{name}': array for name, array in snapshot.ann_index.to_arrays().items()
+                       if name not in ann_metadata})
+    metadata = {
+        'trees': tree_metadata,
+        'ann': ann_metadata,
+        'feature_columns': snapshot.features.columns,
+        'state_encoding': state_encoding,
+        'source_version': snapshot.version,
+    }
+    created_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    return write_bundle(path, arrays, metadata, created_at)
+
+
+def load_loose_snapshot() -> ModelSnapshot:
+    """
+    Build a new snapshot from the loose artifact files on disk.
+
+    Raises:
+        FileNotFoundError: If any artifact is missing.
+        ValueError: If artifacts are inconsistent.
+    """
+    timings: Dict[str, float] = {}
+
+    def timed(name: str, loader: Callable):
+        start = time.perf_counter()
+        result = loader()
+        timings[name] = (time.perf_counter() - start) * 1000
+        return result
+
+    paths = _loose_artifact_paths()
+    version = timed('version_hash', lambda: _content_version(paths))
+
+    home_model = rent_model = predictor = None
+    if TREES_PATH.exists():
+        logger.info("Loading exported growth model trees from %s", TREES_PATH)
+        predictor = timed('model_trees', lambda: TreeEnsemble.load(TREES_PATH))
+    else:
+        import joblib
+
+        logger.info("Loading home growth model from %s", HOME_MODEL_PATH)
+        home_model = timed('home_model', lambda: joblib.load(HOME_MODEL_PATH))
+        logger.info("Loading rent growth model from %s", RENT_MODEL_PATH)
+        rent_model = timed('rent_model', lambda: joblib.load(RENT_MODEL_PATH))
+
+    features = timed('feature_table', _load_features)
+    if predictor is not None:
+        if predictor.columns != features.columns:
+            raise ValueError(
+                f"Model was trained on columns {predictor.columns}, feature table has {features.columns}"
+            )
+    else:
+        home_model = _bind_feature_order(home_model, features.columns)
+        rent_model = _bind_feature_order(rent_model, features.columns)
+
+    zip_features, zip_codes = timed('embeddings', _load_embeddings)
+
+    # Mean and std for standardized similarity search
+    zip_features_mean = np.mean(zip_features, axis=0)
+    zip_features_std = np.std(zip_features, axis=0)
+    zip_features_std = np.where(zip_features_std < _EPSILON, _EPSILON, zip_features_std)
+
+    snapshot = ModelSnapshot(
+        version=version,
+        home_model=home_model,
+        rent_model=rent_model,
+        features=features,
+        zip_features=zip_features,
+        zip_codes=zip_codes,
+        zip_index={zip_code: i for i, zip_code in enumerate(zip_codes)},
+        zip_features_mean=zip_features_mean,
+        zip_features_std=zip_features_std,
+        loaded_at=time.time(),
+        load_timings_ms=timings,
+        predictor=predictor,
+    )
+    snapshot = replace(snapshot, neighbors=timed('neighbors', lambda: neighbor_table(snapshot)))
+    logger.info("Loaded model snapshot %s: %d ZIP codes available.", version, len(features))
+    return snapshot
+
+
+class ModelRegistry:
+    """Holds the active ModelSnapshot and swaps it atomically on reload."""
+
+    def __init__(self, loader: Callable[[], ModelSnapshot] = load_snapshot) -> None:
+        self._loader = loader
+        self._snapshot: Optional[ModelSnapshot] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[ModelSnapshot]:
+        """Return the active snapshot without loading, or None."""
+        return self._snapshot
+
+    @property
+    def version(self) -> Optional[str]:
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else None
+
+    def get(self) -> ModelSnapshot:
+        """Return the active snapshot, loading it on first use (only once across threads)."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._loader()
+            return self._snapshot
+
+    def load(self) -> ModelSnapshot:
+        """Build a new snapshot without activating it."""
+        return self._loader()
+
+    def install(self, snapshot: ModelSnapshot) -> Optional[ModelSnapshot]:
+        """Activate a snapshot; returns the one it replaced."""
+        with self._lock:
+            previous = self._snapshot
+            self._snapshot = snapshot
+        if previous is None or previous.version != snapshot.version:
+            logger.info(
+                "Activated model snapshot %s (previous: %s)",
+                snapshot.version, previous.version if previous else None,
+            )
+        return previous
+
+
+class ArtifactWatcher:
+    """Background thread that calls on_change when artifact files change on disk."""
+
+    def __init__(self, interval_seconds: float, on_change: Callable[[], object]) -> None:
+        self._interval = interval_seconds
+        self._on_change = on_change
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="ml-artifact-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval + 1)
+
+    def _run(self) -> None:
+        last_seen = artifact_fingerprint()
+        while not self._stop.wait(self._interval):
+            fingerprint = artifact_fingerprint()
+            if fingerprint == last_seen:
+                continue
+            last_seen = fingerprint
+            logger.info("ML artifacts changed on disk, reloading")
+            try:
+                self._on_change()
+            except Exception as e:
+                logger.error("ML artifact reload failed: %s", e)
+
+
+registry = ModelRegistry()
@@ -0,0 +1,205 @@
+"""
+Pure-NumPy predictor for exported gradient-boosted tree ensembles.
+
+The fitted sklearn models (GradientBoostingRegressor or
+HistGradientBoostingRegressor) are flattened into a handful of node arrays.
+Serving then needs neither sklearn nor pickles. Several single-output models
+(home and rent growth) are packed into one ensemble with one output each, so
+both targets come from a single traversal.
+
+Prediction walks every tree for every row at once, one level per step. Leaves
+point to themselves, so after ``depth`` steps each (row, tree) pair sits on
+its leaf. A single row costs a few small vectorized operations instead of
+sklearn's per-call input validation, and large batches amortize further.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Node arrays stored by save()/load(), besides the scalar metadata
+_ARRAYS = ('feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots', 'output_starts', 'baseline')
+
+
+@dataclass(frozen=True)
+class TreeEnsemble:
+    """Flattened trees of one or more boosted models (one output per model)."""
+    feature: np.ndarray         # int32, split feature per node (0 for leaves)
+    threshold: np.ndarray       # float64, go left if x <= threshold
+    left: np.ndarray            # int32, left child (leaves point to themselves)
+    right: np.ndarray           # int32, right child (leaves point to themselves)
+    missing_left: np.ndarray    # bool, where NaN goes
+    value: np.ndarray           # float64, leaf value with the learning rate applied
+    roots: np.ndarray           # int32, root node of each tree, grouped by output
+    output_starts: np.ndarray   # int64, index in roots of each output's first tree
+    baseline: np.ndarray        # float64, initial prediction per output
+    depth: int
+    # sklearn's GradientBoostingRegressor compares float32 inputs, the histogram model float64
+    input_dtype: str
+    columns: List[str]
+
+    def __post_init__(self) -> None:
+        # Interleaved (left, right) pairs: the next node is children[2 * node + go_right]
+        object.__setattr__(self, '_children', np.column_stack([self.left, self.right]).ravel())
+        object.__setattr__(self, '_has_missing_left', bool(self.missing_left.any()))
+
+    @property
+    def n_outputs(self) -> int:
+        return len(self.baseline)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predict a (n_rows, n_features) batch; returns (n_rows, n_outputs)."""
+        X = np.ascontiguousarray(X, dtype=self.input_dtype)
+        if X.ndim != 2 or X.shape[1] != len(self.columns):
+            raise ValueError(f"Expected input of shape (n, {len(self.columns)}), got {X.shape}")
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        # One flat (row, tree) axis; 1-D take() is much cheaper than 2-D fancy indexing
+        row_offsets = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        nodes = np.tile(self.roots, n_rows)
+        for _ in range(self.depth):
+            x = flat_X.take(row_offsets + self.feature.take(nodes))
+            go_right = ~(x <= self.threshold.take(nodes))
+            if self._has_missing_left:
+                go_right &= ~(np.isnan(x) & self.missing_left.take(nodes))
+            nodes = self._children.take(2 * nodes + go_right)
+        leaf_values = self.value.take(nodes).reshape(n_rows, self.n_trees)
+        return np.add.reduceat(leaf_values, self.output_starts, axis=1) + self.baseline
+
+    @classmethod
+    def from_models(cls, models: Sequence[object], columns: Sequence[str]) -> "TreeEnsemble":
+        """Pack fitted single-output sklearn boosting regressors, one output each."""
+        parts = [_export_model(model) for model in models]
+        input_dtypes = {part['input_dtype'] for part in parts}
+        if len(input_dtypes) != 1:
+            raise ValueError("Cannot pack GradientBoosting and HistGradientBoosting models together")
+
+        feature, threshold, left, right, missing_left, value = [], [], [], [], [], []
+        roots, output_starts, baseline, depth = [], [], [], 0
+        offset = 0
+        for part in parts:
+            output_starts.append(len(roots))
+            baseline.append(part['baseline'])
+            for tree in part['trees']:
+                roots.append(offset)
+                feature.append(tree['feature'])
+                threshold.append(tree['threshold'])
+                left.append(tree['left'] + offset)
+                right.append(tree['right'] + offset)
+                missing_left.append(tree['missing_left'])
+                value.append(tree['value'])
+                depth = max(depth, tree['depth'])
+                offset += len(tree['feature'])
+
+        return cls(
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            left=np.concatenate(left).astype(np.int32),
+            right=np.concatenate(right).astype(np.int32),
+            missing_left=np.concatenate(missing_left).astype(bool),
+            value=np.concatenate(value).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            output_starts=np.asarray(output_starts, dtype=np.int64),
+            baseline=np.asarray(baseline, dtype=np.float64),
+            depth=depth,
+            input_dtype=input_dtypes.pop(),
+            columns=list(columns),
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: getattr(self, name) for name in _ARRAYS}
+        arrays['depth'] = np.asarray(self.depth)
+        arrays['input_dtype'] = np.asarray(self.input_dtype)
+        arrays['columns'] = np.asarray(self.columns)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "TreeEnsemble":
+        return cls(
+            **{name: np.asarray(arrays[name]) for name in _ARRAYS},
+            depth=int(arrays['depth']),
+            input_dtype=str(arrays['input_dtype']),
+            columns=[str(c) for c in arrays['columns']],
+        )
+
+    def save(self, path: Path) -> None:
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: Path) -> "TreeEnsemble":
+        with np.load(path) as npz:
+            return cls.from_arrays(npz)
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    """Number of splits on the longest root-to-leaf path (leaves point to themselves)."""
+    depth = np.zeros(len(left), dtype=np.int64)
+    # Children always come after their parent in sklearn's node order
+    for node in range(len(left)):
+        if left[node] != node:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+    return int(depth.max())
+
+
+def _export_model(model) -> dict:
+    if hasattr(model, 'estimators_'):
+        return _export_gradient_boosting(model)
+    if hasattr(model, '_predictors'):
+        return _export_hist_gradient_boosting(model)
+    raise TypeError(f"Unsupported model type: {type(model).__name__}")
+
+
+def _export_gradient_boosting(model) -> dict:
+    """GradientBoostingRegressor: init constant plus learning_rate * tree values."""
+    if model.estimators_.shape[1] != 1:
+        raise ValueError("Only single-output regressors are supported")
+    if getattr(model, 'init_', None) is None or not hasattr(model.init_, 'constant_'):
+        raise ValueError("Only the default (mean) initial estimator is supported")
+    trees = []
+    for estimator in model.estimators_[:, 0]:
+        tree = estimator.tree_
+        nodes = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+        left = np.where(is_leaf, nodes, tree.children_left)
+        right = np.where(is_leaf, nodes, tree.children_right)
+        trees.append({
+            'feature': np.where(is_leaf, 0, tree.feature),
+            'threshold': np.where(is_leaf, 0.0, tree.threshold),
+            'left': left,
+            'right': right,
+            'missing_left': np.zeros(tree.node_count, dtype=bool),
+            'value': np.where(is_leaf, model.learning_rate * tree.value[:, 0, 0], 0.0),
+            'depth': _tree_depth(left, right),
+        })
+    return {'trees': trees, 'baseline': float(np.ravel(model.init_.constant_)[0]), 'input_dtype': 'float32'}
+
+
+def _export_hist_gradient_boosting(model) -> dict:
+    """HistGradientBoostingRegressor: baseline plus leaf values (already shrunk)."""
+    if model.n_trees_per_iteration_ != 1:
+        raise ValueError("Only single-output regressors are supported")
+    trees = []
+    for (predictor,) in model._predictors:
+        nodes = predictor.nodes
+        if nodes['is_categorical'].any():
+            raise ValueError("Categorical splits are not supported")
+        is_leaf = nodes['is_leaf'].astype(bool)
+        index = np.arange(len(nodes))
+        left = np.where(is_leaf, index, nodes['left'])
+        right = np.where(is_leaf, index, nodes['right'])
+        trees.append({
+            'feature': np.where(is_leaf, 0, nodes['feature_idx']),
+            'threshold': np.where(is_leaf, 0.0, nodes['num_threshold']),
+            'left': left,
+            'right': right,
+            'missing_left': nodes['missing_go_to_left'].astype(bool),
+            'value': np.where(is_leaf, nodes['value'], 0.0),
+            'depth': _tree_depth(left, right),
+        })
+    return {'trees': trees, 'baseline': float(np.ravel(model._baseline_prediction)[0]), 'input_dtype': 'float64'}
@@ -0,0 +1,142 @@
+"""
+Startup warmup for the ML growth model and ZIP embeddings.
+
+Loads every artifact the ZIP-aware endpoints depend on, validates that they
+agree with each other and runs a dry-run prediction, so the first real
+request does not pay for deserialization. Each stage is timed and the
+result is kept as a readiness report for the `/ready` endpoint. The same
+routine performs hot reloads of the model registry.
+"""
+
+import logging
+import math
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, List, Optional
+
+from .registry import ModelSnapshot, registry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupStage:
+    """Outcome and duration of a single warmup stage."""
+    name: str
+    ok: bool
+    duration_ms: float
+    detail: Optional[str] = None
+
+
+@dataclass
+class WarmupReport:
+    """Readiness state of the ML artifacts."""
+    ready: bool = False
+    model_version: Optional[str] = None
+    started_at: Optional[float] = None
+    completed_at: Optional[float] = None
+    total_ms: Optional[float] = None
+    stages: List[WarmupStage] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+_report = WarmupReport()
+_warmup_lock = threading.Lock()
+
+
+def get_warmup_report() -> WarmupReport:
+    """Return the report of the most recent warmup run."""
+    return _report
+
+
+def _validate_snapshot(snapshot: ModelSnapshot) -> str:
+    features = snapshot.features
+    if len(features) == 0:
+        raise RuntimeError("feature table is empty")
+    if not features.columns:
+        raise RuntimeError("feature table has no feature columns")
+
+    overlap = sum(1 for z in snapshot.zip_codes if z in features)
+    if overlap == 0:
+        raise RuntimeError("no ZIP codes are shared by the embeddings and the feature table")
+    return f"{overlap}/{len(snapshot.zip_codes)} embedding ZIPs present in feature table"
+
+
+def _dry_run_prediction(snapshot: ModelSnapshot) -> str:
+    from .growth_model import get_zip_home_volatility, predict_zip_growth_with_fallback
+
+    probe_zip = snapshot.zip_codes[0]
+
+    # NaN fallbacks make a swallowed prediction error visible here
+    home, rent = predict_zip_growth_with_fallback(
+        probe_zip, fallback_home_rate=math.nan, fallback_rent_rate=math.nan, snapshot=snapshot
+    )
+    if not (math.isfinite(home) and math.isfinite(rent)):
+        raise RuntimeError(f"dry-run prediction for ZIP {probe_zip} did not return finite rates")
+
+    sigma = get_zip_home_volatility(probe_zip, math.nan, snapshot=snapshot)
+    if not math.isfinite(sigma):
+        raise RuntimeError(f"dry-run volatility lookup for ZIP {probe_zip} failed")
+    return f"ZIP {probe_zip}: home={home:.4f}, rent={rent:.4f}, sigma={sigma:.4f}"
+
+
+def run_warmup() -> WarmupReport:
+    """
+    Load, validate and activate a new model snapshot.
+
+    Used at startup and for hot reloads. Stops at the first failing stage;
+    a snapshot that fails validation is never activated, so a bad reload
+    leaves the previously active version serving.
+
+    Returns:
+        WarmupReport: The new readiness report (also available via get_warmup_report()).
+    """
+    global _report
+
+    with _warmup_lock:
+        report = WarmupReport(started_at=time.time())
+        warmup_start = time.perf_counter()
+        snapshot: Optional[ModelSnapshot] = None
+
+        def load_artifacts() -> str:
+            nonlocal snapshot
+            snapshot = registry.load()
+            timings = ", ".join(f"{name}={ms:.1f}ms" for name, ms in snapshot.load_timings_ms.items())
+            return f"version {snapshot.version} ({timings})"
+
+        def activate() -> str:
+            previous = registry.install(snapshot)
+            return f"active version {snapshot.version} (previous: {previous.version if previous else None})"
+
+        stages: List[tuple[str, Callable[[], str]]] = [
+            ("load_artifacts", load_artifacts),
+            ("validate", lambda: _validate_snapshot(snapshot)),
+            ("dry_run_prediction", lambda: _dry_run_prediction(snapshot)),
+            ("activate", activate),
+        ]
+
+        for name, stage in stages:
+            stage_start = time.perf_counter()
+            try:
+                detail = stage()
+            except Exception as e:
+                elapsed_ms = (time.perf_counter() - stage_start) * 1000
+                report.stages.append(WarmupStage(name=name, ok=False, duration_ms=elapsed_ms, detail=str(e)))
+                report.error = f"{name}: {e}"
+                logger.error("ML warmup failed at stage '%s' after %.1f ms: %s", name, elapsed_ms, e)
+                break
+            elapsed_ms = (time.perf_counter() - stage_start) * 1000
+            report.stages.append(WarmupStage(name=name, ok=True, duration_ms=elapsed_ms, detail=detail))
+            logger.info("ML warmup stage '%s' done in %.1f ms (%s)", name, elapsed_ms, detail)
+
+        # Ready as long as some validated snapshot is serving
+        report.ready = registry.current() is not None
+        report.model_version = registry.version
+        report.total_ms = (time.perf_counter() - warmup_start) * 1000
+        report.completed_at = time.time()
+        _report = report
+        return report
@@ -5,23 +5,11 @@ This module provides functions to find similar ZIP codes based on their
 numeric feature embeddings (growth rates, volatility, price-to-rent ratio, etc.).
 """
 
-import json
 import numpy as np
-from pathlib import Path
 from typing import List, Tuple, Optional
 
-# Paths
-BASE_DIR = Path(__file__).parent.parent.parent.parent  # Go up to repo root
-DATA_DIR = BASE_DIR / 'src' / 'data'
-FEATURE_MATRIX_PATH = DATA_DIR / 'zip_feature_matrix.npy'
-ZIP_META_PATH = DATA_DIR / 'zip_feature_meta.json'
-
-# Module-level cache variables
-_ZIP_FEATURES: Optional[np.ndarray] = None
-_ZIP_CODES: Optional[List[str]] = None
-_ZIP_FEATURES_MEAN: Optional[np.ndarray] = None
-_ZIP_FEATURES_STD: Optional[np.ndarray] = None
-_EPSILON = 1e-8  # Small value to avoid division by zero
+from .ann_index import top_k
+from .registry import ModelSnapshot, registry
 
 
 def load_zip_embedding_data() -> Tuple[np.ndarray, List[str]]:
@@ -33,57 +21,20 @@ def load_zip_embedding_data() -> Tuple[np.ndarray, List[str]]:
         - feature_matrix: numpy array of shape (n_zips, n_features)
         - zip_codes_list: list of ZIP code strings in the same row order as feature_matrix
     
-    The function caches the data in module-level variables on first call.
-    Also computes and caches mean and std for standardization.
+    The data comes from the model registry's active snapshot, which is loaded
+    on first call together with the growth models.
     """
-    global _ZIP_FEATURES, _ZIP_CODES, _ZIP_FEATURES_MEAN, _ZIP_FEATURES_STD
-    
-    # Return cached data if already loaded
-    if _ZIP_FEATURES is not None and _ZIP_CODES is not None:
-        return _ZIP_FEATURES, _ZIP_CODES
-    
-    # Load feature matrix
-    if not FEATURE_MATRIX_PATH.exists():
-        raise FileNotFoundError(
-            f"Feature matrix not found at {FEATURE_MATRIX_PATH}. "
-            "Run scripts/ml_build_zip_embeddings.py first."
-        )
-    
-    _ZIP_FEATURES = np.load(FEATURE_MATRIX_PATH)
-    
-    # Load ZIP code metadata
-    if not ZIP_META_PATH.exists():
-        raise FileNotFoundError(
-            f"ZIP metadata not found at {ZIP_META_PATH}. "
-            "Run scripts/ml_build_zip_embeddings.py first."
-        )
-    
-    with open(ZIP_META_PATH, 'r') as f:
-        metadata = json.load(f)
-    
-    _ZIP_CODES = [entry['zip'] for entry in metadata]
-    
-    # Validate that dimensions match
-    if len(_ZIP_CODES) != _ZIP_FEATURES.shape[0]:
-        raise ValueError(
-            f"Mismatch: {len(_ZIP_CODES)} ZIP codes but {_ZIP_FEATURES.shape[0]} rows in feature matrix"
-        )
-    
-    # Compute mean and std for standardization
-    _ZIP_FEATURES_MEAN = np.mean(_ZIP_FEATURES, axis=0)
-    _ZIP_FEATURES_STD = np.std(_ZIP_FEATURES, axis=0)
-    # Add epsilon to avoid division by zero
-    _ZIP_FEATURES_STD = np.where(_ZIP_FEATURES_STD < _EPSILON, _EPSILON, _ZIP_FEATURES_STD)
-    
-    return _ZIP_FEATURES, _ZIP_CODES
+    snapshot = registry.get()
+    return snapshot.zip_features, snapshot.zip_codes
 
 
-def get_zip_index(zip_code: str) -> int:
+def get_zip_index(zip_code: str, snapshot: Optional[ModelSnapshot] = None) -> int:
     """
     Get the row index of a ZIP code in the feature matrix.
     
     Args:
         zip_code: ZIP code string (will be normalized)
+        snapshot: Model snapshot to search (default: the registry's active snapshot)
     
     Returns:
         int: Row index if found, -1 if not found
@@ -92,25 +43,33 @@ def get_zip_index(zip_code: str) -> int:
     zip_code_str = str(zip_code).strip()
     
     # Ensure data is loaded
-    _, zip_codes = load_zip_embedding_data()
+    if snapshot is None:
+        snapshot = registry.get()
     
-    # Find index
-    try:
-        index = zip_codes.index(zip_code_str)
-        return index
-    except ValueError:
-        return -1
+    return snapshot.zip_index.get(zip_code_str, -1)
 
 
-def find_similar_zips(zip_code: str, k: int = 10) -> List[Tuple[str, float]]:
+def find_similar_zips(
+    zip_code: str,
+    k: int = 10,
+    snapshot: Optional[ModelSnapshot] = None,
+    n_probe: Optional[int] = None,
+    exact: bool = False,
+) -> List[Tuple[str, float]]:
     """
     Find the k most similar ZIP codes to the given ZIP code.
     
     Similarity is computed using Euclidean distance in standardized feature space.
+    When the snapshot has an approximate-nearest-neighbor index (built for
+    national-scale embeddings), only the index's closest lists are scanned.
     
     Args:
         zip_code: ZIP code string (will be normalized)
         k: Number of similar ZIPs to return (default: 10)
+        snapshot: Model snapshot to search (default: the registry's active snapshot)
+        n_probe: ANN lists to scan; more is slower with higher recall
+                 (default: the value tuned when the index was built)
+        exact: Scan every ZIP even if the snapshot has an ANN index
     
     Returns:
         List of tuples (neighbor_zip, distance) sorted by increasing distance.
@@ -120,34 +79,28 @@ def find_similar_zips(zip_code: str, k: int = 10) -> List[Tuple[str, float]]:
     zip_code_str = str(zip_code).strip()
     
     # Load data
-    X, zip_codes = load_zip_embedding_data()
+    if snapshot is None:
+        snapshot = registry.get()
+    X, zip_codes = snapshot.zip_features, snapshot.zip_codes
     
     # Get index of input ZIP
-    zip_index = get_zip_index(zip_code_str)
+    zip_index = get_zip_index(zip_code_str, snapshot=snapshot)
     if zip_index == -1:
         return []
     
-    # Standardize the feature matrix
-    X_std = (X - _ZIP_FEATURES_MEAN) / _ZIP_FEATURES_STD
-    
-    # Get the feature vector for the input ZIP
-    query_vector = X_std[zip_index]
+    # Standardized feature vector for the input ZIP
+    query_vector = (X[zip_index] - snapshot.zip_features_mean) / snapshot.zip_features_std
     
-    # Compute Euclidean distances to all other ZIPs
-    # Exclude the ZIP itself from candidates
-    distances = []
-    for i, neighbor_zip in enumerate(zip_codes):
-        if i == zip_index:
-            continue  # Skip the ZIP itself
-        
-        neighbor_vector = X_std[i]
-        # Euclidean distance
-        distance = np.linalg.norm(query_vector - neighbor_vector)
-        distances.append((neighbor_zip, float(distance)))
+    if snapshot.ann_index is not None and not exact:
+        rows, distances = snapshot.ann_index.search(query_vector, k, n_probe=n_probe, exclude=zip_index)
+    else:
+        # Distances to every ZIP at once, excluding the ZIP itself
+        X_std = (X - snapshot.zip_features_mean) / snapshot.zip_features_std
+        all_distances = np.linalg.norm(X_std - query_vector, axis=1)
+        candidates = np.flatnonzero(np.arange(len(zip_codes)) != zip_index)
+        rows, distances = top_k(candidates, all_distances[candidates], k)
     
-    # Sort by distance and return top k
-    distances.sort(key=lambda x: x[1])
-    return distances[:k]
+    return [(zip_codes[row], float(distance)) for row, distance in zip(rows.tolist(), distances.tolist())]
 
 
 # Debug mode when run as a script
@@ -1,7 +1,7 @@
 
 """Pydantic models for finance analysis inputs and outputs."""
 
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -179,6 +179,8 @@ class AnalysisResult(BaseModel):
     # Rates actually used in calculations (for frontend display)
     home_appreciation_rate: Optional[float] = None
     rent_growth_rate: Optional[float] = None
+    # Version of the ML model snapshot that produced the rates (None if ML wasn't used)
+    model_version: Optional[str] = None
     # Monte Carlo home price path simulation (optional)
     monte_carlo_home_prices: Optional[HomePricePathSummary] = None
 
@@ -225,6 +227,25 @@ class MonteCarloRequest(BaseModel):
     runs: int = 500
 
 
+class QuickEstimateRequest(BaseModel):
+    """Market-default scenario: only price, rent, horizon and ZIP vary."""
+    homePrice: float = Field(..., gt=0)
+    monthlyRent: float = Field(..., ge=0)
+    timeHorizonYears: int = Field(..., gt=0, le=30)
+    zipCode: Optional[str] = None
+
+
+class QuickEstimateResponse(BaseModel):
+    breakEvenMonth: Optional[int]
+    breakEvenYear: Optional[int]
+    finalNetWorthDelta: float
+    homeAppreciationRate: float
+    rentGrowthRate: float
+    investmentReturnRate: float
+    modelVersion: Optional[str] = None  # ML model version when the rates came from the ZIP model
+    errorBound: Dict[str, float]  # Max deviation from /finance/analyze for the same scenario
+
+
 class MonteCarloRun(BaseModel):
     run: int
     finalBuyerNetWorth: float
@@ -0,0 +1,236 @@
+"""
+Opt-in sampling profiler for production requests.
+
+A background thread reads every thread's current stack via
+``sys._current_frames()`` at a fixed interval and counts identical stacks.
+The result is in the "folded" format (``frame;frame;frame count`` per line)
+that flamegraph.pl, speedscope and inferno read directly.
+
+Two ways to use it, both admin-only:
+
+* Per request: send ``X-Profile: 1`` with a valid ``X-Admin-Token``. Only the
+  thread running that request's endpoint is sampled; the response carries
+  ``X-Profile-Id`` and the report is served at ``/admin/profile/{id}``.
+* Time window: ``POST /admin/profile?seconds=10`` samples every busy thread
+  for the window and returns the report.
+
+Sampling costs nothing unless a capture is running.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import secrets
+import sys
+import threading
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Set
+
+from fastapi.routing import APIRoute
+
+from .config import Settings
+
+PROFILE_HEADER = b"x-profile"
+ADMIN_TOKEN_HEADER = b"x-admin-token"
+DEFAULT_INTERVAL_SECONDS = 0.005
+MAX_WINDOW_SECONDS = 60.0
+# Per-request reports kept for retrieval (oldest dropped first)
+MAX_STORED_PROFILES = 16
+
+# Leaf frames of threads that are waiting rather than working (idle pool workers, selectors)
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+_PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_PACKAGE_ROOT):
+        filename = os.path.relpath(filename, _PACKAGE_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """
+    Samples thread stacks every ``interval`` seconds into folded-stack counts.
+
+    ``threads`` restricts sampling to those thread ids (mutable while
+    running); None samples every thread except idle ones.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL_SECONDS, threads: Optional[Set[int]] = None) -> None:
+        self.interval = interval
+        self.threads = threads
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[object, str] = {}
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(skip=own)
+
+    def sample(self, skip: Optional[int] = None) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == skip:
+                continue
+            if self.threads is not None:
+                if thread_id not in self.threads:
+                    continue
+            elif frame.f_code.co_filename.endswith(_IDLE_FILES):
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = self._labels.get(code)
+                if label is None:
+                    label = self._labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            stack.append(names.get(thread_id, "thread"))
+            self._stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """Folded stacks, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+
+# Profiler of the request being served, if it asked for one
+_request_profiler: ContextVar[Optional[SamplingProfiler]] = ContextVar("request_profiler", default=None)
+
+
+def _profiled_endpoint(endpoint: Callable) -> Callable:
+    """Wrap an endpoint so a profiled request's profiler samples the thread running it."""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            profiler = _request_profiler.get()
+            if profiler is None:
+                return await endpoint(*args, **kwargs)
+            # Async endpoints share the event loop thread with other requests
+            thread_id = threading.get_ident()
+            profiler.threads.add(thread_id)
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profiler.threads.discard(thread_id)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        # Sync endpoints run in the threadpool, in a copy of the request's context
+        profiler = _request_profiler.get()
+        if profiler is None:
+            return endpoint(*args, **kwargs)
+        thread_id = threading.get_ident()
+        profiler.threads.add(thread_id)
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profiler.threads.discard(thread_id)
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose endpoint can be sampled per request (see ProfilingMiddleware)."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs) -> None:
+        super().__init__(path, _profiled_endpoint(endpoint), **kwargs)
+
+
+_profiles: "OrderedDict[str, str]" = OrderedDict()
+_profiles_lock = threading.Lock()
+# One time-window capture at a time
+window_lock = threading.Lock()
+
+
+def store_profile(folded: str) -> str:
+    profile_id = secrets.token_hex(8)
+    with _profiles_lock:
+        _profiles[profile_id] = folded
+        while len(_profiles) > MAX_STORED_PROFILES:
+            _profiles.popitem(last=False)
+    return profile_id
+
+
+def get_profile(profile_id: str) -> Optional[str]:
+    with _profiles_lock:
+        return _profiles.get(profile_id)
+
+
+def profile_window(seconds: float, interval: float = DEFAULT_INTERVAL_SECONDS) -> SamplingProfiler:
+    """Sample all busy threads for ``seconds``; blocks the calling thread meanwhile."""
+    profiler = SamplingProfiler(interval=interval).start()
+    try:
+        threading.Event().wait(seconds)
+    finally:
+        profiler.stop()
+    return profiler
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests sending ``X-Profile: 1`` with the admin token."""
+
+    def __init__(self, app, settings: Settings) -> None:
+        self.app = app
+        self.settings = settings
+
+    def _wants_profile(self, scope) -> bool:
+        admin_token = self.settings.admin_token
+        if not admin_token:
+            return False
+        headers = dict(scope.get("headers", ()))
+        if headers.get(PROFILE_HEADER, b"").strip().lower() not in (b"1", b"true"):
+            return False
+        token = headers.get(ADMIN_TOKEN_HEADER)
+        return token is not None and secrets.compare_digest(token, admin_token.encode("utf-8"))
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler(threads=set()).start()
+        stopped = False
+
+        async def send_with_profile(message) -> None:
+            nonlocal stopped
+            if message["type"] == "http.response.start" and not stopped:
+                # The endpoint has returned; streamed bodies are not included
+                stopped = True
+                profiler.stop()
+                profile_id = store_profile(profiler.folded())
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode("ascii")),
+                    (b"x-profile-samples", str(profiler.samples).encode("ascii")),
+                ]
+            await send(message)
+
+        token = _request_profiler.set(profiler)
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _request_profiler.reset(token)
+            if not stopped:
+                profiler.stop()
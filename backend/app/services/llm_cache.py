@@ -0,0 +1,143 @@
+"""
+In-process cache for LLM responses.
+
+Entries are keyed on a hash of the canonical request (model, messages,
+sampling parameters) and of where the answer came from: the OpenAI API or
+the local mock used when no key is configured. They expire after a TTL and
+are evicted least recently used once the cache is full. Successful upstream
+answers and mock-mode answers are stored; error fallbacks are never cached.
+Reloading the OpenAI service clears the cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config import get_settings
+
+_REPLAY_CHUNK = re.compile(r"\S*\s*")
+
+
+def prompt_key(model: str, messages: List[dict], temperature: float, max_tokens: int, source: str = "openai") -> str:
+    """Hash of the canonical form of a chat completion request and the answer's source ("openai" or "mock")."""
+    canonical = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "source": source,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def bucket(value: float, step: float) -> float:
+    """Round value to the nearest multiple of step (step <= 0 returns value unchanged)."""
+    if step <= 0:
+        return value
+    return round(value / step) * step
+
+
+def replay_chunks(text: str) -> List[str]:
+    """Split a cached answer into word-sized chunks for SSE replay; they join back to text."""
+    return [chunk for chunk in _REPLAY_CHUNK.findall(text) if chunk]
+
+
+class LLMResponseCache:
+    """Thread-safe TTL + LRU cache of response texts."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text for key, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, text = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def set(self, key: str, text: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_shared_cache: Optional[LLMResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def clear_llm_cache() -> None:
+    """Drop every cached answer (e.g. after the API key changes)."""
+    cache = _shared_cache
+    if cache is not None:
+        cache.clear()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Process-wide response cache, or None when LLM_CACHE_ENABLED is off."""
+    global _shared_cache
+    settings = get_settings()
+    if not settings.llm_cache_enabled:
+        return None
+    cache = _shared_cache
+    if cache is not None:
+        return cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMResponseCache(
+                max_entries=settings.llm_cache_max_entries,
+                ttl_seconds=settings.llm_cache_ttl_seconds,
+            )
+        return _shared_cache
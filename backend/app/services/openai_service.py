@@ -2,34 +2,88 @@
 
 from __future__ import annotations
 
-from typing import Iterator, List, Optional
+import threading
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional
 
-from openai import OpenAI
+from ..config import Settings, get_settings
+from ..logging_config import get_logger
+from .llm_cache import LLMResponseCache, clear_llm_cache, prompt_key, replay_chunks
 
-from ..config import get_settings
+if TYPE_CHECKING:  # the SDK is slow to import; only load it when a client is built
+    from openai import AsyncOpenAI
 
+logger = get_logger(__name__)
 
-class OpenAIService:
-    def __init__(self) -> None:
-        settings = get_settings()
+
+def _client_options(settings: Settings) -> dict:
+    """Keyword arguments for the client: key, endpoint, timeouts and retries."""
+    import httpx
+
+    return {
+        "api_key": settings.openai_api_key,
+        "base_url": settings.openai_base_url,
+        "timeout": httpx.Timeout(
+            settings.openai_timeout_seconds,
+            connect=settings.openai_connect_timeout_seconds,
+        ),
+        "max_retries": settings.openai_max_retries,
+    }
+
+
+def _pool_limits(settings: Settings):
+    import httpx
+
+    return httpx.Limits(
+        max_connections=settings.openai_max_connections,
+        max_keepalive_connections=settings.openai_max_keepalive_connections,
+        keepalive_expiry=settings.openai_keepalive_expiry_seconds,
+    )
+
+
+def _build_async_client(settings: Settings) -> AsyncOpenAI:
+    """Create an AsyncOpenAI client with a pooled, keep-alive HTTP connection pool."""
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    http_client = DefaultAsyncHttpxClient(limits=_pool_limits(settings))
+    return AsyncOpenAI(**_client_options(settings), http_client=http_client)
+
+
+class AsyncOpenAIService:
+    """
+    Non-blocking service for the async AI endpoints, with a mock-mode fallback.
+
+    Streams run on the event loop instead of pinning a threadpool worker for
+    the length of the LLM response.
+    """
+
+    _client: Optional[AsyncOpenAI]
+
+    def __init__(self, settings: Optional[Settings] = None) -> None:
+        settings = settings or get_settings()
         api_key = settings.openai_api_key
+        name = type(self).__name__
 
-        self._client: Optional[OpenAI] = None
+        self._client = None
         self._is_mock_mode = False
 
         if api_key:
             try:
-                self._client = OpenAI(api_key=api_key)
-                print(f"[OpenAIService] Client initialized successfully with API key (length: {len(api_key)})")
+                self._client = _build_async_client(settings)
+                logger.info("%s: client initialized with API key (length %d)", name, len(api_key))
             except Exception as e:
-                print(f"[OpenAIService] Error initializing OpenAI client: {e}")
+                logger.error("%s: error initializing OpenAI client: %s", name, e)
                 # Fall back to mock mode if client creation fails
                 self._is_mock_mode = True
         else:
             # Fall back to a lightweight mock so the app still runs without a key
-            print("[OpenAIService] No API key found, using mock mode")
+            logger.info("%s: no API key found, using mock mode", name)
             self._is_mock_mode = True
 
+    def _cache_key(self, model: str, messages: List[dict], temperature: float, max_tokens: int) -> str:
+        """Cache key for a request; mock answers never share a key with real ones."""
+        source = "mock" if self._is_mock_mode or self._client is None else "openai"
+        return prompt_key(model, messages, temperature, max_tokens, source=source)
+
     def _mock_response(self, messages: List[dict]) -> str:
         last_user_message = next(
             (m["content"] for m in reversed(messages) if m.get("role") == "user"),
@@ -49,53 +103,135 @@ class OpenAIService:
             f"{preface} Ask me about your home price, rent, down payment, and timeline and I'll keep the analysis flowing."
         )
 
-    def chat_completion(self, model: str, messages: List[dict], temperature: float = 0.7, max_tokens: int = 200) -> str:
-        print(f"[OpenAIService.chat_completion] Called with mock_mode={self._is_mock_mode}, client={self._client is not None}")
+    async def close(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        if self._client is not None:
+            await self._client.close()
+
+    async def chat_completion(
+        self,
+        model: str,
+        messages: List[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 200,
+        cache: Optional[LLMResponseCache] = None,
+    ) -> str:
+        """Return a completion; with a cache, identical requests are answered from it."""
+        key = self._cache_key(model, messages, temperature, max_tokens) if cache is not None else None
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
         if self._is_mock_mode or self._client is None:
-            print(f"[OpenAIService.chat_completion] Returning mock response (mock_mode={self._is_mock_mode}, client=None={self._client is None})")
-            return self._mock_response(messages)
+            response = self._mock_response(messages)
+        else:
+            try:
+                completion = await self._client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+            except Exception as exc:  # broad fallback to keep the chat responsive
+                logger.warning("chat_completion: falling back to mock response due to error: %s", exc)
+                return self._mock_response(messages)
+            response = completion.choices[0].message.content
+            if not response:
+                return "I'm having trouble responding right now. Can you try again?"
 
-        try:
-            print(f"[OpenAIService.chat_completion] Calling OpenAI API...")
-            completion = self._client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
-            response = completion.choices[0].message.content or "I'm having trouble responding right now. Can you try again?"
-            print(f"[OpenAIService.chat_completion] Success! Response length: {len(response)}")
-            return response
-        except Exception as exc:  # broad fallback to keep the chat responsive
-            # Fall back to mock response so the UI keeps working
-            print(f"[OpenAIService.chat_completion] Falling back to mock response due to error: {exc}")
-            import traceback
-            traceback.print_exc()
-            return self._mock_response(messages)
-
-    def chat_completion_stream(self, model: str, messages: List[dict], temperature: float = 0.7, max_tokens: int = 150) -> Iterator[str]:
-        """Stream chat completion tokens as they arrive."""
+        if key is not None:
+            cache.set(key, response)
+        return response
+
+    async def chat_completion_stream(
+        self,
+        model: str,
+        messages: List[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 150,
+        cache: Optional[LLMResponseCache] = None,
+    ) -> AsyncIterator[str]:
+        """Stream chat completion tokens as they arrive; cached answers are replayed in chunks."""
+        key = self._cache_key(model, messages, temperature, max_tokens) if cache is not None else None
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                for chunk in replay_chunks(cached):
+                    yield chunk
+                return
+
+        parts: List[str] = []
         if self._is_mock_mode or self._client is None:
-            # For mock mode, yield the response word by word to simulate streaming
-            mock_text = self._mock_response(messages)
-            for word in mock_text.split():
-                yield word + " "
+            for word in self._mock_response(messages).split():
+                parts.append(word + " ")
+                yield parts[-1]
+            if key is not None:
+                cache.set(key, "".join(parts))
             return
 
         try:
-            stream = self._client.chat.completions.create(
+            stream = await self._client.chat.completions.create(
                 model=model,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
                 stream=True,
             )
-            for chunk in stream:
+            async for chunk in stream:
                 if chunk.choices and chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+                    parts.append(chunk.choices[0].delta.content)
+                    yield parts[-1]
         except Exception as exc:
-            print(f"[OpenAIService] Streaming error: {exc}")
+            logger.warning("chat_completion_stream: streaming error: %s", exc)
             # Fall back to mock response
-            mock_text = self._mock_response(messages)
-            for word in mock_text.split():
+            for word in self._mock_response(messages).split():
                 yield word + " "
+            return
+
+        if key is not None and parts:
+            cache.set(key, "".join(parts))
+
+
+# One long-lived service per process so HTTP connections and TLS sessions
+# are reused across requests
+_shared_async_service: Optional[AsyncOpenAIService] = None
+_shared_service_lock = threading.Lock()
+
+
+def get_shared_async_openai_service() -> AsyncOpenAIService:
+    """Return the process-wide AsyncOpenAIService, creating it on first use."""
+    global _shared_async_service
+    service = _shared_async_service
+    if service is not None:
+        return service
+    with _shared_service_lock:
+        if _shared_async_service is None:
+            _shared_async_service = AsyncOpenAIService()
+        return _shared_async_service
+
+
+def reload_openai_service() -> AsyncOpenAIService:
+    """
+    Re-read settings (e.g. a rotated API key) and swap in a new shared service.
+
+    The previous client is not closed here: in-flight streams may still be
+    using it, and its pool is released when it is garbage collected.
+    Cached answers are dropped, since they came from the old key or mode.
+    """
+    global _shared_async_service
+    get_settings.cache_clear()
+    service = AsyncOpenAIService(get_settings())
+    with _shared_service_lock:
+        _shared_async_service = service
+    clear_llm_cache()
+    return service
+
+
+async def close_openai_services() -> None:
+    """Close and drop the shared service (application shutdown)."""
+    global _shared_async_service
+    with _shared_service_lock:
+        service, _shared_async_service = _shared_async_service, None
+    if service is not None:
+        await service.close()
@@ -0,0 +1,146 @@
+"""
+Shrink chart payloads and conversation history before they go into a prompt.
+
+The frontend sends whatever dataset backs a chart, often a 360-point monthly
+timeline with a dozen fields per point. The model only needs the shape of the
+series, so payloads are downsampled to yearly points, empty and all-zero
+fields are dropped, numbers are rounded and the result is serialized without
+whitespace. Conversation history is trimmed from the oldest turn until it
+fits a token budget.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+# Keys that identify a monthly timeline row (1-based months, as in the calculator)
+_MONTH_KEYS = ("month", "month_index", "monthIndex")
+
+
+@lru_cache(maxsize=1)
+def _encoder() -> Optional[Callable[[str], list]]:
+    """tiktoken's encoder when installed; the heuristic below is used otherwise."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("o200k_base").encode
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text (exact with tiktoken, otherwise ~4 characters per token)."""
+    encode = _encoder()
+    if encode is not None:
+        return len(encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def _round_number(value: float) -> Any:
+    if not math.isfinite(value):
+        return None
+    # Whole dollars for amounts, 4 significant digits for rates and ratios
+    if abs(value) >= 100:
+        return int(round(value))
+    return float(f"{value:.4g}")
+
+
+def _timeline_group(row: dict) -> Optional[int]:
+    if isinstance(row.get("year"), (int, float)):
+        return int(row["year"])
+    for key in _MONTH_KEYS:
+        month = row.get(key)
+        if isinstance(month, (int, float)):
+            return (int(month) - 1) // 12
+    return None
+
+
+def _downsample_yearly(rows: List[dict]) -> List[dict]:
+    """Keep the first row and the last row of each year."""
+    kept = [rows[0]]
+    for i, row in enumerate(rows[1:], start=1):
+        is_last_of_group = i == len(rows) - 1 or _timeline_group(rows[i + 1]) != _timeline_group(row)
+        if is_last_of_group:
+            kept.append(row)
+    return kept
+
+
+def _stride(items: List[Any], max_points: int) -> List[Any]:
+    """Evenly spaced subset of at most max_points items, always keeping the last one."""
+    if len(items) <= max_points or max_points < 2:
+        return items
+    step = (len(items) - 1) / (max_points - 1)
+    return [items[round(i * step)] for i in range(max_points)]
+
+
+def _drop_constant_zero_fields(rows: List[dict]) -> List[dict]:
+    """Drop fields that are zero in every row of a series (e.g. HOA fees when there is no HOA)."""
+    if len(rows) < 2:
+        return rows
+    zero_keys = {
+        key for key in rows[0]
+        if all(isinstance(row.get(key), (int, float)) and row.get(key) == 0 for row in rows)
+    }
+    if not zero_keys:
+        return rows
+    return [{k: v for k, v in row.items() if k not in zero_keys} for row in rows]
+
+
+def compact_value(value: Any, max_points: int) -> Any:
+    """Recursively downsample, prune and round a JSON-like value."""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return _round_number(value)
+    if isinstance(value, dict):
+        compacted = {}
+        for key, item in value.items():
+            item = compact_value(item, max_points)
+            if item is None or item == [] or item == {}:
+                continue
+            compacted[key] = item
+        return compacted
+    if isinstance(value, (list, tuple)):
+        items = list(value)
+        if items and all(isinstance(item, dict) for item in items):
+            if _timeline_group(items[0]) is not None:
+                items = _downsample_yearly(items)
+            items = _stride(items, max_points)
+            items = [compact_value(item, max_points) for item in items]
+            return _drop_constant_zero_fields(items)
+        return [compact_value(item, max_points) for item in _stride(items, max_points)]
+    # Pydantic models and other objects: same fallback the endpoint used for json.dumps
+    return compact_value(getattr(value, "__dict__", str(value)), max_points)
+
+
+def compact_chart_payload(data: Any, max_points: int = 40, token_budget: int = 3000) -> str:
+    """
+    Serialize chart data for a prompt within roughly token_budget tokens.
+
+    Series are downsampled to yearly points and at most max_points rows;
+    if the result is still over budget the row limit is halved until it fits
+    (down to 2 points per series).
+    """
+    while True:
+        payload = json.dumps(compact_value(data, max_points), separators=(",", ":"), ensure_ascii=False)
+        if max_points <= 2 or count_tokens(payload) <= token_budget:
+            return payload
+        max_points //= 2
+
+
+def trim_history(turns: Sequence[Tuple[str, str]], token_budget: int) -> List[Tuple[str, str]]:
+    """Most recent (question, answer) turns whose combined size fits token_budget, oldest first."""
+    kept: List[Tuple[str, str]] = []
+    used = 0
+    for question, answer in reversed(turns):
+        cost = count_tokens(question) + count_tokens(answer)
+        if used + cost > token_budget:
+            break
+        kept.append((question, answer))
+        used += cost
+    kept.reverse()
+    return kept
@@ -0,0 +1,75 @@
+"""
+Request coalescing for identical in-flight computations.
+
+When several identical requests arrive at once (the frontend mounting a few
+charts fires duplicate /finance/analyze and /finance/monte-carlo calls), the
+first caller runs the computation and the others wait for its result instead
+of repeating the work. Nothing is cached: once the computation finishes, the
+next request with the same key starts a new one.
+"""
+
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def request_key(endpoint: str, payload: Any, model_version: Optional[str] = None) -> str:
+    """Hash of an endpoint, its canonical JSON payload and the active model version."""
+    canonical = json.dumps(
+        {"endpoint": endpoint, "payload": payload, "model_version": model_version},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time and shares its outcome with all callers."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Return fn(), or the result of an identical call already running.
+
+        Exceptions are shared the same way: every waiting caller re-raises
+        the leader's exception.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+# Shared by the finance endpoints
+single_flight = SingleFlight()
@@ -0,0 +1 @@
+"""Benchmarks and load-testing tools for the backend (not part of the test suite)."""
@@ -0,0 +1,90 @@
+"""
+Recall and latency of the ANN index (app/ml/ann_index.py) against exact search.
+
+Builds national-scale synthetic embeddings: ZIPs drawn around a few hundred
+market centers, so the data has the clustered structure that IVF relies on.
+For each n_probe it reports recall@k against the exact neighbors and the
+per-query latency of find_similar_zips. The exact, vectorized scan of every
+ZIP is the reference.
+
+    cd backend && python -m benchmarks.ann_recall --zips 40000 --dim 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import math
+import time
+
+import numpy as np
+
+from app.ml.ann_index import IVFIndex, exact_neighbors
+from app.ml.zip_similarity import find_similar_zips
+
+from .synthetic import synthetic_snapshot
+
+
+def clustered_embeddings(n_zips: int, dim: int, n_centers: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(0, 1.0, size=(n_centers, dim))
+    scales = rng.uniform(0.3, 0.8, size=n_centers)
+    labels = rng.integers(n_centers, size=n_zips)
+    return centers[labels] + rng.normal(size=(n_zips, dim)) * scales[labels, None]
+
+
+def latency_us(snapshot, zips, k: int, **kwargs) -> tuple[float, float]:
+    """Median and p99 find_similar_zips latency in microseconds."""
+    times = []
+    for zip_code in zips:
+        start = time.perf_counter()
+        find_similar_zips(zip_code, k=k, snapshot=snapshot, **kwargs)
+        times.append((time.perf_counter() - start) * 1e6)
+    return float(np.median(times)), float(np.percentile(times, 99))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--zips", type=int, default=40_000)
+    parser.add_argument("--dim", type=int, default=16, help="embedding dimensions")
+    parser.add_argument("--centers", type=int, default=300, help="market centers the ZIPs cluster around")
+    parser.add_argument("--lists", type=int, default=None, help="IVF lists (default sqrt(zips))")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    # Models and features come from the usual synthetic snapshot; only the embeddings are replaced
+    snapshot = synthetic_snapshot(args.zips)
+    embeddings = clustered_embeddings(args.zips, args.dim, args.centers)
+    mean, std = embeddings.mean(axis=0), embeddings.std(axis=0)
+    vectors = (embeddings - mean) / std
+    snapshot = dataclasses.replace(snapshot, zip_features=embeddings, zip_features_mean=mean, zip_features_std=std)
+
+    n_lists = args.lists or round(math.sqrt(args.zips))
+    start = time.perf_counter()
+    index = IVFIndex.build(vectors, n_lists)
+    build_seconds = time.perf_counter() - start
+    snapshot = dataclasses.replace(snapshot, ann_index=index)
+
+    rng = np.random.default_rng(1)
+    rows = rng.choice(args.zips, min(args.queries, args.zips), replace=False)
+    zips = [snapshot.zip_codes[row] for row in rows]
+    exact = exact_neighbors(vectors, rows, args.k)
+
+    print(f"{args.zips} ZIPs x {args.dim} dims, {index.n_lists} lists (built in {build_seconds:.1f}s), "
+          f"{len(rows)} queries, k={args.k}\n")
+    print(f"{'search':<16}{'recall@k':>10}{'p50 us':>10}{'p99 us':>10}{'speedup':>10}")
+    exact_p50, exact_p99 = latency_us(snapshot, zips, args.k, exact=True)
+    print(f"{'exact':<16}{1.0:>10.3f}{exact_p50:>10.0f}{exact_p99:>10.0f}{1.0:>9.1f}x")
+    n_probe = 1
+    while n_probe <= index.n_lists:
+        recall = index.recall(rows, exact, args.k, n_probe)
+        p50, p99 = latency_us(snapshot, zips, args.k, n_probe=n_probe)
+        print(f"{f'ivf n_probe={n_probe}':<16}{recall:>10.3f}{p50:>10.0f}{p99:>10.0f}{exact_p50 / p50:>9.1f}x")
+        if recall == 1.0:
+            break
+        n_probe *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Shared fixtures for the pytest-benchmark suite (see benchmarks/pytest.ini)."""
+
+from __future__ import annotations
+
+import pytest
+from pytest_benchmark.utils import parse_compare_fail
+
+from app.finance.quick_estimate import market_default_inputs
+from app.models import ScenarioInputs
+
+from .synthetic import synthetic_snapshot
+
+# Applied whenever a run is compared to a stored baseline (--benchmark-compare)
+# without an explicit --benchmark-compare-fail
+REGRESSION_THRESHOLD = "median:25%"
+
+HORIZONS = [5, 15, 30]
+ZIP_COUNTS = [2_000, 20_000]
+
+
+def scenario(horizon_years: int) -> ScenarioInputs:
+    return market_default_inputs(500_000, 2_500, horizon_years)
+
+
+@pytest.fixture(scope="session", params=ZIP_COUNTS, ids=lambda n: f"zips={n}")
+def snapshot(request):
+    return synthetic_snapshot(request.param)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    if config.getoption("benchmark_compare", None) and not config.getoption("benchmark_compare_fail", None):
+        config.option.benchmark_compare_fail = [parse_compare_fail(REGRESSION_THRESHOLD)]
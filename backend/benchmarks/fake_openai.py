@@ -0,0 +1,163 @@
+"""
+Local stand-in for the OpenAI Chat Completions API.
+
+Serves `POST /v1/chat/completions` over plain HTTP/1.1 with keep-alive, so
+benchmarks can exercise the real OpenAI SDK and connection pool without
+network access or an API key. Point the backend at it with
+OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+Requests with "stream": true get server-sent chat.completion.chunk events,
+one word-sized token at a time at --tokens-per-second (0 sends them all at
+once), after the same --latency-ms delay as a regular response.
+
+    python -m benchmarks.fake_openai --port 8765 --latency-ms 20 --tokens-per-second 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "Buying pulls ahead after the break-even year because equity and appreciation "
+    "outgrow the renter's invested savings."
+)
+
+_TOKEN = re.compile(r"\S*\s*")
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections open between requests
+    server: FakeOpenAIServer
+
+    def setup(self) -> None:
+        super().setup()
+        # Headers and body are written separately; don't let Nagle delay the body
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        if self.server.latency_ms:
+            time.sleep(self.server.latency_ms / 1000)
+
+        self.server.request_count += 1
+        if payload.get("stream"):
+            self._stream(payload)
+            return
+        self._send_json(200, {
+            "id": f"chatcmpl-fake-{self.server.request_count}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.server.reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    def _stream(self, payload: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        base = {
+            "id": f"chatcmpl-fake-{self.server.request_count}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4o-mini"),
+        }
+        delay = 1 / self.server.tokens_per_second if self.server.tokens_per_second else 0.0
+        for i, token in enumerate(t for t in _TOKEN.findall(self.server.reply) if t):
+            if delay and i:
+                time.sleep(delay)
+            self._send_event({**base, "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+            self.server.tokens_streamed += 1
+        self._send_event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        self._send_chunk(b"data: [DONE]\n\n")
+        self._send_chunk(b"")  # terminating zero-length chunk
+
+    def _send_event(self, body: dict) -> None:
+        self._send_chunk(b"data: " + json.dumps(body).encode() + b"\n\n")
+
+    def _send_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:  # silence per-request logging
+        pass
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Threaded fake OpenAI server; port 0 picks a free port."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, reply: str = DEFAULT_REPLY,
+                 latency_ms: float = 0.0, tokens_per_second: float = 0.0) -> None:
+        super().__init__((host, port), FakeOpenAIHandler)
+        self.reply = reply
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.request_count = 0
+        self.tokens_streamed = 0
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> FakeOpenAIServer:
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fixed delay before each response")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Streaming rate (0 = no delay)")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.host, args.port, latency_ms=args.latency_ms,
+                              tokens_per_second=args.tokens_per_second)
+    print(f"Fake OpenAI API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+End-to-end HTTP load test with a realistic request mix.
+
+Drives the app with concurrent clients for a fixed duration. The default mix is:
+- /finance/analyze with and without a ZIP, and with Monte Carlo
+- /finance/monte-carlo
+- /finance/heatmap
+- streamed /finance/chart-insight answers
+
+AI calls go to benchmarks/fake_openai.py, which streams tokens at a
+configurable rate. Reported per endpoint: throughput, p50/p99 latency,
+time to first byte for streams, and the server's peak RSS. Memory comes
+from a second phase that runs each endpoint alone; skip it with
+--memory-seconds 0.
+
+Two modes:
+
+* ``asgi`` (default) runs the app in this process through httpx's ASGI
+  transport (no sockets). --synthetic-ml N installs a synthetic N-ZIP model
+  snapshot (benchmarks/synthetic.py), so ZIP requests hit the ML path
+  without trained artifacts. The transport buffers response bodies, so
+  time to first byte equals total latency in this mode.
+* ``uvicorn`` starts ``uvicorn app.main:app`` in a subprocess (--workers)
+  and talks to it over HTTP; ZIP requests use whatever artifacts are on disk.
+
+    cd backend && python -m benchmarks.loadtest --duration 20 --concurrency 16 --synthetic-ml 2000
+    cd backend && python -m benchmarks.loadtest --mode uvicorn --workers 2 --tokens-per-second 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from .fake_openai import FakeOpenAIServer
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+ZIP_META_PATH = BACKEND_DIR.parent / "src" / "data" / "zip_feature_meta.json"
+
+
+def _scenario(rng: random.Random, horizon_years: Optional[int] = None) -> dict:
+    """Frontend-default scenario with jittered price/rent so single-flight rarely coalesces."""
+    return {
+        "homePrice": round(rng.uniform(250_000, 1_200_000), -3),
+        "downPaymentPercent": rng.choice([10.0, 20.0]),
+        "interestRate": 7.0,
+        "loanTermYears": 30,
+        "timeHorizonYears": horizon_years or rng.choice([5, 10, 15, 30]),
+        "monthlyRent": round(rng.uniform(1_500, 5_000), -1),
+        "propertyTaxRate": 1.0,
+        "homeInsuranceAnnual": 1200.0,
+        "hoaMonthly": 150.0,
+        "maintenanceRate": 1.0,
+        "renterInsuranceAnnual": 240.0,
+        "homeAppreciationRate": 3.5,
+        "rentGrowthRate": 3.0,
+        "investmentReturnRate": 7.0,
+    }
+
+
+def _chart_data(rng: random.Random) -> List[dict]:
+    """A 15-year monthly net worth series, the size the frontend sends for the main chart."""
+    buy, rent = -40_000.0, 100_000.0
+    rows = []
+    for month in range(1, 181):
+        buy += rng.uniform(1_500, 3_500)
+        rent += rng.uniform(800, 1_500)
+        rows.append({"month": month, "buyerNetWorth": round(buy, 2), "renterNetWorth": round(rent, 2)})
+    return rows
+
+
+@dataclass
+class Endpoint:
+    name: str
+    path: str
+    weight: float
+    payload: Callable[[random.Random, List[str]], dict]
+    stream: bool = False
+
+
+ENDPOINTS = [
+    Endpoint("analyze", "/finance/analyze", 35, lambda rng, zips: {"inputs": _scenario(rng)}),
+    Endpoint("analyze_zip", "/finance/analyze", 15,
+             lambda rng, zips: {"inputs": _scenario(rng), "zipCode": rng.choice(zips)}),
+    Endpoint("analyze_monte_carlo", "/finance/analyze", 10,
+             lambda rng, zips: {"inputs": _scenario(rng), "zipCode": rng.choice(zips),
+                                "includeMonteCarlo": True, "monteCarloRuns": 150}),
+    Endpoint("monte_carlo", "/finance/monte-carlo", 5,
+             lambda rng, zips: {"inputs": _scenario(rng, 15), "runs": 100}),
+    Endpoint("heatmap", "/finance/heatmap", 10,
+             lambda rng, zips: {"base": _scenario(rng, 30), "timelines": [5, 10, 15, 20, 30],
+                                "downPayments": [5.0, 10.0, 20.0]}),
+    Endpoint("chart_insight", "/finance/chart-insight", 25,
+             lambda rng, zips: {"chartName": "Net Worth Comparison", "chartData": _chart_data(rng),
+                                "question": f"When does buying pull ahead? ({rng.random():.6f})"},
+             stream=True),
+]
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    first_byte_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    peak_rss_mb: Optional[float] = None
+    rss_growth_mb: Optional[float] = None
+
+    def summary(self, seconds: float) -> dict:
+        return {
+            "requests": len(self.latencies_ms),
+            "errors": self.errors,
+            "rps": len(self.latencies_ms) / seconds if seconds else 0.0,
+            "p50_ms": percentile(self.latencies_ms, 50),
+            "p99_ms": percentile(self.latencies_ms, 99),
+            "ttfb_p50_ms": percentile(self.first_byte_ms, 50),
+            "peak_rss_mb": self.peak_rss_mb,
+            "rss_growth_mb": self.rss_growth_mb,
+        }
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of pid and its children (uvicorn workers), or None if unavailable."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            return sum(p.memory_info().rss for p in [process, *process.children(recursive=True)])
+        except psutil.Error:
+            return None
+    # Linux without psutil
+    try:
+        total = 0
+        pending = [pid]
+        while pending:
+            current = pending.pop()
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+            with contextlib.suppress(OSError), open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        return total
+    except OSError:
+        return None
+
+
+class MemorySampler:
+    """Samples the server's RSS in a background thread and keeps the peak."""
+
+    def __init__(self, pid: int, interval: float = 0.02) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.start_rss = _rss_bytes(pid)
+        self.peak = self.start_rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            rss = _rss_bytes(self.pid)
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def __enter__(self) -> "MemorySampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+async def _call(client: httpx.AsyncClient, endpoint: Endpoint, prefix: str, rng: random.Random,
+                zips: List[str], stats: EndpointStats) -> None:
+    payload = endpoint.payload(rng, zips)
+    start = time.perf_counter()
+    try:
+        if endpoint.stream:
+            async with client.stream("POST", prefix + endpoint.path, json=payload) as response:
+                first = None
+                async for _ in response.aiter_raw():
+                    if first is None:
+                        first = time.perf_counter()
+                ok = response.status_code == 200
+            if ok and first is not None:
+                stats.first_byte_ms.append((first - start) * 1000)
+        else:
+            response = await client.post(prefix + endpoint.path, json=payload)
+            ok = response.status_code == 200
+    except httpx.HTTPError:
+        ok = False
+    if ok:
+        stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+    else:
+        stats.errors += 1
+
+
+async def run_phase(client: httpx.AsyncClient, endpoints: List[Endpoint], prefix: str, zips: List[str],
+                    concurrency: int, duration: float, seed: int) -> Dict[str, EndpointStats]:
+    """Concurrent workers pick endpoints by weight until the duration is up."""
+    stats = {endpoint.name: EndpointStats() for endpoint in endpoints}
+    weights = [endpoint.weight for endpoint in endpoints]
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int) -> None:
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            endpoint = rng.choices(endpoints, weights)[0]
+            await _call(client, endpoint, prefix, rng, zips, stats[endpoint.name])
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return stats
+
+
+async def run(client: httpx.AsyncClient, server_pid: int, args, prefix: str, zips: List[str]) -> dict:
+    endpoints = [endpoint for endpoint in ENDPOINTS if endpoint.weight > 0]
+
+    # Warm up imports, the ML snapshot and connection pools before measuring
+    await run_phase(client, endpoints, prefix, zips, concurrency=2, duration=1.0, seed=0)
+
+    with MemorySampler(server_pid) as memory:
+        stats = await run_phase(client, endpoints, prefix, zips, args.concurrency, args.duration, seed=args.seed)
+    results = {name: s.summary(args.duration) for name, s in stats.items()}
+    total = sum(len(s.latencies_ms) for s in stats.values())
+    overall = {
+        "requests": total,
+        "errors": sum(s.errors for s in stats.values()),
+        "rps": total / args.duration,
+        "p50_ms": percentile([ms for s in stats.values() for ms in s.latencies_ms], 50),
+        "p99_ms": percentile([ms for s in stats.values() for ms in s.latencies_ms], 99),
+        "peak_rss_mb": memory.peak / 2**20 if memory.peak else None,
+    }
+
+    if args.memory_seconds > 0:
+        # One endpoint at a time, so the RSS peak can be attributed to it
+        for endpoint in endpoints:
+            with MemorySampler(server_pid) as memory:
+                await run_phase(client, [endpoint], prefix, zips, args.concurrency, args.memory_seconds, args.seed)
+            if memory.peak is not None and memory.start_rss is not None:
+                results[endpoint.name]["peak_rss_mb"] = memory.peak / 2**20
+                results[endpoint.name]["rss_growth_mb"] = (memory.peak - memory.start_rss) / 2**20
+
+    return {"overall": overall, "endpoints": results}
+
+
+def _configure_environment(fake: FakeOpenAIServer, args, env: Dict[str, str]) -> None:
+    env["OPENAI_API_KEY"] = "sk-loadtest"
+    env["OPENAI_BASE_URL"] = fake.base_url
+    env["LLM_CACHE_ENABLED"] = "true" if args.llm_cache else "false"
+    env["LOG_LEVEL"] = "WARNING"
+
+
+def _zip_codes(snapshot_zips: Optional[List[str]] = None) -> List[str]:
+    if snapshot_zips:
+        return snapshot_zips
+    if ZIP_META_PATH.exists():
+        return [entry["zip"] for entry in json.loads(ZIP_META_PATH.read_text())]
+    return ["94110"]
+
+
+async def run_asgi(args, fake: FakeOpenAIServer) -> dict:
+    _configure_environment(fake, args, os.environ)
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+    from app.main import app, settings
+
+    async with app.router.lifespan_context(app):
+        snapshot_zips = None
+        if args.synthetic_ml:
+            from app.ml.registry import registry
+
+            from .synthetic import synthetic_snapshot
+
+            snapshot = synthetic_snapshot(args.synthetic_ml)
+            registry.install(snapshot)
+            snapshot_zips = snapshot.zip_codes
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+            return await run(client, os.getpid(), args, settings.api_prefix, _zip_codes(snapshot_zips))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(args, fake: FakeOpenAIServer) -> dict:
+    env = dict(os.environ)
+    _configure_environment(fake, args, env)
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+            deadline = time.perf_counter() + 60
+            while True:
+                with contextlib.suppress(httpx.HTTPError):
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                if server.poll() is not None or time.perf_counter() > deadline:
+                    raise RuntimeError("uvicorn did not start")
+                await asyncio.sleep(0.2)
+            prefix = (await client.get("/")).json()["endpoints"]["finance_analyze"].rsplit("/finance/", 1)[0]
+            return await run(client, server.pid, args, prefix, _zip_codes())
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def print_report(report: dict, args, fake: FakeOpenAIServer) -> None:
+    def fmt(value, spec=".1f"):
+        return "-" if value is None else format(value, spec)
+
+    print(f"mode={args.mode} concurrency={args.concurrency} duration={args.duration:.0f}s "
+          f"openai latency={args.latency_ms:.0f}ms tokens/s={args.tokens_per_second or 'unthrottled'}")
+    header = f"{'endpoint':<22}{'reqs':>7}{'errs':>6}{'rps':>8}{'p50 ms':>9}{'p99 ms':>9}{'ttfb p50':>10}{'peak MB':>9}{'+MB':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, row in report["endpoints"].items():
+        print(f"{name:<22}{row['requests']:>7}{row['errors']:>6}{fmt(row['rps']):>8}{fmt(row['p50_ms']):>9}"
+              f"{fmt(row['p99_ms']):>9}{fmt(row['ttfb_p50_ms']):>10}{fmt(row['peak_rss_mb']):>9}"
+              f"{fmt(row['rss_growth_mb']):>7}")
+    overall = report["overall"]
+    print("-" * len(header))
+    print(f"{'overall':<22}{overall['requests']:>7}{overall['errors']:>6}{fmt(overall['rps']):>8}"
+          f"{fmt(overall['p50_ms']):>9}{fmt(overall['p99_ms']):>9}{'':>10}{fmt(overall['peak_rss_mb']):>9}")
+    print(f"fake OpenAI: {fake.request_count} requests, {fake.tokens_streamed} streamed tokens")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (uvicorn mode)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of mixed load")
+    parser.add_argument("--memory-seconds", type=float, default=3.0,
+                        help="Seconds per endpoint in the isolated memory phase (0 skips it)")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Fake OpenAI time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Fake OpenAI streaming rate")
+    parser.add_argument("--synthetic-ml", type=int, default=0, metavar="N",
+                        help="Install a synthetic N-ZIP model snapshot (asgi mode)")
+    parser.add_argument("--llm-cache", action="store_true", help="Keep the LLM response cache enabled")
+    parser.add_argument("--mix", default="", help="Endpoint weights, e.g. analyze=50,chart_insight=0")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, help="Also write the report to this file")
+    args = parser.parse_args()
+
+    weights = dict(item.split("=") for item in args.mix.split(",") if item)
+    for endpoint in ENDPOINTS:
+        if endpoint.name in weights:
+            endpoint.weight = float(weights.pop(endpoint.name))
+    if weights:
+        parser.error(f"unknown endpoints in --mix: {', '.join(weights)}")
+    if args.synthetic_ml and args.mode != "asgi":
+        parser.error("--synthetic-ml needs --mode asgi")
+
+    fake = FakeOpenAIServer(latency_ms=args.latency_ms, tokens_per_second=args.tokens_per_second).start()
+    try:
+        runner = run_asgi if args.mode == "asgi" else run_uvicorn
+        report = asyncio.run(runner(args, fake))
+    finally:
+        fake.stop()
+
+    print_report(report, args, fake)
+    if args.json:
+        args.json.write_text(json.dumps({"args": vars(args) | {"json": str(args.json)}, **report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
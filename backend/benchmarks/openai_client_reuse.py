@@ -0,0 +1,91 @@
+"""
+Per-request vs shared OpenAI client latency, measured against the local stub.
+
+"per-request" reproduces the old dependency: re-read settings and build a new
+service (and HTTP pool) for every call. "shared" reuses one pooled client, as
+get_openai_service does now. Calls are sequential, on one event loop.
+
+    cd backend && python -m benchmarks.openai_client_reuse --requests 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from app.config import Settings
+from app.services.openai_service import AsyncOpenAIService
+
+from .fake_openai import FakeOpenAIServer
+
+MESSAGES = [{"role": "user", "content": "Summarize my rent vs buy result."}]
+
+
+async def measure(call: Callable[[], Awaitable[str]], n: int) -> List[float]:
+    """Await call() n times (after a short warmup) and return latencies in ms."""
+    for _ in range(5):
+        await call()
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: List[float]) -> None:
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2]
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<12} mean={statistics.mean(latencies):7.2f} ms  p50={p50:7.2f} ms  p99={p99:7.2f} ms")
+
+
+async def run(settings_kwargs: dict, n: int) -> tuple[List[float], List[float]]:
+    async def per_request() -> str:
+        service = AsyncOpenAIService(Settings(**settings_kwargs))
+        try:
+            return await service.chat_completion("gpt-4o-mini", MESSAGES)
+        finally:
+            await service.close()
+
+    shared_service = AsyncOpenAIService(Settings(**settings_kwargs))
+
+    async def shared() -> str:
+        return await shared_service.chat_completion("gpt-4o-mini", MESSAGES)
+
+    try:
+        return await measure(per_request, n), await measure(shared, n)
+    finally:
+        await shared_service.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Server-side delay per response")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(latency_ms=args.latency_ms).start()
+    settings_kwargs = {"OPENAI_API_KEY": "sk-local-stub", "openai_base_url": server.base_url}
+
+    try:
+        # The service prints per call; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            per_request_latencies, shared_latencies = asyncio.run(run(settings_kwargs, args.requests))
+    finally:
+        server.stop()
+
+    print(f"{args.requests} chat completions against {server.base_url}")
+    report("per-request", per_request_latencies)
+    report("shared", shared_latencies)
+    speedup = statistics.mean(per_request_latencies) / statistics.mean(shared_latencies)
+    print(f"shared client is {speedup:.1f}x faster per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Synthetic ML artifacts for benchmarks and load tests.
+
+The trained models and ZIP tables are build outputs that are not always
+present, and benchmarks need sizes other than the real ~2k ZIPs. These
+builders produce a ModelSnapshot of any size with the production shapes:
+the feature table columns, GradientBoostingRegressor models with the
+training script's hyperparameters (exported for the NumPy predictor), and
+a 10-column embedding matrix whose last column is a state code, and the
+precomputed neighbor lists. A share of the embedded ZIPs is left out of
+the feature table so the neighbor-fallback path gets exercised.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.ml.ann_index import IVFIndex, tune_n_probe
+from app.ml.feature_store import FeatureStore
+from app.ml.registry import ModelSnapshot, neighbor_table
+from app.ml.tree_predictor import TreeEnsemble
+
+FEATURE_COLUMNS = [
+    'home_growth_1y', 'home_growth_3y_avg', 'home_growth_5y_avg', 'home_vol_5y',
+    'rent_growth_1y', 'rent_growth_3y_avg', 'rent_growth_5y_avg', 'rent_vol_5y',
+    'price_to_rent_ratio',
+]
+EMBEDDING_DIM = 10
+N_STATES = 50
+# Same hyperparameters as scripts/ml_train_growth_model.py
+GBM_PARAMS = {'n_estimators': 100, 'learning_rate': 0.1, 'max_depth': 5, 'random_state': 42}
+# Prediction cost depends on the trees, not on how many rows they were fit on
+MAX_TRAINING_ROWS = 2_000
+
+_models: Dict[int, Tuple[object, object]] = {}
+
+
+def synthetic_features(n_zips: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    growth = rng.normal(0.04, 0.03, size=(n_zips, 8))
+    growth[:, [3, 7]] = np.abs(growth[:, [3, 7]])  # volatilities
+    price_to_rent = rng.uniform(8, 30, size=(n_zips, 1))
+    return np.hstack([growth, price_to_rent]).astype(np.float32)
+
+
+def _trained_models(features: np.ndarray) -> Tuple[object, object]:
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    key = features.shape[0]
+    if key not in _models:
+        rows = features[:MAX_TRAINING_ROWS]
+        rng = np.random.default_rng(1)
+        y_home = rows[:, :3].mean(axis=1) + rng.normal(0, 0.005, len(rows))
+        y_rent = rows[:, 4:7].mean(axis=1) + rng.normal(0, 0.005, len(rows))
+        home = GradientBoostingRegressor(**GBM_PARAMS).fit(rows, y_home)
+        rent = GradientBoostingRegressor(**GBM_PARAMS).fit(rows, y_rent)
+        _models[key] = (home, rent)
+    return _models[key]
+
+
+def synthetic_snapshot(n_zips: int, missing_fraction: float = 0.1, seed: int = 0,
+                       exported_trees: bool = True, ann_lists: int = 0) -> ModelSnapshot:
+    """
+    Snapshot with n_zips embedded ZIPs (as strings "10000", "10001", ...);
+    the last missing_fraction of them have no row in the feature table.
+    With exported_trees (as in production) predictions use the NumPy
+    predictor, otherwise the sklearn models. ann_lists > 0 adds an ANN
+    index tuned for 0.95 recall@10.
+    """
+    zip_codes: List[str] = [str(10_000 + i) for i in range(n_zips)]
+    n_with_features = n_zips - int(n_zips * missing_fraction)
+
+    features = synthetic_features(n_with_features, seed)
+    home_model, rent_model = _trained_models(features)
+    store = FeatureStore(features, [int(z) for z in zip_codes[:n_with_features]], FEATURE_COLUMNS)
+
+    rng = np.random.default_rng(seed + 1)
+    embeddings = rng.normal(size=(n_zips, EMBEDDING_DIM))
+    embeddings[:, -1] = rng.integers(N_STATES, size=n_zips)
+    std = embeddings.std(axis=0)
+    std = np.where(std < 1e-8, 1e-8, std)
+    ann_index = None
+    if ann_lists:
+        vectors = (embeddings - embeddings.mean(axis=0)) / std
+        ann_index = IVFIndex.build(vectors, ann_lists)
+        n_probe, _ = tune_n_probe(ann_index, vectors, k=10, target_recall=0.95)
+        ann_index = dataclasses.replace(ann_index, n_probe=n_probe)
+    predictor = TreeEnsemble.from_models([home_model, rent_model], FEATURE_COLUMNS) if exported_trees else None
+    snapshot = ModelSnapshot(
+        version=f"synthetic-{n_zips}",
+        home_model=None if exported_trees else home_model,
+        rent_model=None if exported_trees else rent_model,
+        features=store,
+        zip_features=embeddings,
+        zip_codes=zip_codes,
+        zip_index={zip_code: i for i, zip_code in enumerate(zip_codes)},
+        zip_features_mean=embeddings.mean(axis=0),
+        zip_features_std=std,
+        loaded_at=time.time(),
+        predictor=predictor,
+        ann_index=ann_index,
+    )
+    return dataclasses.replace(snapshot, neighbors=neighbor_table(snapshot))
+
+
+def known_zip(snapshot: ModelSnapshot) -> str:
+    """A ZIP with features (direct prediction)."""
+    return snapshot.zip_codes[0]
+
+
+def fallback_zip(snapshot: ModelSnapshot) -> str:
+    """An embedded ZIP without features (neighbor fallback)."""
+    return snapshot.zip_codes[-1]
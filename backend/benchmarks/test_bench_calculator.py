@@ -0,0 +1,66 @@
+"""Calculator entry points across horizons and sizes."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.finance.calculator import (
+    calculate_analysis,
+    calculate_heatmap,
+    calculate_monte_carlo,
+    calculate_sensitivity,
+    calculate_unified_analysis,
+)
+from app.finance.monte_carlo import simulate_home_price_paths, summarize_paths
+
+from .conftest import HORIZONS, scenario
+
+
+@pytest.mark.benchmark(group="unified_analysis")
+@pytest.mark.parametrize("years", HORIZONS)
+def test_unified_analysis(benchmark, years):
+    result = benchmark(calculate_unified_analysis, scenario(years))
+    assert len(result.timeline) == years * 12
+
+
+@pytest.mark.benchmark(group="analysis")
+@pytest.mark.parametrize("years", HORIZONS)
+def test_analysis(benchmark, years):
+    result = benchmark(calculate_analysis, scenario(years))
+    assert len(result.monthlySnapshots) == years * 12
+
+
+@pytest.mark.benchmark(group="heatmap")
+@pytest.mark.parametrize("grid", [(3, 3), (6, 5)], ids=lambda g: f"{g[0]}x{g[1]}")
+def test_heatmap(benchmark, grid):
+    timelines = [5, 10, 15, 20, 25, 30][:grid[0]]
+    downpayments = [5.0, 10.0, 15.0, 20.0, 25.0][:grid[1]]
+    result = benchmark(calculate_heatmap, timelines, downpayments, scenario(30))
+    assert len(result) == grid[0] * grid[1]
+
+
+@pytest.mark.benchmark(group="sensitivity")
+@pytest.mark.parametrize("years", HORIZONS)
+def test_sensitivity(benchmark, years):
+    result = benchmark(calculate_sensitivity, scenario(years), 1.0, 50_000, 250)
+    assert len(result) == 6
+
+
+@pytest.mark.benchmark(group="monte_carlo_scenarios")
+@pytest.mark.parametrize("runs", [50, 200])
+def test_monte_carlo_scenarios(benchmark, runs):
+    # Slow (one full analysis per run): fewer rounds keep the suite short
+    result = benchmark.pedantic(calculate_monte_carlo, args=(scenario(15), runs), rounds=3, warmup_rounds=1)
+    assert len(result["runs"]) == runs
+
+
+@pytest.mark.benchmark(group="monte_carlo_paths")
+@pytest.mark.parametrize("years", HORIZONS)
+@pytest.mark.parametrize("n_paths", [150, 5_000])
+def test_monte_carlo_paths(benchmark, years, n_paths):
+    def simulate_and_summarize():
+        paths = simulate_home_price_paths(500_000, 0.04, 0.15, years, n_paths=n_paths)
+        return summarize_paths(paths)
+
+    summary = benchmark(simulate_and_summarize)
+    assert len(summary["years"]) == years + 1
@@ -0,0 +1,74 @@
+"""ML entry points on synthetic snapshots of several sizes (see synthetic.py)."""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from app.ml.growth_model import predict_zip_growth_with_fallback
+from app.ml.zip_similarity import find_similar_zips
+
+from .conftest import ZIP_COUNTS
+from .synthetic import fallback_zip, known_zip, synthetic_snapshot
+
+
+@pytest.fixture(scope="session")
+def sklearn_snapshot():
+    """Same models, predicting through sklearn instead of the exported trees."""
+    return synthetic_snapshot(ZIP_COUNTS[0], exported_trees=False)
+
+
+@pytest.mark.benchmark(group="find_similar_zips")
+@pytest.mark.parametrize("k", [10, 50])
+def test_find_similar_zips(benchmark, snapshot, k):
+    neighbors = benchmark(find_similar_zips, known_zip(snapshot), k=k, snapshot=snapshot)
+    assert len(neighbors) == k
+
+
+@pytest.fixture(scope="session")
+def ann_snapshot():
+    """Largest synthetic size with an IVF index (sqrt(n) lists, tuned n_probe)."""
+    n_zips = ZIP_COUNTS[-1]
+    return synthetic_snapshot(n_zips, ann_lists=round(math.sqrt(n_zips)))
+
+
+@pytest.mark.benchmark(group="find_similar_zips")
+@pytest.mark.parametrize("k", [10, 50])
+def test_find_similar_zips_ann(benchmark, ann_snapshot, k):
+    neighbors = benchmark(find_similar_zips, known_zip(ann_snapshot), k=k, snapshot=ann_snapshot)
+    assert len(neighbors) == k
+
+
+@pytest.mark.benchmark(group="predict_zip_growth")
+def test_predict_direct(benchmark, snapshot):
+    home, rent = benchmark(predict_zip_growth_with_fallback, known_zip(snapshot), 0.03, 0.03, snapshot=snapshot)
+    assert (home, rent) != (0.03, 0.03)
+
+
+@pytest.mark.benchmark(group="predict_zip_growth")
+def test_predict_direct_sklearn(benchmark, sklearn_snapshot):
+    home, rent = benchmark(
+        predict_zip_growth_with_fallback, known_zip(sklearn_snapshot), 0.03, 0.03, snapshot=sklearn_snapshot
+    )
+    assert (home, rent) != (0.03, 0.03)
+
+
+@pytest.mark.benchmark(group="tree_predictor")
+@pytest.mark.parametrize("rows", [1, 64, 1024])
+def test_tree_predictor_batch(benchmark, snapshot, rows):
+    X = np.ascontiguousarray(snapshot.features.matrix[:rows])
+    predictions = benchmark(snapshot.predictor.predict, X)
+    assert predictions.shape == (rows, 2)
+
+
+@pytest.mark.benchmark(group="predict_zip_growth")
+@pytest.mark.parametrize("same_state", [False, True], ids=["all", "same_state"])
+def test_predict_neighbor_fallback(benchmark, snapshot, same_state):
+    # An embedded ZIP without features resolves from its precomputed neighbors
+    home, rent = benchmark(
+        predict_zip_growth_with_fallback, fallback_zip(snapshot), math.nan, math.nan,
+        snapshot=snapshot, same_state=same_state,
+    )
+    assert not (math.isnan(home) or math.isnan(rent))
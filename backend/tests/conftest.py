@@ -0,0 +1,77 @@
+"""Shared test helpers: a small ModelSnapshot factory (see benchmarks/synthetic.py for large ones)."""
+
+from __future__ import annotations
+
+import dataclasses
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.ml.feature_store import FeatureStore
+from app.ml.registry import ModelSnapshot, neighbor_table
+from app.ml.tree_predictor import TreeEnsemble
+
+COLUMNS = ["home_growth_1y", "rent_growth_1y", "price_to_rent_ratio", "home_vol_5y"]
+
+
+def small_snapshot(
+    version: str = "test",
+    n_zips: int = 60,
+    n_features: int = 50,
+    columns: Sequence[str] = COLUMNS,
+    embeddings: Optional[np.ndarray] = None,
+    dim: int = 4,
+    n_states: int = 0,
+    first_zip: int = 2_000,
+    neighbors: bool = False,
+    seed: int = 0,
+) -> ModelSnapshot:
+    """
+    Snapshot with n_zips embedded ZIPs (strings from first_zip up), the first
+    n_features of which have a feature row.
+
+    Feature values are standard normal (volatility columns non-negative); the
+    home and rent models are small GBMs fit to the first two columns and
+    exported for the NumPy predictor (none without features). Embeddings are
+    standard normal with dim columns unless given; n_states > 0 appends a
+    state-code column. With neighbors, the neighbor lists are precomputed.
+    """
+    rng = np.random.default_rng(seed)
+    columns = list(columns)
+    features = rng.normal(size=(n_features, len(columns))).astype(np.float32)
+    for i, column in enumerate(columns):
+        if "vol" in column:
+            features[:, i] = np.abs(features[:, i])
+
+    predictor = None
+    if n_features:
+        from sklearn.ensemble import GradientBoostingRegressor
+
+        models = [
+            GradientBoostingRegressor(n_estimators=10, max_depth=3, random_state=0).fit(features, features[:, i])
+            for i in range(2)
+        ]
+        predictor = TreeEnsemble.from_models(models, columns)
+
+    if embeddings is None:
+        embeddings = rng.normal(size=(n_zips, dim))
+        if n_states:
+            embeddings = np.column_stack([embeddings, rng.integers(n_states, size=n_zips)])
+    zip_codes: List[str] = [str(first_zip + i) for i in range(len(embeddings))]
+    snapshot = ModelSnapshot(
+        version=version,
+        home_model=None,
+        rent_model=None,
+        features=FeatureStore(features, [int(z) for z in zip_codes[:n_features]], columns),
+        zip_features=embeddings,
+        zip_codes=zip_codes,
+        zip_index={z: i for i, z in enumerate(zip_codes)},
+        zip_features_mean=embeddings.mean(axis=0),
+        zip_features_std=embeddings.std(axis=0),
+        loaded_at=time.time(),
+        predictor=predictor,
+    )
+    if neighbors:
+        snapshot = dataclasses.replace(snapshot, neighbors=neighbor_table(snapshot))
+    return snapshot
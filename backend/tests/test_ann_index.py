@@ -0,0 +1,54 @@
+"""The IVF index must agree with exact search when it scans every list and meet its tuned recall."""
+
+from __future__ import annotations
+
+import dataclasses
+
+import numpy as np
+
+from app.ml.ann_index import IVFIndex, exact_neighbors, tune_n_probe
+from app.ml.zip_similarity import find_similar_zips
+from conftest import small_snapshot
+
+
+def clustered(n: int = 3000, dim: int = 8, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(40, dim)) * 3
+    return centers[rng.integers(40, size=n)] + rng.normal(size=(n, dim))
+
+
+def test_exact_search_matches_brute_force():
+    embeddings = clustered(500)
+    snapshot = small_snapshot(n_features=0, embeddings=embeddings, first_zip=10_000)
+    X_std = (embeddings - snapshot.zip_features_mean) / snapshot.zip_features_std
+    distances = [(snapshot.zip_codes[i], float(np.linalg.norm(X_std[7] - X_std[i]))) for i in range(500) if i != 7]
+    expected = sorted(distances, key=lambda pair: pair[1])[:10]
+
+    result = find_similar_zips(snapshot.zip_codes[7], k=10, snapshot=snapshot)
+    assert [z for z, _ in result] == [z for z, _ in expected]
+    np.testing.assert_allclose([d for _, d in result], [d for _, d in expected], rtol=1e-12)
+
+
+def test_full_probe_is_exact_and_tuning_meets_target(tmp_path):
+    embeddings = clustered()
+    snapshot = small_snapshot(n_features=0, embeddings=embeddings, first_zip=10_000)
+    vectors = (embeddings - snapshot.zip_features_mean) / snapshot.zip_features_std
+    index = IVFIndex.build(vectors, n_lists=50)
+    assert sorted(index.ids.tolist()) == list(range(len(embeddings)))
+
+    indexed = dataclasses.replace(snapshot, ann_index=index)
+    for zip_code in snapshot.zip_codes[:20]:
+        exact = find_similar_zips(zip_code, k=10, snapshot=snapshot)
+        approximate = find_similar_zips(zip_code, k=10, snapshot=indexed, n_probe=index.n_lists)
+        assert [z for z, _ in approximate] == [z for z, _ in exact]
+
+    n_probe, recalls = tune_n_probe(index, vectors, k=10, target_recall=0.9, n_queries=100)
+    assert recalls[n_probe] >= 0.9 and n_probe < index.n_lists
+    queries = np.arange(100, 200)
+    assert index.recall(queries, exact_neighbors(vectors, queries, 10), 10, n_probe) >= 0.85
+
+    path = tmp_path / "index.npz"
+    dataclasses.replace(index, n_probe=n_probe).save(path)
+    loaded = IVFIndex.load(path)
+    assert loaded.n_probe == n_probe
+    np.testing.assert_array_equal(loaded.search(vectors[3], 5)[0], index.search(vectors[3], 5, n_probe)[0])
@@ -0,0 +1,101 @@
+"""Artifact bundles must round-trip a snapshot exactly and refuse corrupt or partial files."""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import os
+
+import numpy as np
+import pytest
+
+from app.config import get_settings
+from app.ml import registry
+from app.ml.ann_index import IVFIndex
+from app.ml.bundle import BundleError, read_bundle, write_bundle
+from conftest import COLUMNS, small_snapshot
+
+pytest.importorskip("sklearn.ensemble")
+
+
+def test_snapshot_round_trip(tmp_path):
+    snapshot = small_snapshot()
+    vectors = (snapshot.zip_features - snapshot.zip_features_mean) / snapshot.zip_features_std
+    snapshot = dataclasses.replace(snapshot, ann_index=IVFIndex.build(vectors, n_lists=4, n_probe=2))
+    path = tmp_path / "bundle.bin"
+    version = registry.save_bundle(snapshot, path, state_encoding={"CA": 0})
+    loaded = registry.load_bundle_snapshot(path)
+
+    assert loaded.version == version
+    assert loaded.zip_codes == snapshot.zip_codes
+    assert loaded.features.zips == snapshot.features.zips
+    assert loaded.features.columns == COLUMNS
+    np.testing.assert_array_equal(loaded.zip_features, snapshot.zip_features)
+    np.testing.assert_array_equal(loaded.zip_features_std, snapshot.zip_features_std)
+    X = snapshot.features.matrix
+    np.testing.assert_array_equal(loaded.predictor.predict(X), snapshot.predictor.predict(X))
+    assert read_bundle(path).metadata["state_encoding"] == {"CA": 0}
+    assert loaded.ann_index.n_probe == 2
+    np.testing.assert_array_equal(loaded.ann_index.ids, snapshot.ann_index.ids)
+
+    # Arrays are read-only views into the memory-mapped file
+    assert not loaded.features.matrix.flags.writeable
+
+    # Same content, same version
+    assert registry.save_bundle(snapshot, tmp_path / "again.bin", state_encoding={"CA": 0}) == version
+
+
+def test_rejects_corrupt_and_truncated_bundles(tmp_path):
+    path = tmp_path / "bundle.bin"
+    write_bundle(path, {"a": np.arange(100, dtype=np.float64)}, {"note": "x"}, created_at="now")
+    data = bytearray(path.read_bytes())
+
+    flipped = tmp_path / "flipped.bin"
+    corrupt = bytearray(data)
+    corrupt[-1] ^= 0xFF
+    flipped.write_bytes(corrupt)
+    with pytest.raises(BundleError, match="checksum"):
+        read_bundle(flipped)
+
+    truncated = tmp_path / "truncated.bin"
+    truncated.write_bytes(data[:-8])
+    with pytest.raises(BundleError, match="truncated"):
+        read_bundle(truncated)
+
+    not_a_bundle = tmp_path / "other.bin"
+    not_a_bundle.write_bytes(b"x" * 64)
+    with pytest.raises(BundleError):
+        read_bundle(not_a_bundle)
+
+
+def test_registry_serves_configured_bundle(tmp_path, monkeypatch):
+    path = tmp_path / "deployed.bin"
+    version = registry.save_bundle(small_snapshot(), path)
+    monkeypatch.setattr(get_settings(), "ml_bundle_path", str(path))
+
+    assert registry.artifact_paths() == [path]
+    assert registry.load_snapshot().version == version
+
+    monkeypatch.setattr(get_settings(), "ml_bundle_path", str(tmp_path / "missing.bin"))
+    with pytest.raises(FileNotFoundError):
+        registry.load_snapshot()
+
+
+def test_bundle_is_opt_in_and_warns_when_stale(tmp_path, monkeypatch, caplog):
+    path = tmp_path / "zip_growth_bundle.bin"
+    registry.save_bundle(small_snapshot(), path)
+    monkeypatch.setattr(registry, "DEFAULT_BUNDLE_PATH", path)
+    monkeypatch.setattr(get_settings(), "ml_bundle_path", None)
+
+    # An existing bundle is not served unless ML_BUNDLE_PATH points at it
+    assert registry.bundle_path() is None
+    assert path not in registry.artifact_paths()
+
+    retrained = tmp_path / "zip_growth_trees.npz"
+    retrained.write_bytes(b"newer")
+    os.utime(path, (1, 1))
+    monkeypatch.setattr(registry, "_loose_artifact_paths", lambda: [retrained])
+    monkeypatch.setattr(get_settings(), "ml_bundle_path", str(path))
+    with caplog.at_level(logging.WARNING, logger=registry.logger.name):
+        registry.load_snapshot()
+    assert "zip_growth_trees.npz" in caplog.text
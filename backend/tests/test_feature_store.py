@@ -0,0 +1,88 @@
+"""The serving feature store: training-script imputation, ZIP normalization and read-only lookups."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from app.ml.feature_store import FeatureStore, normalize_zip
+
+CSV = """zip,state,city,home_growth_1y,rent_growth_1y,home_vol_5y,y_home_growth_next
+02134,MA,Boston,0.05,,,0.01
+90210,CA,Beverly Hills,,0.02,,0.02
+10001,NY,New York,0.01,0.04,,0.03
+60601,IL,Chicago,0.03,0.03,,0.04
+"""
+
+
+@pytest.fixture
+def csv_store(tmp_path) -> FeatureStore:
+    path = tmp_path / "zip_growth_training.csv"
+    path.write_text(CSV)
+    return FeatureStore.from_csv(path)
+
+
+def test_from_csv_drops_non_features_and_imputes_medians(csv_store):
+    assert csv_store.columns == ["home_growth_1y", "rent_growth_1y", "home_vol_5y"]
+    assert csv_store.zips == [2134, 90210, 10001, 60601]
+    np.testing.assert_array_equal(
+        csv_store.matrix,
+        np.array([
+            [0.05, 0.03, 0.0],  # rent: median of 0.02, 0.04, 0.03
+            [0.03, 0.02, 0.0],  # home: median of 0.05, 0.01, 0.03
+            [0.01, 0.04, 0.0],
+            [0.03, 0.03, 0.0],
+        ], dtype=np.float32),
+    )
+    # An all-empty column has no median: it becomes 0.0, never NaN
+    assert not np.isnan(csv_store.matrix).any()
+
+
+def test_normalize_zip():
+    assert normalize_zip("02134") == 2134
+    assert normalize_zip(" 90210 ") == 90210
+    assert normalize_zip(2134) == 2134
+    assert normalize_zip("ABCDE") is None
+    assert normalize_zip("90210-1234") is None
+    assert normalize_zip("") is None
+
+
+def test_lookups(csv_store):
+    # Padded, unpadded and integer ZIPs all find the same row
+    assert csv_store.row("02134") == csv_store.row("2134") == csv_store.row(2134) == 0
+    assert "02134" in csv_store
+
+    assert csv_store.row("99999") == -1 and "99999" not in csv_store
+    assert csv_store.row("not-a-zip") == -1 and "not-a-zip" not in csv_store
+    assert csv_store.vector("99999") is None
+    assert csv_store.vector("not-a-zip") is None
+    assert csv_store.value("99999", "home_growth_1y") is None
+    assert csv_store.value("90210", "no_such_column") is None
+    assert csv_store.value("90210", "rent_growth_1y") == pytest.approx(0.02)
+
+    vector = csv_store.vector("10001")
+    assert vector.shape == (1, len(csv_store.columns))
+    assert vector.dtype == np.float32
+    assert vector.flags.c_contiguous
+    assert np.shares_memory(vector, csv_store.matrix)  # a view, not a copy
+
+
+def test_from_files_memory_maps_read_only(csv_store, tmp_path):
+    matrix_path = tmp_path / "zip_growth_features.npy"
+    meta_path = tmp_path / "zip_growth_features_meta.json"
+    np.save(matrix_path, csv_store.matrix)
+    meta_path.write_text(json.dumps({"zips": csv_store.zips, "columns": csv_store.columns}))
+
+    store = FeatureStore.from_files(matrix_path, meta_path)
+    assert isinstance(store.matrix, np.memmap)  # used as-is, not copied into memory
+    assert not store.matrix.flags.writeable
+    assert store.zips == csv_store.zips and store.columns == csv_store.columns
+    for zip_code in ("02134", "90210", "10001", "60601"):
+        np.testing.assert_array_equal(store.vector(zip_code), csv_store.vector(zip_code))
+
+
+def test_rejects_mismatched_shape():
+    with pytest.raises(ValueError, match="does not match"):
+        FeatureStore(np.zeros((2, 3), dtype=np.float32), [1, 2], ["a", "b"])
@@ -0,0 +1,62 @@
+"""Import-time budget for the API entrypoint.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter and
+checks that heavy libraries stay out of the import graph and that the total
+import time stays under budget. Override the budget with IMPORT_BUDGET_MS
+on unusually slow machines.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Loaded lazily by the endpoints / ML warmup, never by importing the app
+HEAVY_MODULES = ("numpy", "pandas", "sklearn", "joblib", "openai")
+
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "1000"))
+
+
+def import_profile(module: str) -> dict[str, int]:
+    """Return {module name: cumulative import time in microseconds} for a fresh import."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header line
+        profile[parts[2].strip()] = int(parts[1])
+    return profile
+
+
+def slowest(profile: dict[str, int], n: int = 10) -> str:
+    top = sorted(profile.items(), key=lambda item: item[1], reverse=True)[:n]
+    return "\n".join(f"  {us / 1000:8.1f} ms  {name}" for name, us in top)
+
+
+def test_app_import_does_not_load_heavy_modules():
+    profile = import_profile("app.main")
+    loaded = [name for name in HEAVY_MODULES if name in profile]
+    assert not loaded, f"importing app.main pulled in {loaded}:\n{slowest(profile)}"
+
+
+def test_app_import_within_budget():
+    # Best of three runs to smooth out cold filesystem caches
+    profiles = [import_profile("app.main") for _ in range(3)]
+    profile = min(profiles, key=lambda p: p["app.main"])
+    elapsed_ms = profile["app.main"] / 1000
+    assert elapsed_ms <= IMPORT_BUDGET_MS, (
+        f"importing app.main took {elapsed_ms:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms):\n{slowest(profile)}"
+    )
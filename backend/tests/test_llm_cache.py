@@ -0,0 +1,108 @@
+"""LLM response cache and its use by the insight endpoints (mock mode)."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.services import llm_cache, openai_service
+from app.services.llm_cache import LLMResponseCache, bucket, prompt_key, replay_chunks
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = LLMResponseCache(max_entries=4, ttl_seconds=10, clock=clock)
+    cache.set("a", "answer")
+    clock.now = 9.9
+    assert cache.get("a") == "answer"
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LLMResponseCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "b" is now least recently used
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_prompt_key_is_canonical():
+    messages = [{"role": "user", "content": "hi"}]
+    reordered = [{"content": "hi", "role": "user"}]
+    assert prompt_key("m", messages, 0.4, 100) == prompt_key("m", reordered, 0.4, 100)
+    assert prompt_key("m", messages, 0.4, 100) != prompt_key("m", messages, 0.5, 100)
+
+
+def test_bucket_and_replay():
+    assert bucket(12_345.0, 1000) == 12_000
+    assert bucket(12_345.6, 0) == 12_345.6
+    text = "Buying wins  after year 7.\nRenting is close."
+    assert "".join(replay_chunks(text)) == text
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "")
+    get_settings.cache_clear()
+    asyncio.run(openai_service.close_openai_services())
+    monkeypatch.setattr(llm_cache, "_shared_cache", None)
+    from app.main import app
+
+    yield TestClient(app)
+    asyncio.run(openai_service.close_openai_services())
+    get_settings.cache_clear()
+
+
+def test_summary_insight_is_served_from_cache(client):
+    from app.main import settings
+
+    body = {
+        "timelineYears": 10,
+        "buyNetWorth": [0, 1],
+        "rentNetWorth": [0, 2],
+        "breakEvenYear": 7,
+        "finalDelta": 41_250.0,
+        "homeAppreciationRate": 3.0,
+        "rentGrowthRate": 2.5,
+    }
+    first = client.post(f"{settings.api_prefix}/finance/summary-insight", json=body)
+    second = client.post(f"{settings.api_prefix}/finance/summary-insight", json=body)
+    assert first.json() == second.json()
+
+    stats = llm_cache.get_llm_cache().stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_chart_insight_replays_cached_answer_as_sse(client):
+    from app.main import settings
+
+    body = {"chartName": "Net Worth", "chartData": [{"year": 1, "buy": 10}], "question": "Who wins?"}
+
+    def stream_text() -> str:
+        response = client.post(f"{settings.api_prefix}/finance/chart-insight", json=body)
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [line[len("data: "):] for line in response.text.splitlines() if line.startswith("data: ")]
+        assert events[-1] == "[DONE]"
+        return "".join(json.loads(event)["chunk"] for event in events[:-1])
+
+    live = stream_text()
+    replayed = stream_text()
+    assert replayed == live
+    assert llm_cache.get_llm_cache().hits == 1
@@ -0,0 +1,69 @@
+"""Leveled logging, per-request debug traces and the queue-backed writer."""
+
+from __future__ import annotations
+
+import logging
+
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.finance.quick_estimate import market_default_inputs
+from app.logging_config import configure_logging, get_logger, should_trace, shutdown_logging
+
+
+def analyze(client: TestClient, prefix: str, headers: dict) -> None:
+    inputs = market_default_inputs(400_000, 2_000, 5)
+    response = client.post(
+        f"{prefix}/finance/analyze",
+        json={"inputs": inputs.model_dump(), "includeMonteCarlo": True, "monteCarloRuns": 10},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+
+def test_debug_trace_only_for_requests_with_header(caplog, monkeypatch):
+    from app.main import app, settings
+
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    client = TestClient(app)
+    with caplog.at_level(logging.INFO, logger="app"):
+        caplog.handler.setLevel(logging.DEBUG)  # the logger level alone decides
+        analyze(client, settings.api_prefix, headers={})
+        # Without the admin token the header is ignored
+        analyze(client, settings.api_prefix, headers={"X-Debug-Trace": "1", "X-Admin-Token": "wrong"})
+        assert not [r for r in caplog.records if r.levelno == logging.DEBUG]
+
+        analyze(client, settings.api_prefix, headers={"X-Debug-Trace": "1", "X-Admin-Token": "secret"})
+    traces = [r for r in caplog.records if r.levelno == logging.DEBUG and r.name == "app.main"]
+    assert any(r.getMessage().startswith("Monte Carlo") for r in traces)
+    # Records point at the calling code, not the logging wrapper
+    assert {r.module for r in traces} == {"main"}
+
+
+def test_sampling_is_per_route_and_header_overrides_it():
+    settings = Settings(log_trace_sample_rates={"/api/finance/analyze": 1.0}, admin_token="secret")
+    assert should_trace("/api/finance/analyze", None, settings)
+    assert not should_trace("/api/finance/monte-carlo", None, settings)
+    assert not should_trace("/api/finance/analyze", "0", settings, "secret")
+    assert should_trace("/health", "1", settings, "secret")
+    assert not should_trace("/health", "1", settings)
+    assert not should_trace("/health", "1", settings.model_copy(update={"admin_token": None}), "secret")
+
+    settings = Settings(log_trace_sample_rates={"*": 1.0}, log_debug_header_enabled=False, admin_token="secret")
+    assert should_trace("/health", "0", settings, "secret")
+
+
+def test_queue_listener_writes_formatted_records(capsys):
+    configure_logging(Settings(log_level="WARNING", log_format="json"))
+    try:
+        logger = get_logger("app.test")
+        logger.info("dropped %s", "info")
+        logger.warning("kept %d of %d", 1, 2, extra={"route": "/x"})
+    finally:
+        shutdown_logging()  # flushes the queue
+
+    err = capsys.readouterr().err
+    assert "dropped" not in err
+    assert '"message": "kept 1 of 2"' in err
+    assert '"route": "/x"' in err
+    assert logging.getLogger("app").propagate
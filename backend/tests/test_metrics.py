@@ -0,0 +1,60 @@
+"""Timing spans, Server-Timing headers and the /metrics endpoint."""
+
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.finance.quick_estimate import market_default_inputs
+from app.metrics import Histogram, collect_spans, server_timing_header, span
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, stage='a"b')
+
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{stage="a\\"b",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="a\\"b",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{stage="a\\"b",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{stage="a\\"b"} 4' in lines
+    assert histogram.count(stage='a"b') == 4
+
+
+def test_spans_are_collected_per_block_and_summed_in_header():
+    with collect_spans() as spans:
+        with span("lookup"):
+            pass
+        with span("lookup"):
+            pass
+    with span("outside"):  # observed in the histogram only
+        pass
+
+    assert [stage for stage, _ in spans] == ["lookup", "lookup"]
+    header = server_timing_header(spans, total_ms=5.0)
+    assert header.startswith("lookup;dur=")
+    assert header.endswith("total;dur=5.00")
+
+
+def test_analyze_reports_stages_in_header_and_metrics():
+    from app.main import app, settings
+
+    client = TestClient(app)
+    inputs = market_default_inputs(500_000, 2_500, 10)
+    response = client.post(
+        f"{settings.api_prefix}/finance/analyze",
+        json={"inputs": inputs.model_dump(), "includeMonteCarlo": True, "monteCarloRuns": 20},
+    )
+    assert response.status_code == 200
+    assert response.json()["analysis"]["monte_carlo_home_prices"] is not None
+
+    # The endpoint runs in the threadpool; its spans still reach the request's header
+    stages = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    for stage in ("timeline", "monte_carlo_simulate", "monte_carlo_summarize", "serialize", "total"):
+        assert stage in stages
+
+    body = client.get("/metrics").text
+    assert "# TYPE stage_duration_seconds histogram" in body
+    assert 'stage_duration_seconds_count{stage="timeline"}' in body
+    route = f"{settings.api_prefix}/finance/analyze"
+    assert f'http_request_duration_seconds_count{{method="POST",route="{route}",status="200"}}' in body
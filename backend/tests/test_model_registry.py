@@ -0,0 +1,161 @@
+"""Snapshot loading and activation: validated, atomic, and without side effects on shared models."""
+
+from __future__ import annotations
+
+import dataclasses
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.ml import registry, warmup
+from app.ml.feature_store import FeatureStore
+from conftest import COLUMNS, small_snapshot
+
+ensemble = pytest.importorskip("sklearn.ensemble")
+
+
+def without_overlap(snapshot: registry.ModelSnapshot, version: str) -> registry.ModelSnapshot:
+    """A snapshot whose embeddings share no ZIP with the feature table (fails validation)."""
+    zip_codes = [str(90_000 + i) for i in range(len(snapshot.zip_codes))]
+    return dataclasses.replace(
+        snapshot, version=version, zip_codes=zip_codes, zip_index={z: i for i, z in enumerate(zip_codes)}
+    )
+
+
+@pytest.fixture
+def model_registry(monkeypatch):
+    """A fresh registry (and readiness report) that serves the snapshots queued in .pending."""
+    pending = []
+    model_registry = registry.ModelRegistry(loader=lambda: pending.pop(0))
+    model_registry.pending = pending
+    monkeypatch.setattr(registry, "registry", model_registry)
+    monkeypatch.setattr(warmup, "registry", model_registry)
+    monkeypatch.setattr(warmup, "_report", warmup.WarmupReport())
+    return model_registry
+
+
+def test_bind_feature_order_leaves_the_loaded_model_untouched():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(40, len(COLUMNS))), columns=COLUMNS)
+    model = ensemble.GradientBoostingRegressor(n_estimators=5, random_state=0).fit(X, X["home_growth_1y"])
+
+    serving = registry._bind_feature_order(model, COLUMNS)
+    assert list(model.feature_names_in_) == COLUMNS
+    assert not hasattr(serving, "feature_names_in_")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        np.testing.assert_array_equal(serving.predict(X.to_numpy(np.float32)), model.predict(X.astype(np.float32)))
+
+    with pytest.raises(ValueError, match="trained on columns"):
+        registry._bind_feature_order(model, COLUMNS[::-1])
+
+
+def test_get_loads_once_and_install_swaps_whole_snapshots():
+    v1 = small_snapshot("v1")
+    v2 = dataclasses.replace(v1, version="v2", features=FeatureStore(v1.features.matrix[:10], v1.features.zips[:10], COLUMNS))
+    loads = []
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.05)  # let the other threads pile up on the lock
+        return v1
+
+    model_registry = registry.ModelRegistry(loader=loader)
+    threads = [threading.Thread(target=model_registry.get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1 and model_registry.version == "v1"
+
+    seen = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            snapshot = model_registry.get()
+            seen.append((snapshot.version, len(snapshot.features)))
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for snapshot in (v2, v1, v2):
+        time.sleep(0.01)
+        model_registry.install(snapshot)
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    # Every request saw one complete version, never a mix of the two
+    assert set(seen) <= {("v1", 50), ("v2", 10)}
+    assert model_registry.install(v1) is v2
+    assert model_registry.get() is v1
+
+
+def test_failed_validation_keeps_the_previous_snapshot(model_registry):
+    v1 = small_snapshot("v1")
+    model_registry.pending += [v1, without_overlap(v1, "v2")]
+
+    report = warmup.run_warmup()
+    assert report.ready and report.error is None and report.model_version == "v1"
+
+    report = warmup.run_warmup()
+    assert report.error.startswith("validate:")
+    assert [stage.name for stage in report.stages] == ["load_artifacts", "validate"]
+    assert report.ready and report.model_version == "v1"
+    assert model_registry.get() is v1
+
+
+def test_ready_is_503_until_warmup_succeeds(model_registry):
+    from app.main import app
+
+    client = TestClient(app)  # no lifespan: the startup warmup does not run
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+
+    model_registry.pending.append(small_snapshot("v1"))
+    warmup.run_warmup()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["warmup"]["model_version"] == "v1"
+
+
+def test_admin_reload_requires_the_admin_token(model_registry, monkeypatch):
+    from app.main import app, settings
+
+    client = TestClient(app)
+    monkeypatch.setattr(settings, "admin_token", None)
+    assert client.post("/admin/ml/reload", headers={"X-Admin-Token": "secret"}).status_code == 404
+
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    assert client.post("/admin/ml/reload").status_code == 403
+    assert client.post("/admin/ml/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert model_registry.pending == [] and model_registry.current() is None
+
+    v1 = small_snapshot("v1")
+    model_registry.pending += [v1, without_overlap(v1, "v2")]
+    response = client.post("/admin/ml/reload", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.json()["model_version"] == "v1"
+
+    response = client.post("/admin/ml/reload", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 500
+    assert response.json()["reloaded"] is False
+    assert response.json()["model_version"] == "v1"
+
+
+def test_predictions_use_fallback_rates_when_artifacts_are_missing(monkeypatch):
+    from app.ml import growth_model
+
+    def missing():
+        raise FileNotFoundError("zip_growth_trees.npz")
+
+    monkeypatch.setattr(growth_model, "registry", registry.ModelRegistry(loader=missing))
+    assert growth_model.predict_zip_growth_with_fallback("2001", 0.04, 0.03) == (0.04, 0.03)
+    assert growth_model.predict_zip_growth("2001", 0.04, 0.03) == (0.04, 0.03)
@@ -0,0 +1,70 @@
+"""Precomputed neighbor lists must match a brute-force search and drive the growth fallback."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.ml.growth_model import predict_zip_growth_with_fallback
+from app.ml.neighbors import build_neighbor_table
+from conftest import small_snapshot
+
+pytest.importorskip("sklearn.ensemble")
+
+
+def brute_force(vectors, has_prediction, states, row, k, same_state):
+    candidates = [
+        i for i in range(len(vectors))
+        if i != row and has_prediction[i] and (not same_state or states[i] == states[row])
+    ]
+    distances = [float(np.linalg.norm(vectors[i] - vectors[row])) for i in candidates]
+    order = np.argsort(distances, kind="stable")[:k]
+    return [candidates[i] for i in order], [distances[i] for i in order]
+
+
+def test_table_matches_brute_force_and_weights_by_inverse_distance():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(300, 5))
+    predictions = rng.normal(size=(300, 2))
+    predictions[rng.random(300) < 0.2] = np.nan
+    states = rng.integers(6, size=300)
+    states[299] = 99  # alone in its state
+    table = build_neighbor_table(vectors, predictions, states, k=8)
+    has_prediction = ~np.isnan(predictions).any(axis=1)
+
+    for row in (0, 17, 150):
+        for same_state in (False, True):
+            rows, distances = brute_force(vectors, has_prediction, states, row, 8, same_state)
+            found = (table.state_rows if same_state else table.rows)[row, :len(rows)]
+            assert found.tolist() == rows
+            np.testing.assert_allclose(
+                (table.state_distances if same_state else table.distances)[row, :len(rows)], distances, rtol=1e-9
+            )
+
+    rows, distances = brute_force(vectors, has_prediction, states, 0, 5, False)
+    weights = 1 / np.asarray(distances)
+    expected = weights @ predictions[rows] / weights.sum()
+    np.testing.assert_allclose(table.estimate(0, k=5), expected, rtol=1e-9)
+    assert table.estimate(299, k=5, same_state=True) is None
+
+
+def test_fallback_uses_neighbors_for_embedded_zip_without_features():
+    snapshot = small_snapshot(n_zips=45, n_features=40, dim=3, n_states=2, first_zip=50_000, neighbors=True, seed=1)
+    zip_codes, embeddings = snapshot.zip_codes, snapshot.zip_features
+
+    # Direct prediction for a ZIP with features matches the table's precomputed one
+    direct = predict_zip_growth_with_fallback(zip_codes[0], 0.5, 0.5, snapshot=snapshot)
+    np.testing.assert_allclose(direct, snapshot.neighbors.predictions[0])
+
+    # Embedded ZIP without features: neighbor average, not the fallback rates
+    home, rent = predict_zip_growth_with_fallback(zip_codes[-1], 0.5, 0.5, k=5, snapshot=snapshot)
+    assert (home, rent) == snapshot.neighbors.estimate(44, k=5)
+    assert (home, rent) != (0.5, 0.5)
+
+    same_state = predict_zip_growth_with_fallback(zip_codes[-1], 0.5, 0.5, k=5, snapshot=snapshot, same_state=True)
+    in_state = snapshot.neighbors.state_rows[44, :5]
+    assert (embeddings[in_state, -1] == embeddings[44, -1]).all()
+    assert same_state == snapshot.neighbors.estimate(44, k=5, same_state=True)
+
+    # Unknown ZIP: fallback rates
+    assert predict_zip_growth_with_fallback("99999", 0.5, 0.25, snapshot=snapshot) == (0.5, 0.25)
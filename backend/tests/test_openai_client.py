@@ -0,0 +1,123 @@
+"""Shared OpenAI client lifecycle."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.services import llm_cache, openai_service
+from benchmarks.fake_openai import FakeOpenAIServer
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    server = FakeOpenAIServer(reply="stub reply").start()
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    get_settings.cache_clear()
+    asyncio.run(openai_service.close_openai_services())
+    yield server
+    asyncio.run(openai_service.close_openai_services())
+    get_settings.cache_clear()
+    server.stop()
+
+
+def test_reload_picks_up_rotated_key(fake_openai, monkeypatch):
+    before = openai_service.get_shared_async_openai_service()
+    assert before._client.api_key == "sk-test"
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-rotated")
+    # Settings are cached; the key is only re-read on an explicit reload
+    assert openai_service.get_shared_async_openai_service() is before
+
+    reloaded = openai_service.reload_openai_service()
+    assert reloaded is not before
+    assert reloaded._client.api_key == "sk-rotated"
+    assert openai_service.get_shared_async_openai_service() is reloaded
+
+
+def test_async_service_shares_one_client(fake_openai):
+    service = openai_service.get_shared_async_openai_service()
+    assert openai_service.get_shared_async_openai_service() is service
+
+    async def ask_concurrently():
+        messages = [{"role": "user", "content": "hi"}]
+        try:
+            return await asyncio.gather(*(service.chat_completion("gpt-4o-mini", messages) for _ in range(5)))
+        finally:
+            # The pool is bound to this event loop, so close it before the loop goes away
+            await openai_service.close_openai_services()
+
+    assert asyncio.run(ask_concurrently()) == ["stub reply"] * 5
+    assert fake_openai.request_count == 5
+
+
+def test_async_stream_from_fake_server(fake_openai):
+    fake_openai.reply = "streamed stub reply"
+    service = openai_service.get_shared_async_openai_service()
+
+    async def collect():
+        messages = [{"role": "user", "content": "hi"}]
+        try:
+            return [chunk async for chunk in service.chat_completion_stream("gpt-4o-mini", messages)]
+        finally:
+            await openai_service.close_openai_services()
+
+    assert asyncio.run(collect()) == ["streamed ", "stub ", "reply"]
+    assert fake_openai.tokens_streamed == 3
+
+
+def test_chart_insight_streams_in_mock_mode(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "")
+    get_settings.cache_clear()
+    asyncio.run(openai_service.close_openai_services())
+    from app.main import app, settings
+
+    try:
+        client = TestClient(app)
+        response = client.post(
+            f"{settings.api_prefix}/finance/chart-insight",
+            json={"chartName": "Net Worth", "chartData": [{"year": 1}], "question": "What happens?"},
+        )
+    finally:
+        asyncio.run(openai_service.close_openai_services())
+        get_settings.cache_clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line[len("data: "):] for line in response.text.splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    assert "(Mock AI)" in "".join(json.loads(event)["chunk"] for event in events[:-1])
+
+
+def test_reload_after_mock_mode_does_not_serve_cached_mock_answers(monkeypatch):
+    server = FakeOpenAIServer(reply="real reply").start()
+    monkeypatch.setenv("OPENAI_API_KEY", "")
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setattr(llm_cache, "_shared_cache", None)
+    get_settings.cache_clear()
+    asyncio.run(openai_service.close_openai_services())
+    messages = [{"role": "user", "content": "hi"}]
+
+    async def ask(service):
+        try:
+            return await service.chat_completion("gpt-4o-mini", messages, cache=llm_cache.get_llm_cache())
+        finally:
+            await openai_service.close_openai_services()
+
+    try:
+        assert asyncio.run(ask(openai_service.get_shared_async_openai_service())).startswith("(Mock AI)")
+
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-new")
+        reloaded = openai_service.reload_openai_service()
+        assert not reloaded._is_mock_mode
+        assert asyncio.run(ask(reloaded)) == "real reply"
+        assert server.request_count == 1
+    finally:
+        asyncio.run(openai_service.close_openai_services())
+        get_settings.cache_clear()
+        server.stop()
@@ -0,0 +1,76 @@
+"""Sampling profiler, per-request profiles and the /admin/profile endpoints."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.finance.quick_estimate import market_default_inputs
+from app.profiling import SamplingProfiler
+
+ADMIN_TOKEN = "test-admin-token"
+
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_folded_stacks_of_selected_thread():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001, threads={worker.ident}).start()
+    time.sleep(0.1)
+    profiler.stop()
+    stop.set()
+    worker.join()
+
+    lines = profiler.folded().splitlines()
+    assert lines and profiler.samples > 0
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+        assert stack.startswith("busy;")  # rooted at the thread name
+    assert any("busy_loop (tests/test_profiling.py:" in line for line in lines)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from app.main import app, settings
+
+    monkeypatch.setattr(settings, "admin_token", ADMIN_TOKEN)
+    return TestClient(app), settings.api_prefix
+
+
+def test_profiled_request_returns_profile_id(client):
+    client, prefix = client
+    inputs = market_default_inputs(500_000, 2_500, 30)
+    payload = {"inputs": inputs.model_dump(), "includeMonteCarlo": True, "monteCarloRuns": 20_000}
+
+    plain = client.post(f"{prefix}/finance/analyze", json=payload, headers={"X-Profile": "1"})
+    assert "x-profile-id" not in plain.headers  # needs the admin token
+
+    response = client.post(
+        f"{prefix}/finance/analyze", json=payload, headers={"X-Profile": "1", "X-Admin-Token": ADMIN_TOKEN}
+    )
+    assert response.status_code == 200
+    assert int(response.headers["x-profile-samples"]) > 0
+
+    profile = client.get(f"/admin/profile/{response.headers['x-profile-id']}", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert profile.status_code == 200
+    assert "_run_analysis (app/main.py:" in profile.text
+
+    missing = client.get("/admin/profile/unknown", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert missing.status_code == 404
+
+
+def test_window_profile_requires_admin(client):
+    client, _ = client
+    assert client.post("/admin/profile?seconds=0.05").status_code == 403
+    response = client.post("/admin/profile?seconds=0.05&interval_ms=1", headers={"X-Admin-Token": ADMIN_TOKEN})
+    assert response.status_code == 200
+    assert int(response.headers["x-profile-samples"]) > 0
@@ -0,0 +1,49 @@
+"""Chart payload compaction for chart-insight prompts."""
+
+from __future__ import annotations
+
+import json
+
+from app.services.prompt_compaction import compact_chart_payload, count_tokens, trim_history
+
+
+def monthly_timeline(months: int = 360) -> list:
+    return [
+        {
+            "month": month,
+            "buyerNetWorth": 1000.0 * month + 0.123,
+            "renterNetWorth": 900.0 * month,
+            "hoaMonthly": 0.0,
+            "note": None,
+            "rate": 0.0345678,
+        }
+        for month in range(1, months + 1)
+    ]
+
+
+def test_monthly_series_is_downsampled_to_yearly_points():
+    rows = json.loads(compact_chart_payload(monthly_timeline(), max_points=40))
+    assert [row["month"] for row in rows] == [1] + [12 * year for year in range(1, 31)]
+
+
+def test_unused_fields_are_dropped_and_numbers_rounded():
+    row = json.loads(compact_chart_payload(monthly_timeline()))[-1]
+    assert set(row) == {"month", "buyerNetWorth", "renterNetWorth", "rate"}
+    assert row["buyerNetWorth"] == 360000
+    assert row["rate"] == 0.03457
+
+
+def test_payload_is_shrunk_to_token_budget():
+    data = {"timeline": monthly_timeline(), "other": list(range(500))}
+    full = json.dumps(data)
+    compact = compact_chart_payload(data, max_points=40, token_budget=200)
+    assert count_tokens(compact) <= 200 < count_tokens(full)
+    assert json.loads(compact)["timeline"][-1]["month"] == 360
+
+
+def test_history_keeps_most_recent_turns_within_budget():
+    turns = [(f"question {i} " * 20, f"answer {i} " * 40) for i in range(10)]
+    per_turn = count_tokens(turns[0][0]) + count_tokens(turns[0][1])
+    kept = trim_history(turns, token_budget=per_turn * 3)
+    assert kept == turns[-3:]
+    assert trim_history(turns, token_budget=0) == []
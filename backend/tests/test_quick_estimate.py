@@ -0,0 +1,75 @@
+"""Quick estimates must reproduce the calculator's break-even and final delta."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.finance.calculator import calculate_unified_analysis
+from app.finance.quick_estimate import (
+    QUICK_ESTIMATE_ERROR_BOUND, calculate_quick_estimate, market_default_inputs)
+from app.models import ScenarioInputs
+
+
+def random_scenario(rng: np.random.Generator, n: int) -> ScenarioInputs:
+    price = float(np.exp(rng.uniform(np.log(50_000), np.log(5_000_000))))
+    return ScenarioInputs(
+        homePrice=price,
+        downPaymentPercent=float(rng.choice([0, 3.5, 10, 20, 50, 100])),
+        interestRate=float(rng.choice([0, 3, 7, 12])),
+        loanTermYears=30,
+        timeHorizonYears=int(rng.integers(1, 31)),
+        monthlyRent=price * rng.uniform(0.001, 0.015),
+        propertyTaxRate=rng.uniform(0, 3),
+        homeInsuranceAnnual=rng.uniform(0, 5000),
+        hoaMonthly=rng.uniform(0, 800),
+        maintenanceRate=rng.uniform(0, 3),
+        renterInsuranceAnnual=240,
+        homeAppreciationRate=rng.uniform(-10, 12),  # negative rates keep PMI on for longer
+        rentGrowthRate=rng.uniform(-5, 10),
+        investmentReturnRate=rng.uniform(-5, 12),
+        closingCostsPercent=None if n % 3 == 0 else rng.uniform(0, 6),
+        pmiRate=None if n % 2 else rng.uniform(0, 2),
+        sellingCostsPercent=None if n % 5 == 0 else rng.uniform(0, 8),
+    )
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_calculator_within_error_bound(seed):
+    rng = np.random.default_rng(seed)
+    for n in range(100):
+        inputs = random_scenario(rng, n)
+        quick = calculate_quick_estimate(inputs)
+        exact = calculate_unified_analysis(inputs)
+        final = exact.timeline[-1]
+
+        error = abs(quick.final_net_worth_delta - (final.net_worth_buy - final.net_worth_rent))
+        assert error <= QUICK_ESTIMATE_ERROR_BOUND["final_delta_fraction_of_price"] * inputs.homePrice
+        assert quick.break_even_month == exact.break_even.month_index
+        assert quick.break_even_year == exact.break_even.year
+
+
+def test_horizon_longer_than_amortization_is_rejected():
+    inputs = market_default_inputs(500_000, 2_500, 30).model_copy(update={"timeHorizonYears": 31})
+    with pytest.raises(ValueError):
+        calculate_quick_estimate(inputs)
+
+
+def test_endpoint_agrees_with_analyze():
+    from app.main import app, settings
+
+    client = TestClient(app)
+    quick = client.post(
+        f"{settings.api_prefix}/finance/quick-estimate",
+        json={"homePrice": 650_000, "monthlyRent": 3_000, "timeHorizonYears": 12},
+    ).json()
+    inputs = market_default_inputs(650_000, 3_000, 12)
+    analysis = client.post(
+        f"{settings.api_prefix}/finance/analyze", json={"inputs": inputs.model_dump()}
+    ).json()["analysis"]
+
+    assert quick["breakEvenMonth"] == analysis["break_even"]["month_index"]
+    final = analysis["timeline"][-1]
+    assert quick["finalNetWorthDelta"] == pytest.approx(final["net_worth_buy"] - final["net_worth_rent"])
+    assert quick["errorBound"] == QUICK_ESTIMATE_ERROR_BOUND
@@ -0,0 +1,60 @@
+"""Coalescing of identical in-flight computations."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.single_flight import SingleFlight, request_key
+
+
+def test_concurrent_identical_calls_share_one_computation():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return {"result": 42}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "k", compute)
+        assert started.wait(timeout=5)
+        followers = [pool.submit(flight.do, "k", compute) for _ in range(3)]
+        while flight.coalesced < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_completed_calls_are_not_cached():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+
+
+def test_leader_exception_is_raised_and_key_released():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("k", fail)
+    assert flight.in_flight() == 0
+
+
+def test_request_key_is_canonical_and_versioned():
+    a = request_key("finance/analyze", {"x": 1, "y": 2}, "v1")
+    assert a == request_key("finance/analyze", {"y": 2, "x": 1}, "v1")
+    assert a != request_key("finance/analyze", {"x": 1, "y": 2}, "v2")
+    assert a != request_key("finance/monte-carlo", {"x": 1, "y": 2}, "v1")
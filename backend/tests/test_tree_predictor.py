@@ -0,0 +1,54 @@
+"""Exported tree ensembles must predict exactly like the sklearn models they came from."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.ml.tree_predictor import TreeEnsemble
+
+ensemble = pytest.importorskip("sklearn.ensemble")
+
+COLUMNS = [f"f{i}" for i in range(6)]
+
+
+def training_data(missing_fraction: float = 0.0):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, len(COLUMNS)))
+    X[rng.random(X.shape) < missing_fraction] = np.nan
+    y_home = np.nan_to_num(X[:, 0]) * 0.5 + np.sin(np.nan_to_num(X[:, 1])) + rng.normal(0, 0.1, len(X))
+    y_rent = np.nan_to_num(X[:, 2]) ** 2 + rng.normal(0, 0.1, len(X))
+    return X, y_home, y_rent
+
+
+@pytest.mark.parametrize(
+    "make_model, missing_fraction",
+    [
+        (lambda: ensemble.GradientBoostingRegressor(n_estimators=30, max_depth=4, random_state=0), 0.0),
+        (lambda: ensemble.HistGradientBoostingRegressor(max_iter=30, max_depth=4, random_state=0), 0.05),
+    ],
+    ids=["gradient_boosting", "hist_gradient_boosting"],
+)
+def test_packed_ensemble_matches_sklearn(tmp_path, make_model, missing_fraction):
+    X, y_home, y_rent = training_data(missing_fraction)
+    home, rent = make_model().fit(X, y_home), make_model().fit(X, y_rent)
+    predictor = TreeEnsemble.from_models([home, rent], COLUMNS)
+
+    X_query = X[:200].astype(np.float32)  # serving passes float32 rows
+    expected = np.column_stack([home.predict(X_query), rent.predict(X_query)])
+    np.testing.assert_allclose(predictor.predict(X_query), expected, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(predictor.predict(X_query[:1]), expected[:1], rtol=0, atol=1e-12)
+
+    path = tmp_path / "trees.npz"
+    predictor.save(path)
+    loaded = TreeEnsemble.load(path)
+    assert loaded.columns == COLUMNS and loaded.depth == predictor.depth
+    np.testing.assert_array_equal(loaded.predict(X_query), predictor.predict(X_query))
+
+
+def test_rejects_wrong_feature_count():
+    X, y_home, _ = training_data()
+    model = ensemble.GradientBoostingRegressor(n_estimators=5, random_state=0).fit(X, y_home)
+    predictor = TreeEnsemble.from_models([model], COLUMNS)
+    with pytest.raises(ValueError):
+        predictor.predict(X[:, :-1])
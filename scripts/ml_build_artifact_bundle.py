@@ -0,0 +1,93 @@
+"""
+Pack the ML serving artifacts into one versioned, checksummed bundle.
+
+Reads the loose files the other scripts write (exported model trees,
+feature table, ZIP embeddings and state encoding), loads them exactly as
+the API would, and writes them to backend/app/ml/models/zip_growth_bundle.bin.
+Set ML_BUNDLE_PATH to the bundle (or a deployed copy of it) to have the API
+serve from that single file (see backend/app/ml/bundle.py); without it the
+API keeps serving the loose files.
+
+Large embedding tables (national scale) also get an approximate
+nearest-neighbor index (IVF) for find_similar_zips. Its n_probe is tuned
+here to the smallest value that reaches --ann-recall against exact search.
+
+Run after ml_build_zip_embeddings.py and ml_train_growth_model.py.
+"""
+
+import argparse
+import dataclasses
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+from app.ml import registry  # noqa: E402
+from app.ml.ann_index import IVFIndex, tune_n_probe  # noqa: E402
+from app.ml.bundle import read_bundle  # noqa: E402
+
+# Below this many embedded ZIPs exact search is fast enough and no index is built
+ANN_MIN_ZIPS = 10_000
+
+
+def build_ann_index(snapshot, n_lists, target_recall, k):
+    """IVF index over the snapshot's standardized embeddings, with n_probe tuned for recall@k."""
+    vectors = (snapshot.zip_features - snapshot.zip_features_mean) / snapshot.zip_features_std
+    start = time.perf_counter()
+    index = IVFIndex.build(vectors, n_lists)
+    print(f'   Built {index.n_lists} lists over {len(index)} ZIPs in {time.perf_counter() - start:.1f}s')
+    n_probe, recalls = tune_n_probe(index, vectors, k, target_recall)
+    for probes, recall in recalls.items():
+        print(f'   n_probe={probes:<5} recall@{k}={recall:.3f}')
+    print(f'   Using n_probe={n_probe}')
+    return dataclasses.replace(index, n_probe=n_probe)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack the ML serving artifacts into one bundle file.')
+    parser.add_argument('--output', type=Path, default=registry.DEFAULT_BUNDLE_PATH,
+                        help=f'bundle file to write (default {registry.DEFAULT_BUNDLE_PATH})')
+    parser.add_argument('--ann-lists', type=int, default=None,
+                        help=f'ANN index lists (default: sqrt(ZIPs) from {ANN_MIN_ZIPS} ZIPs up; 0 disables)')
+    parser.add_argument('--ann-recall', type=float, default=0.95,
+                        help='target recall@k used to pick n_probe (default 0.95)')
+    parser.add_argument('--ann-k', type=int, default=10, help='k for the recall target (default 10)')
+    args = parser.parse_args()
+
+    print('📦 Building ML artifact bundle...\n')
+    start = time.perf_counter()
+    snapshot = registry.load_loose_snapshot()
+    print(f'   Loaded loose artifacts (version {snapshot.version}) in {(time.perf_counter() - start) * 1000:.0f} ms')
+    print(f'   {snapshot.predictor.n_trees if snapshot.predictor else 0} trees, '
+          f'{len(snapshot.features)} feature rows, {len(snapshot.zip_codes)} embeddings')
+
+    n_lists = args.ann_lists
+    if n_lists is None:
+        n_zips = len(snapshot.zip_codes)
+        n_lists = round(math.sqrt(n_zips)) if n_zips >= ANN_MIN_ZIPS else 0
+    if n_lists > 0:
+        print(f'\n🧭 Building ANN index (target recall@{args.ann_k} {args.ann_recall})...')
+        snapshot = dataclasses.replace(
+            snapshot, ann_index=build_ann_index(snapshot, n_lists, args.ann_recall, args.ann_k)
+        )
+
+    state_encoding = None
+    if registry.STATE_ENCODING_PATH.exists():
+        with open(registry.STATE_ENCODING_PATH) as f:
+            state_encoding = json.load(f)
+
+    version = registry.save_bundle(snapshot, args.output, state_encoding)
+    size_kb = args.output.stat().st_size / 1024
+    print(f'\n💾 Wrote bundle {version} to {args.output} ({size_kb:.0f} KB)')
+
+    # Read it back the way the API does: verifies every checksum
+    start = time.perf_counter()
+    registry.load_bundle_snapshot(args.output)
+    print(f'   Verified and loaded in {(time.perf_counter() - start) * 1000:.1f} ms')
+    print(f'   Arrays: {", ".join(sorted(read_bundle(args.output, verify=False).arrays))}')
+
+
+if __name__ == '__main__':
+    main()
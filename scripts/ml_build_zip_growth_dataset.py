@@ -3,10 +3,14 @@ Script to build ZIP code growth training dataset for ML models.
 
 Reads Zillow ZHVI and ZORI CSV files, converts monthly data to annual,
 computes returns, and creates features/targets for growth prediction.
+The CSVs are streamed in chunks and only the January columns are parsed,
+so memory stays bounded however many months Zillow publishes.
 """
 
+import json
 import pandas as pd
 import numpy as np
+from datetime import datetime
 from pathlib import Path
 
 # File paths
@@ -14,207 +18,260 @@ DATA_DIR = Path(__file__).parent.parent / 'src' / 'data'
 ZHVI_PATH = DATA_DIR / 'Zip_zhvi_uc_sfrcondo_tier_0.33_0.67_sm_sa_month.csv'
 ZORI_PATH = DATA_DIR / 'Zip_zori_uc_sfrcondomfr_sm_month.csv'
 OUTPUT_PATH = DATA_DIR / 'zip_growth_training.csv'
+# Rolling-window samples for training, one .npy per array (memory-mappable)
+WINDOWS_DIR = DATA_DIR / 'zip_growth_windows'
 
-print('🚀 Starting ZIP growth training dataset build...\n')
+# Rows per chunk when streaming the Zillow CSVs (bounds peak memory)
+CHUNK_ROWS = 5_000
+ZHVI_META_COLUMNS = ['StateName', 'City']
+# ZIPs per block when building rolling windows (bounds peak memory)
+WINDOW_BLOCK_ZIPS = 5_000
 
-# Read CSV files
-print('📂 Reading ZHVI (home prices) file...')
-zhvi_df = pd.read_csv(ZHVI_PATH)
-print(f'   Loaded {len(zhvi_df)} rows')
+# Model inputs, in the order of the training CSV columns
+FEATURE_COLUMNS = [
+    'home_growth_1y', 'home_growth_3y_avg', 'home_growth_5y_avg', 'home_vol_5y',
+    'rent_growth_1y', 'rent_growth_3y_avg', 'rent_growth_5y_avg', 'rent_vol_5y',
+    'price_to_rent_ratio',
+]
 
-print('📂 Reading ZORI (rents) file...')
-zori_df = pd.read_csv(ZORI_PATH)
-print(f'   Loaded {len(zori_df)} rows\n')
 
 # Find date columns (YYYY-MM-DD format)
-def get_date_columns(df):
-    """Extract date columns from dataframe."""
-    date_cols = [col for col in df.columns if pd.to_datetime(col, errors='coerce', format='%Y-%m-%d') is not pd.NaT]
+def get_date_columns(path):
+    """Extract date columns from the CSV header."""
+    date_cols = []
+    for col in pd.read_csv(path, nrows=0).columns:
+        try:
+            datetime.strptime(col, '%Y-%m-%d')
+        except ValueError:
+            continue
+        date_cols.append(col)
     return sorted(date_cols)
 
-zhvi_dates = get_date_columns(zhvi_df)
-zori_dates = get_date_columns(zori_df)
-
-print(f'   Found {len(zhvi_dates)} date columns in ZHVI')
-print(f'   Found {len(zori_dates)} date columns in ZORI')
 
 # Convert monthly values to annual (use January of each year)
-def monthly_to_annual(df, date_cols, value_name):
-    """Convert monthly data to annual by using January values."""
-    annual_data = {}
-    
-    # Group dates by year and find January
+def annual_columns(date_cols):
+    """Map each year to its January column, or its first available month."""
     years = {}
-    for date_col in date_cols:
-        try:
-            date = pd.to_datetime(date_col, format='%Y-%m-%d')
-            year = date.year
-            month = date.month
-            
-            if year not in years or month == 1:  # Prefer January, or first available
-                if year not in years or (years[year][1] != 1 and month == 1):
-                    years[year] = (date_col, month)
-        except:
-            continue
-    
-    # Extract January values for each year
-    for zip_code in df['RegionName'].unique():
-        zip_data = df[df['RegionName'] == zip_code].iloc[0]
-        annual_data[zip_code] = {}
-        
-        for year in sorted(years.keys()):
-            date_col = years[year][0]
-            value = zip_data[date_col]
-            if pd.notna(value) and value > 0:
-                annual_data[zip_code][year] = value
-    
-    return annual_data
-
-print('\n📊 Converting monthly data to annual (using January values)...')
-zhvi_annual = monthly_to_annual(zhvi_df, zhvi_dates, 'home_value')
-zori_annual = monthly_to_annual(zori_df, zori_dates, 'rent_value')
+    for date_col in date_cols:  # sorted, so January comes first
+        years.setdefault(int(date_col[:4]), date_col)
+    return years
+
+
+def read_annual(path, meta_columns=()):
+    """
+    Stream a Zillow CSV in chunks, reading only RegionName, meta_columns and
+    the January column of each year.
+
+    Returns the annual values (ZIP x year, NaN where the value is missing or
+    not positive), the metadata and the number of rows read. Duplicate ZIPs
+    keep their first row.
+    """
+    years = annual_columns(get_date_columns(path))
+    year_cols = list(years.values())
+    dtypes = {'RegionName': 'int64', **{col: 'str' for col in meta_columns}, **{col: 'float64' for col in year_cols}}
+
+    annual_parts, meta_parts, n_rows = [], [], 0
+    with pd.read_csv(path, usecols=list(dtypes), dtype=dtypes, chunksize=CHUNK_ROWS) as reader:
+        for chunk in reader:
+            n_rows += len(chunk)
+            chunk = chunk.drop_duplicates('RegionName').set_index('RegionName')
+            annual_parts.append(chunk[year_cols])
+            meta_parts.append(chunk[list(meta_columns)])
+
+    annual = pd.concat(annual_parts)
+    first = ~annual.index.duplicated()
+    annual = annual[first]
+    annual.columns = list(years.keys())
+    return annual.where(annual > 0), pd.concat(meta_parts)[first], n_rows
+
 
 # Compute annual returns
-def compute_annual_returns(annual_data):
-    """Compute annual returns from year-over-year changes."""
-    returns = {}
-    
-    for zip_code, year_values in annual_data.items():
-        returns[zip_code] = {}
-        sorted_years = sorted(year_values.keys())
-        
-        for i in range(1, len(sorted_years)):
-            year = sorted_years[i]
-            prev_year = sorted_years[i - 1]
-            
-            current_val = year_values[year]
-            prev_val = year_values[prev_year]
-            
-            if pd.notna(current_val) and pd.notna(prev_val) and prev_val > 0:
-                ret = (current_val - prev_val) / prev_val
-                returns[zip_code][year] = ret
-    
-    return returns
-
-print('📈 Computing annual returns...')
-zhvi_returns = compute_annual_returns(zhvi_annual)
-zori_returns = compute_annual_returns(zori_annual)
-
-# Find common ZIPs and years
-all_zips = set(zhvi_returns.keys()) & set(zori_returns.keys())
-print(f'\n   Found {len(all_zips)} ZIPs with both home and rent data')
-
-# Build training dataset
-print('\n🔨 Building training dataset...')
-training_rows = []
-
-for zip_code in all_zips:
-    home_ret = zhvi_returns[zip_code]
-    rent_ret = zori_returns[zip_code]
-    
-    # Find common years where both returns exist
-    common_years = sorted(set(home_ret.keys()) & set(rent_ret.keys()))
-    
-    if len(common_years) < 6:
-        continue  # Need at least 6 years
-    
-    # Use latest 6 years
-    latest_6_years = common_years[-6:]
-    
-    # Features: oldest 5 years
-    feature_years = latest_6_years[:5]
-    # Target: last year (6th year)
-    target_year = latest_6_years[5]
-    
-    # Extract feature returns
-    home_returns_5y = [home_ret[y] for y in feature_years if y in home_ret]
-    rent_returns_5y = [rent_ret[y] for y in feature_years if y in rent_ret]
-    
-    # Check if we have all 5 years
-    if len(home_returns_5y) != 5 or len(rent_returns_5y) != 5:
-        continue
-    
-    # Check target exists
-    if target_year not in home_ret or target_year not in rent_ret:
-        continue
-    
-    # Compute features
-    home_returns_5y = np.array(home_returns_5y)
-    rent_returns_5y = np.array(rent_returns_5y)
-    
-    # Home features
-    home_growth_1y = home_returns_5y[-1]  # Last year in feature set
-    home_growth_3y_avg = np.mean(home_returns_5y[-3:])  # Last 3 years
-    home_growth_5y_avg = np.mean(home_returns_5y)  # All 5 years
-    home_vol_5y = np.std(home_returns_5y)  # Standard deviation
-    
-    # Rent features
-    rent_growth_1y = rent_returns_5y[-1]
-    rent_growth_3y_avg = np.mean(rent_returns_5y[-3:])
-    rent_growth_5y_avg = np.mean(rent_returns_5y)
-    rent_vol_5y = np.std(rent_returns_5y)
-    
-    # Targets
-    y_home_growth_next = home_ret[target_year]
-    y_rent_growth_next = rent_ret[target_year]
-    
-    # Check for NaN
-    if (pd.isna(y_home_growth_next) or pd.isna(y_rent_growth_next) or
-        pd.isna(home_growth_1y) or pd.isna(rent_growth_1y)):
-        continue
-    
-    # Get ZIP metadata
-    zip_row = zhvi_df[zhvi_df['RegionName'] == zip_code].iloc[0]
-    state = zip_row.get('StateName', '')
-    city = zip_row.get('City', '')
-    
-    # Compute price-to-rent ratio (optional)
-    try:
-        latest_home_year = max(zhvi_annual[zip_code].keys())
-        latest_rent_year = max(zori_annual[zip_code].keys())
-        
-        if latest_home_year == latest_rent_year:
-            home_val = zhvi_annual[zip_code][latest_home_year]
-            rent_val = zori_annual[zip_code][latest_rent_year]
-            if pd.notna(home_val) and pd.notna(rent_val) and rent_val > 0:
-                price_to_rent_ratio = home_val / (12 * rent_val)
-            else:
-                price_to_rent_ratio = np.nan
-        else:
-            price_to_rent_ratio = np.nan
-    except:
-        price_to_rent_ratio = np.nan
-    
-    training_rows.append({
-        'zip': zip_code,
-        'state': state,
-        'city': city,
-        'home_growth_1y': home_growth_1y,
-        'home_growth_3y_avg': home_growth_3y_avg,
-        'home_growth_5y_avg': home_growth_5y_avg,
-        'home_vol_5y': home_vol_5y,
-        'rent_growth_1y': rent_growth_1y,
-        'rent_growth_3y_avg': rent_growth_3y_avg,
-        'rent_growth_5y_avg': rent_growth_5y_avg,
-        'rent_vol_5y': rent_vol_5y,
+def compute_annual_returns(annual):
+    """
+    Compute annual returns from year-over-year changes.
+
+    A year's return is measured against the previous year that has a value,
+    so gaps are skipped. Spelled out instead of pct_change, which rounds
+    differently from (current - prev) / prev.
+    """
+    prev = annual.ffill(axis=1).shift(1, axis=1)
+    return (annual - prev) / prev
+
+
+def latest_values(annual, zips):
+    """Latest year with a value, and that value, for each ZIP."""
+    values = annual.loc[zips].to_numpy()
+    valid = ~np.isnan(values)
+    last = values.shape[1] - 1 - valid[:, ::-1].argmax(axis=1)
+    return annual.columns.to_numpy()[last], values[np.arange(len(zips)), last]
+
+
+def training_zips(zhvi_annual, zori_annual):
+    """ZIPs with both home and rent data, in the order dataset rows are written."""
+    return list(set(zhvi_annual.index) & set(zori_annual.index))
+
+
+def build_features(zhvi_annual, zori_annual, zhvi_meta, zips):
+    """
+    Training rows for zips, in that order. A row depends only on its own
+    ZIP's annual values and metadata; ZIPs without 6 usable years are skipped.
+    """
+    zhvi_returns = compute_annual_returns(zhvi_annual.loc[zips])
+    zori_returns = compute_annual_returns(zori_annual.loc[zips])
+    common_years = sorted(set(zhvi_returns.columns) & set(zori_returns.columns))
+    home_ret = zhvi_returns[common_years].to_numpy()
+    rent_ret = zori_returns[common_years].to_numpy()
+
+    # Use the latest 6 years where both returns exist: features from the oldest 5,
+    # target from the 6th
+    both = ~np.isnan(home_ret) & ~np.isnan(rent_ret)
+    eligible = both.sum(axis=1) >= 6
+    years_from_end = both[:, ::-1].cumsum(axis=1)[:, ::-1]
+    window = (both & (years_from_end <= 6))[eligible]
+    home_window = home_ret[eligible][window].reshape(-1, 6)
+    rent_window = rent_ret[eligible][window].reshape(-1, 6)
+    home_returns_5y, y_home_growth_next = home_window[:, :5], home_window[:, 5]
+    rent_returns_5y, y_rent_growth_next = rent_window[:, :5], rent_window[:, 5]
+
+    # ZIP metadata
+    zip_codes = [zip_code for zip_code, keep in zip(zips, eligible) if keep]
+    zip_meta = zhvi_meta.loc[zip_codes]
+
+    # Price-to-rent ratio from the latest values, when home and rent share that year
+    home_year, home_val = latest_values(zhvi_annual, zip_codes)
+    rent_year, rent_val = latest_values(zori_annual, zip_codes)
+    price_to_rent_ratio = np.where(home_year == rent_year, home_val / (12 * rent_val), np.nan)
+
+    return pd.DataFrame({
+        'zip': np.array(zip_codes, dtype=np.int64),
+        'state': zip_meta['StateName'].to_numpy(),
+        'city': zip_meta['City'].to_numpy(),
+        'home_growth_1y': home_returns_5y[:, -1],  # Last year in feature set
+        'home_growth_3y_avg': np.mean(home_returns_5y[:, -3:], axis=1),  # Last 3 years
+        'home_growth_5y_avg': np.mean(home_returns_5y, axis=1),  # All 5 years
+        'home_vol_5y': np.std(home_returns_5y, axis=1),  # Standard deviation
+        'rent_growth_1y': rent_returns_5y[:, -1],
+        'rent_growth_3y_avg': np.mean(rent_returns_5y[:, -3:], axis=1),
+        'rent_growth_5y_avg': np.mean(rent_returns_5y, axis=1),
+        'rent_vol_5y': np.std(rent_returns_5y, axis=1),
         'price_to_rent_ratio': price_to_rent_ratio,
         'y_home_growth_next': y_home_growth_next,
         'y_rent_growth_next': y_rent_growth_next,
     })
 
-# Create dataframe and save
-training_df = pd.DataFrame(training_rows)
 
-print(f'\n✅ Created training dataset with {len(training_df)} rows')
-print(f'\n📊 Dataset summary:')
-print(f'   Columns: {list(training_df.columns)}')
-print(f'   Rows: {len(training_df)}')
-print(f'   Missing values: {training_df.isna().sum().sum()}')
+def window_features(home_returns_5y, rent_returns_5y, price_to_rent_ratio):
+    """Feature matrix (FEATURE_COLUMNS order) from 5 years of returns per row."""
+    return np.column_stack([
+        home_returns_5y[:, -1],
+        np.mean(home_returns_5y[:, -3:], axis=1),
+        np.mean(home_returns_5y, axis=1),
+        np.std(home_returns_5y, axis=1),
+        rent_returns_5y[:, -1],
+        np.mean(rent_returns_5y[:, -3:], axis=1),
+        np.mean(rent_returns_5y, axis=1),
+        np.std(rent_returns_5y, axis=1),
+        price_to_rent_ratio,
+    ])
+
+
+def _block_windows(zhvi_annual, zori_annual, zips):
+    zhvi_returns = compute_annual_returns(zhvi_annual.loc[zips])
+    zori_returns = compute_annual_returns(zori_annual.loc[zips])
+    years = sorted(set(zhvi_returns.columns) & set(zori_returns.columns))
+    home_ret = zhvi_returns[years].to_numpy()
+    rent_ret = zori_returns[years].to_numpy()
+    both = ~np.isnan(home_ret) & ~np.isnan(rent_ret)
+
+    # Move each ZIP's usable years to the front, in order, so that any 6
+    # consecutive usable years (gaps skipped, as in build_features) are adjacent
+    order = np.argsort(~both, axis=1, kind='stable')
+    n_usable = both.sum(axis=1)
+    n_starts = max(len(years) - 5, 0)
+    rows, starts = np.nonzero(np.arange(n_starts)[None, :] + 6 <= n_usable[:, None])
+
+    positions = order[rows[:, None], starts[:, None] + np.arange(6)]
+    home_window = home_ret[rows[:, None], positions]
+    rent_window = rent_ret[rows[:, None], positions]
+
+    # Price-to-rent ratio as of the last feature year
+    last_feature_year = [years[i] for i in positions[:, 4]]
+    home_val = zhvi_annual.loc[zips, years].to_numpy()[rows, positions[:, 4]]
+    rent_val = zori_annual.loc[zips, years].to_numpy()[rows, positions[:, 4]]
+
+    return {
+        'X': window_features(home_window[:, :5], rent_window[:, :5], home_val / (12 * rent_val)).astype(np.float32),
+        'y_home': home_window[:, 5].astype(np.float32),
+        'y_rent': rent_window[:, 5].astype(np.float32),
+        'zip': np.asarray(zips, dtype=np.int32)[rows],
+        'year': np.asarray(years, dtype=np.int16)[positions[:, 5]],
+    }
+
+
+def build_windows(zhvi_annual, zori_annual, zips):
+    """
+    Rolling-window training samples: one per (ZIP, target year) that has 5
+    earlier years with both returns. Features are computed as in
+    build_features, except that the price-to-rent ratio is taken as of the
+    last feature year.
+
+    Returns float32 features/targets with int32 ZIPs and int16 target years,
+    ordered by target year so a time-based holdout is a contiguous tail.
+    """
+    zips = sorted(zips)
+    blocks = [_block_windows(zhvi_annual, zori_annual, zips[start:start + WINDOW_BLOCK_ZIPS])
+              for start in range(0, len(zips), WINDOW_BLOCK_ZIPS)]
+    windows = {name: np.concatenate([block[name] for block in blocks]) for name in blocks[0]}
+    order = np.argsort(windows['year'], kind='stable')
+    return {name: array[order] for name, array in windows.items()}
+
+
+def save_windows(windows, path=WINDOWS_DIR):
+    """Write each array as .npy so training can memory-map them."""
+    path.mkdir(parents=True, exist_ok=True)
+    for name, array in windows.items():
+        np.save(path / f'{name}.npy', np.ascontiguousarray(array))
+    with open(path / 'columns.json', 'w') as f:
+        json.dump(FEATURE_COLUMNS, f)
+
+
+def main():
+    print('🚀 Starting ZIP growth training dataset build...\n')
+
+    print('📂 Reading ZHVI (home prices) file, January values only...')
+    zhvi_annual, zhvi_meta, n_rows = read_annual(ZHVI_PATH, meta_columns=ZHVI_META_COLUMNS)
+    print(f'   Loaded {n_rows} rows, {zhvi_annual.shape[1]} years')
+
+    print('📂 Reading ZORI (rents) file, January values only...')
+    zori_annual, _, n_rows = read_annual(ZORI_PATH)
+    print(f'   Loaded {n_rows} rows, {zori_annual.shape[1]} years\n')
+
+    zips = training_zips(zhvi_annual, zori_annual)
+    print(f'   Found {len(zips)} ZIPs with both home and rent data')
+
+    print('\n🔨 Building training dataset...')
+    training_df = build_features(zhvi_annual, zori_annual, zhvi_meta, zips)
+
+    # Summary and save
+    print(f'\n✅ Created training dataset with {len(training_df)} rows')
+    print(f'\n📊 Dataset summary:')
+    print(f'   Columns: {list(training_df.columns)}')
+    print(f'   Rows: {len(training_df)}')
+    print(f'   Missing values: {training_df.isna().sum().sum()}')
+
+    # Save to CSV
+    print(f'\n💾 Saving to {OUTPUT_PATH}...')
+    training_df.to_csv(OUTPUT_PATH, index=False)
+
+    print('\n🪟 Building rolling-window samples...')
+    windows = build_windows(zhvi_annual, zori_annual, zips)
+    save_windows(windows)
+    print(f'   {len(windows["X"])} samples ({len(windows["X"]) / max(len(training_df), 1):.1f} per ZIP), '
+          f'target years {windows["year"].min()}-{windows["year"].max()}')
 
-# Save to CSV
-print(f'\n💾 Saving to {OUTPUT_PATH}...')
-training_df.to_csv(OUTPUT_PATH, index=False)
+    print(f'\n✅ SUCCESS! Dataset saved to {OUTPUT_PATH} and {WINDOWS_DIR}')
+    print(f'   Total rows: {len(training_df)}')
 
-print(f'\n✅ SUCCESS! Dataset saved to {OUTPUT_PATH}')
-print(f'   Total rows: {len(training_df)}')
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+"""
+Incremental rebuild of the ZIP growth dataset, embeddings and models.
+
+Zillow appends one month per release, which usually leaves the January
+values (the only ones the dataset uses) unchanged. This script reruns
+only what a release actually affects:
+
+1. Annualize: each CSV's January values are cached in pipeline_cache/ as
+   npz and skipped while the CSV's hash is unchanged. Otherwise the new
+   series are diffed against the cache to find the changed ZIPs and years.
+2. Dataset: training rows are recomputed only for changed ZIPs; the others
+   come from the cached rows. The CSV is rewritten only if its content
+   changes, so a no-op release does not trigger a serving reload. The
+   rolling-window samples are rebuilt (vectorized) only if a ZIP changed.
+3. Embeddings (ml_build_zip_embeddings.py),
+4. Models (ml_train_growth_model.py) and
+5. Bundle (ml_build_artifact_bundle.py) rerun only when the dataset hash
+   or an earlier stage's outputs change, since imputation medians, the
+   state encoding and the models depend on every row.
+
+pipeline_cache/manifest.json records each stage's input and output content
+hashes; a stage also reruns when one of its outputs is missing or was
+changed since it last ran. Pass --force to rebuild everything.
+
+The result is byte-identical to running the four scripts in order.
+"""
+
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import ml_build_zip_growth_dataset as dataset
+
+SCRIPTS_DIR = Path(__file__).parent
+DATA_DIR = dataset.DATA_DIR
+CACHE_DIR = DATA_DIR / 'pipeline_cache'
+MANIFEST_PATH = CACHE_DIR / 'manifest.json'
+FEATURES_CACHE_PATH = CACHE_DIR / 'features.npz'
+MODEL_DIR = SCRIPTS_DIR.parent / 'backend' / 'app' / 'ml' / 'models'
+
+SOURCES = {
+    'zhvi': (dataset.ZHVI_PATH, dataset.ZHVI_META_COLUMNS),
+    'zori': (dataset.ZORI_PATH, []),
+}
+
+WINDOW_ARRAYS = ['X', 'y_home', 'y_rent', 'zip', 'year']
+
+# Downstream stages: script and the files it writes
+STAGES = {
+    'embeddings': ('ml_build_zip_embeddings.py', [
+        DATA_DIR / 'zip_feature_matrix.npy',
+        DATA_DIR / 'zip_feature_meta.json',
+        DATA_DIR / 'state_encoding.json',
+    ]),
+    'models': ('ml_train_growth_model.py', [
+        MODEL_DIR / 'zip_home_growth_model.joblib',
+        MODEL_DIR / 'zip_rent_growth_model.joblib',
+        MODEL_DIR / 'zip_growth_trees.npz',
+        DATA_DIR / 'zip_growth_features.npy',
+        DATA_DIR / 'zip_growth_features_meta.json',
+    ]),
+    'bundle': ('ml_build_artifact_bundle.py', [
+        MODEL_DIR / 'zip_growth_bundle.bin',
+    ]),
+}
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def arrays_hash(arrays):
+    """Hash of named arrays' contents (npz files embed timestamps, so their bytes vary)."""
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(f'{name}:{array.dtype.str}:{array.shape};'.encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def outputs_hash(paths):
+    """Content hashes of a stage's outputs, or None if one is missing."""
+    if not all(path.exists() for path in paths):
+        return None
+    return {path.name: file_hash(path) for path in paths}
+
+
+def load_manifest():
+    if MANIFEST_PATH.exists():
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(manifest):
+    tmp_path = MANIFEST_PATH.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp_path.replace(MANIFEST_PATH)
+
+
+# ----------------------------------------------------------------------------
+# Annualized series cache
+# ----------------------------------------------------------------------------
+
+def annual_arrays(annual, meta):
+    # Metadata as plain strings; missing values become '' (written the same way to CSV)
+    arrays = {
+        'zips': annual.index.to_numpy(dtype=np.int64),
+        'years': annual.columns.to_numpy(dtype=np.int64),
+        'values': annual.to_numpy(dtype=np.float64),
+    }
+    for col in meta.columns:
+        arrays[f'meta_{col}'] = meta[col].fillna('').to_numpy(dtype=str)
+    return arrays
+
+
+def frames_from_arrays(arrays):
+    index = pd.Index(arrays['zips'], name='RegionName')
+    annual = pd.DataFrame(arrays['values'], index=index, columns=arrays['years'].tolist())
+    meta = pd.DataFrame({key[len('meta_'):]: arrays[key] for key in arrays if key.startswith('meta_')}, index=index)
+    return annual, meta
+
+
+def load_arrays(path):
+    with np.load(path) as npz:
+        return {name: npz[name] for name in npz.files}
+
+
+def diff_annual(old_arrays, new_arrays):
+    """ZIPs whose annual values or metadata changed (new ZIPs included), and the years that changed."""
+    old_annual, old_meta = frames_from_arrays(old_arrays)
+    new_annual, new_meta = frames_from_arrays(new_arrays)
+    years = old_annual.columns.union(new_annual.columns)
+    old_values = old_annual.reindex(index=new_annual.index, columns=years).to_numpy()
+    new_values = new_annual.reindex(columns=years).to_numpy()
+    differs = ~((old_values == new_values) | (np.isnan(old_values) & np.isnan(new_values)))
+
+    changed = differs.any(axis=1) | ~new_annual.index.isin(old_annual.index)
+    if len(new_meta.columns):
+        aligned_meta = old_meta.reindex(index=new_annual.index, columns=new_meta.columns)
+        changed |= (aligned_meta != new_meta).any(axis=1).to_numpy()
+    return set(new_annual.index[changed]), sorted(years[differs.any(axis=0)])
+
+
+def annualize(name, manifest, force):
+    """Annual series and metadata for one source, plus the ZIPs that changed (None = all)."""
+    path, meta_columns = SOURCES[name]
+    cache_path = CACHE_DIR / f'{name}_annual.npz'
+    entry = manifest.get(name, {})
+    csv_hash = file_hash(path)
+
+    cached = load_arrays(cache_path) if cache_path.exists() else None
+    if cached is not None and arrays_hash(cached) != entry.get('output'):
+        cached = None  # cache written by an interrupted or different run
+    if cached is not None and not force and entry.get('input') == csv_hash:
+        print(f'   {name}: unchanged, using cached annual series')
+        return frames_from_arrays(cached), set()
+
+    annual, meta, n_rows = dataset.read_annual(path, meta_columns=meta_columns)
+    arrays = annual_arrays(annual, meta)
+    if cached is None or force:
+        changed = None
+        print(f'   {name}: annualized {n_rows} rows, {annual.shape[1]} years')
+    else:
+        changed, years = diff_annual(cached, arrays)
+        print(f'   {name}: {len(changed)} ZIPs changed, years {years or "none"}')
+
+    np.savez(cache_path, **arrays)
+    manifest[name] = {'input': csv_hash, 'output': arrays_hash(arrays)}
+    return frames_from_arrays(arrays), changed
+
+
+# ----------------------------------------------------------------------------
+# Stages
+# ----------------------------------------------------------------------------
+
+def build_dataset(manifest, force):
+    """Annualize both sources and refresh the training CSV and windows; returns their content hash."""
+    print('\n📊 Annualizing Zillow series...')
+    (zhvi_annual, zhvi_meta), zhvi_changed = annualize('zhvi', manifest, force)
+    (zori_annual, _), zori_changed = annualize('zori', manifest, force)
+    zips = dataset.training_zips(zhvi_annual, zori_annual)
+
+    cached, changed = None, None
+    if not force and FEATURES_CACHE_PATH.exists() and zhvi_changed is not None and zori_changed is not None:
+        arrays = load_arrays(FEATURES_CACHE_PATH)
+        if arrays_hash(arrays) == manifest.get('features'):
+            cached = pd.DataFrame(arrays).set_index('zip', drop=False)
+
+    print('\n🔨 Building training rows...')
+    if cached is None:
+        rows = dataset.build_features(zhvi_annual, zori_annual, zhvi_meta, zips)
+        print(f'   Computed {len(rows)} rows')
+    else:
+        changed = zhvi_changed | zori_changed
+        fresh = dataset.build_features(zhvi_annual, zori_annual, zhvi_meta, [z for z in zips if z in changed])
+        kept = cached[~cached.index.isin(changed)]
+        rows = pd.concat([kept, fresh.set_index('zip', drop=False)])
+        rows = rows.reindex([z for z in zips if z in rows.index]).reset_index(drop=True)
+        print(f'   Recomputed {len(fresh)} rows for {len(changed)} changed ZIPs, reused {len(rows) - len(fresh)}')
+
+    features = {col: rows[col].fillna('').to_numpy(dtype=str) if col in ('state', 'city') else rows[col].to_numpy()
+                for col in rows.columns}
+    np.savez(FEATURES_CACHE_PATH, **features)
+    manifest['features'] = arrays_hash(features)
+
+    content = rows.to_csv(index=False).encode()
+    content_hash = hashlib.sha256(content).hexdigest()
+    output_path = dataset.OUTPUT_PATH
+    if output_path.exists() and file_hash(output_path) == content_hash:
+        print(f'   {output_path.name} unchanged')
+    else:
+        output_path.write_bytes(content)
+        print(f'   💾 Wrote {len(rows)} rows to {output_path}')
+
+    windows_hash = refresh_windows(zhvi_annual, zori_annual, zips, changed, manifest)
+    return hashlib.sha256(f'{content_hash}:{windows_hash}'.encode()).hexdigest()
+
+
+def refresh_windows(zhvi_annual, zori_annual, zips, changed, manifest):
+    """Rebuild the rolling-window samples unless no ZIP changed; returns their content hash."""
+    paths = {name: dataset.WINDOWS_DIR / f'{name}.npy' for name in WINDOW_ARRAYS}
+    on_disk = None
+    if all(path.exists() for path in paths.values()):
+        on_disk = {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+    if changed == set() and on_disk is not None and arrays_hash(on_disk) == manifest.get('windows'):
+        print(f'   {dataset.WINDOWS_DIR.name} unchanged')
+        return manifest['windows']
+
+    # Windows are rebuilt whole: sorted by target year, a changed ZIP moves rows everywhere
+    windows = dataset.build_windows(zhvi_annual, zori_annual, zips)
+    windows_hash = arrays_hash(windows)
+    if on_disk is not None and arrays_hash(on_disk) == windows_hash:
+        print(f'   {dataset.WINDOWS_DIR.name} unchanged')
+    else:
+        dataset.save_windows(windows)
+        print(f'   💾 Wrote {len(windows["X"])} rolling-window samples to {dataset.WINDOWS_DIR}')
+    manifest['windows'] = windows_hash
+    return windows_hash
+
+
+def run_stage(name, input_hash, manifest, force):
+    """Run a stage unless its input and outputs are unchanged; returns the input hash for the next stage."""
+    script, outputs = STAGES[name]
+    entry = manifest.get(name, {})
+    if not force and entry.get('input') == input_hash and entry.get('outputs') == outputs_hash(outputs):
+        print(f'\n⏭️  {name}: inputs unchanged, skipping')
+    else:
+        print(f'\n▶️  {name}: running {script}')
+        subprocess.run([sys.executable, str(SCRIPTS_DIR / script)], check=True)
+        manifest[name] = {'input': input_hash, 'outputs': outputs_hash(outputs)}
+    outputs_json = json.dumps(manifest[name]['outputs'], sort_keys=True)
+    return hashlib.sha256(f'{input_hash}:{outputs_json}'.encode()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--force', action='store_true', help='ignore the cache and rebuild every stage')
+    args = parser.parse_args()
+
+    print('🚀 Incremental ML pipeline')
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest()
+
+    # A stage that fails keeps its old manifest entry, so the next run retries it
+    dataset_hash = build_dataset(manifest, args.force)
+    save_manifest(manifest)
+
+    # Each stage's input is the dataset plus every earlier stage's outputs
+    input_hash = dataset_hash
+    for name in STAGES:
+        input_hash = run_stage(name, input_hash, manifest, args.force)
+        save_manifest(manifest)
+
+    print('\n✅ Pipeline complete')
+
+
+if __name__ == '__main__':
+    main()
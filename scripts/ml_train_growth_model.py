@@ -1,25 +1,186 @@
 """
 Script to train ML models for ZIP code home and rent growth prediction.
 
-Trains GradientBoostingRegressor models and compares against baseline models.
+Trains gradient-boosted models (GradientBoostingRegressor, or
+HistGradientBoostingRegressor with --model hist) and compares against
+baseline models. Both models are also exported as arrays for the NumPy
+predictor in backend/app/ml/tree_predictor.py, and prediction latency is
+reported next to the accuracy metrics.
+Trains on the rolling-window samples when the dataset build wrote them,
+otherwise on one row per ZIP from the training CSV.
+
+With --search, a k-fold cross-validated grid search over the GBM settings
+(with early stopping) picks the parameters for each target first; the fits
+run in parallel across processes. Every run is appended to
+training_runs.jsonl next to the models, with its parameters, metrics and timings.
 """
 
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.model_selection import GroupKFold, KFold, train_test_split
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import joblib
+from joblib import Parallel, delayed
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+from app.ml.tree_predictor import TreeEnsemble  # noqa: E402
 
 # File paths
 DATA_DIR = Path(__file__).parent.parent / 'src' / 'data'
 TRAINING_DATA_PATH = DATA_DIR / 'zip_growth_training.csv'
+FEATURE_TABLE_PATH = DATA_DIR / 'zip_growth_features.npy'
+FEATURE_TABLE_META_PATH = DATA_DIR / 'zip_growth_features_meta.json'
+# Rolling-window samples written by ml_build_zip_growth_dataset.py
+WINDOWS_DIR = DATA_DIR / 'zip_growth_windows'
 MODEL_DIR = Path(__file__).parent.parent / 'backend' / 'app' / 'ml' / 'models'
 HOME_MODEL_PATH = MODEL_DIR / 'zip_home_growth_model.joblib'
 RENT_MODEL_PATH = MODEL_DIR / 'zip_rent_growth_model.joblib'
+TREES_PATH = MODEL_DIR / 'zip_growth_trees.npz'
+RUN_LOG_PATH = MODEL_DIR / 'training_runs.jsonl'
+
+# Parameters without --search (n_trees is n_estimators / max_iter)
+DEFAULT_PARAMS = {'n_trees': 100, 'learning_rate': 0.1, 'max_depth': 5}
+# Grid for --search; the number of trees comes from early stopping
+SEARCH_SPACE = {
+    'gbm': {'learning_rate': [0.05, 0.1], 'max_depth': [3, 5], 'subsample': [0.8, 1.0]},
+    'hist': {'learning_rate': [0.05, 0.1], 'max_depth': [3, 5], 'l2_regularization': [0.0, 1.0]},
+}
+# Early stopping during the search: up to MAX_TREES trees, stop after
+# N_ITER_NO_CHANGE rounds without improvement on a 10% validation split.
+# Growth-rate losses are ~1e-3, so GBM's default tol (1e-4) would stop at
+# once; both families use the histogram model's default instead.
+MAX_TREES = 500
+N_ITER_NO_CHANGE = 10
+EARLY_STOPPING_TOL = 1e-7
+
+parser = argparse.ArgumentParser(description='Train the ZIP home and rent growth models.')
+parser.add_argument('--model', choices=['gbm', 'hist'], default='gbm',
+                    help='gbm: GradientBoostingRegressor (default); hist: HistGradientBoostingRegressor')
+parser.add_argument('--search', action='store_true',
+                    help='pick parameters per target by k-fold cross-validated grid search first')
+parser.add_argument('--folds', type=int, default=5, help='cross-validation folds for --search (default 5)')
+parser.add_argument('--n-jobs', type=int, default=-1, help='worker processes for fitting (default -1: all cores)')
+args = parser.parse_args()
+
+
+def make_model(params=None, early_stopping=False):
+    """A fresh regressor of the selected family; params override DEFAULT_PARAMS."""
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    n_trees = MAX_TREES if early_stopping else params['n_trees']
+    del params['n_trees']
+    if args.model == 'hist':
+        return HistGradientBoostingRegressor(
+            max_iter=n_trees,
+            early_stopping=early_stopping,
+            n_iter_no_change=N_ITER_NO_CHANGE,
+            validation_fraction=0.1,
+            tol=EARLY_STOPPING_TOL,
+            random_state=42,
+            **params,
+        )
+    return GradientBoostingRegressor(
+        n_estimators=n_trees,
+        n_iter_no_change=N_ITER_NO_CHANGE if early_stopping else None,
+        validation_fraction=0.1,
+        tol=EARLY_STOPPING_TOL,
+        random_state=42,
+        verbose=0,
+        **params,
+    )
+
+
+def trees_used(model):
+    return int(getattr(model, 'n_estimators_', None) or model.n_iter_)
+
+
+def fit_model(params, X, y):
+    return make_model(params).fit(X, y)
+
+
+def cv_fit(target, params, fold, X, y, train_idx, val_idx):
+    """Fit one (target, candidate, fold) with early stopping and score it on the held-out fold."""
+    start = time.perf_counter()
+    model = make_model(params, early_stopping=True).fit(X[train_idx], y[train_idx])
+    pred = model.predict(X[val_idx])
+    return {
+        'target': target,
+        'params': params,
+        'fold': fold,
+        'mae': float(mean_absolute_error(y[val_idx], pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y[val_idx], pred))),
+        'n_trees': trees_used(model),
+        'fit_seconds': time.perf_counter() - start,
+    }
+
+
+def grid_search(X, targets, groups=None):
+    """
+    Cross-validate every candidate for every target, all fits in parallel.
+
+    Folds are grouped by ZIP when groups is given, so overlapping windows of
+    one ZIP never sit on both sides of a split. Returns the best parameters
+    per target (with n_trees from early stopping) and per-candidate results.
+    """
+    space = SEARCH_SPACE[args.model]
+    candidates = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    if groups is not None:
+        folds = list(GroupKFold(n_splits=args.folds).split(X, groups=groups))
+    else:
+        folds = list(KFold(n_splits=args.folds, shuffle=True, random_state=42).split(X))
+
+    tasks = [
+        delayed(cv_fit)(target, params, fold, X, y, train_idx, val_idx)
+        for target, y in targets.items()
+        for params in candidates
+        for fold, (train_idx, val_idx) in enumerate(folds)
+    ]
+    print(f'   {len(candidates)} candidates x {len(folds)} folds x {len(targets)} targets = {len(tasks)} fits')
+    fits = Parallel(n_jobs=args.n_jobs, backend='loky')(tasks)
+
+    results, best = [], {}
+    for target in targets:
+        for params in candidates:
+            scores = [f for f in fits if f['target'] == target and f['params'] == params]
+            results.append({
+                'target': target,
+                'params': params,
+                'mae': float(np.mean([f['mae'] for f in scores])),
+                'mae_std': float(np.std([f['mae'] for f in scores])),
+                'rmse': float(np.mean([f['rmse'] for f in scores])),
+                'n_trees': int(round(np.mean([f['n_trees'] for f in scores]))),
+                'fit_seconds': float(sum(f['fit_seconds'] for f in scores)),
+            })
+        winner = min((r for r in results if r['target'] == target), key=lambda r: r['mae'])
+        best[target] = {**winner['params'], 'n_trees': winner['n_trees']}
+    return best, results
+
+
+def predict_latency_us(predict, X, repeats=200):
+    """Median single-row latency and per-row latency of one batch call, in microseconds."""
+    row = np.ascontiguousarray(X[:1])
+    predict(row)  # warm up
+    single = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(row)
+        single.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    predict(X)
+    batch = time.perf_counter() - start
+    return np.median(single) * 1e6, batch / len(X) * 1e6
+
 
 print('🚀 Starting ML model training...\n')
+run_start = time.perf_counter()
 
 # Load training data
 print('📂 Loading training data...')
@@ -39,25 +200,89 @@ print('🔧 Handling missing values...')
 for col in X.columns:
     if X[col].isna().any():
         median_val = X[col].median()
-        X[col].fillna(median_val, inplace=True)
-        print(f'   Filled {X[col].isna().sum()} missing values in {col} with median: {median_val:.4f}')
-
-# Remove rows where targets are missing
-valid_mask = y_home.notna() & y_rent.notna()
-X = X[valid_mask].copy()
-y_home = y_home[valid_mask].copy()
-y_rent = y_rent[valid_mask].copy()
-
-print(f'   Using {len(X)} rows with valid targets\n')
-
-# Split into train and test sets (80/20)
-print('📊 Splitting data into train/test sets (80/20)...')
-X_train, X_test, y_home_train, y_home_test, y_rent_train, y_rent_test = train_test_split(
-    X, y_home, y_rent, test_size=0.2, random_state=42
-)
+        missing_count = X[col].isna().sum()
+        X[col] = X[col].fillna(median_val)
+        print(f'   Filled {missing_count} missing values in {col} with median: {median_val:.4f}')
+
+# Export the imputed feature table for serving. A raw .npy can be memory-mapped
+# read-only, so every API worker shares the same pages via the OS page cache.
+print(f'\n💾 Exporting feature table to {FEATURE_TABLE_PATH}...')
+np.save(FEATURE_TABLE_PATH, np.ascontiguousarray(X.to_numpy(dtype=np.float32)))
+with open(FEATURE_TABLE_META_PATH, 'w') as f:
+    json.dump({'columns': feature_cols, 'zips': df['zip'].tolist()}, f)
+print(f'   {X.shape[0]} rows x {X.shape[1]} features')
+
+if (WINDOWS_DIR / 'X.npy').exists():
+    # Train on every (ZIP, year) window, memory-mapped: float32 C-contiguous
+    # slices go to the trees without a copy
+    print(f'\n📂 Memory-mapping rolling-window samples from {WINDOWS_DIR}...')
+    with open(WINDOWS_DIR / 'columns.json') as f:
+        if json.load(f) != feature_cols:
+            raise ValueError(f'{WINDOWS_DIR} columns do not match {feature_cols}; rebuild the dataset')
+    X_all = np.load(WINDOWS_DIR / 'X.npy', mmap_mode='r')
+    y_home_all = np.load(WINDOWS_DIR / 'y_home.npy', mmap_mode='r')
+    y_rent_all = np.load(WINDOWS_DIR / 'y_rent.npy', mmap_mode='r')
+    target_years = np.load(WINDOWS_DIR / 'year.npy', mmap_mode='r')
+    print(f'   {len(X_all)} samples, target years {target_years[0]}-{target_years[-1]}\n')
+
+    # Samples are ordered by target year: hold out the latest year, so the
+    # test set is the most recent growth, predicted from earlier windows only
+    test_year = target_years[-1]
+    n_train = int(np.searchsorted(target_years, test_year))
+    if n_train == 0:
+        raise ValueError(f'All samples target {test_year}; need at least two target years')
+    print(f'📊 Splitting data by target year (test = {test_year})...')
+    X_train, X_test = X_all[:n_train], X_all[n_train:]
+    cv_groups = np.load(WINDOWS_DIR / 'zip.npy', mmap_mode='r')[:n_train]
+    y_home_train, y_home_test = y_home_all[:n_train], y_home_all[n_train:]
+    y_rent_train, y_rent_test = y_rent_all[:n_train], y_rent_all[n_train:]
+else:
+    # Remove rows where targets are missing
+    valid_mask = y_home.notna() & y_rent.notna()
+    X = X[valid_mask].copy()
+    y_home = y_home[valid_mask].copy()
+    y_rent = y_rent[valid_mask].copy()
+
+    print(f'   Using {len(X)} rows with valid targets\n')
+
+    # Split into train and test sets (80/20)
+    print('📊 Splitting data into train/test sets (80/20)...')
+    X_train, X_test, y_home_train, y_home_test, y_rent_train, y_rent_test = train_test_split(
+        X.to_numpy(), y_home.to_numpy(), y_rent.to_numpy(), test_size=0.2, random_state=42
+    )
+    cv_groups = None  # one row per ZIP
 print(f'   Train set: {len(X_train)} rows')
 print(f'   Test set: {len(X_test)} rows\n')
 
+targets = {'home': y_home_train, 'rent': y_rent_train}
+search_results = []
+search_seconds = 0.0
+if args.search:
+    print('=' * 70)
+    print(f'🔍 HYPERPARAMETER SEARCH ({args.folds}-fold CV, {args.model}, n_jobs={args.n_jobs})')
+    print('=' * 70)
+    search_start = time.perf_counter()
+    best_params, search_results = grid_search(X_train, targets, cv_groups)
+    search_seconds = time.perf_counter() - search_start
+    for target in targets:
+        print(f'\n   {target}: {"params":<60}{"CV MAE":>12}{"trees":>8}')
+        for result in sorted((r for r in search_results if r['target'] == target), key=lambda r: r['mae']):
+            print(f'   {"":<{len(target) + 2}}{json.dumps(result["params"]):<60}'
+                  f'{result["mae"]:>12.6f}{result["n_trees"]:>8}')
+        print(f'   ✅ Best for {target}: {best_params[target]}')
+    print(f'\n   Search took {search_seconds:.1f}s\n')
+else:
+    best_params = {target: dict(DEFAULT_PARAMS) for target in targets}
+
+# Fit the final home and rent models side by side
+print(f'🤖 Fitting final models for both targets (n_jobs={args.n_jobs})...')
+fit_start = time.perf_counter()
+home_model, rent_model = Parallel(n_jobs=args.n_jobs, backend='loky')(
+    delayed(fit_model)(best_params[target], X_train, y) for target, y in targets.items()
+)
+fit_seconds = time.perf_counter() - fit_start
+print(f'   Done in {fit_seconds:.1f}s\n')
+
 # ============================================================================
 # HOME GROWTH MODEL
 # ============================================================================
@@ -67,24 +292,15 @@ print('=' * 70)
 
 # Baseline: always predict home_growth_5y_avg
 print('\n📊 Baseline Model (always predicts home_growth_5y_avg):')
-baseline_home_pred = X_test['home_growth_5y_avg'].values
+baseline_home_pred = X_test[:, feature_cols.index('home_growth_5y_avg')]
 baseline_home_mae = mean_absolute_error(y_home_test, baseline_home_pred)
 baseline_home_rmse = np.sqrt(mean_squared_error(y_home_test, baseline_home_pred))
 
 print(f'   MAE:  {baseline_home_mae:.6f}')
 print(f'   RMSE: {baseline_home_rmse:.6f}')
 
-# ML Model: GradientBoostingRegressor
-print('\n🤖 Training GradientBoostingRegressor...')
-home_model = GradientBoostingRegressor(
-    n_estimators=100,
-    learning_rate=0.1,
-    max_depth=5,
-    random_state=42,
-    verbose=0
-)
-
-home_model.fit(X_train, y_home_train)
+# ML Model
+print(f'\n🤖 {type(home_model).__name__} ({trees_used(home_model)} trees):')
 
 # Predictions
 home_pred = home_model.predict(X_test)
@@ -116,24 +332,15 @@ print('=' * 70)
 
 # Baseline: always predict rent_growth_5y_avg
 print('\n📊 Baseline Model (always predicts rent_growth_5y_avg):')
-baseline_rent_pred = X_test['rent_growth_5y_avg'].values
+baseline_rent_pred = X_test[:, feature_cols.index('rent_growth_5y_avg')]
 baseline_rent_mae = mean_absolute_error(y_rent_test, baseline_rent_pred)
 baseline_rent_rmse = np.sqrt(mean_squared_error(y_rent_test, baseline_rent_pred))
 
 print(f'   MAE:  {baseline_rent_mae:.6f}')
 print(f'   RMSE: {baseline_rent_rmse:.6f}')
 
-# ML Model: GradientBoostingRegressor
-print('\n🤖 Training GradientBoostingRegressor...')
-rent_model = GradientBoostingRegressor(
-    n_estimators=100,
-    learning_rate=0.1,
-    max_depth=5,
-    random_state=42,
-    verbose=0
-)
-
-rent_model.fit(X_train, y_rent_train)
+# ML Model
+print(f'\n🤖 {type(rent_model).__name__} ({trees_used(rent_model)} trees):')
 
 # Predictions
 rent_pred = rent_model.predict(X_test)
@@ -156,6 +363,31 @@ print(f'\n💾 Saving model to {RENT_MODEL_PATH}...')
 joblib.dump(rent_model, RENT_MODEL_PATH)
 print('   ✅ Model saved!')
 
+# ============================================================================
+# ARRAY EXPORT AND PREDICTION LATENCY
+# ============================================================================
+print('\n' + '=' * 70)
+print('⚡ ARRAY EXPORT AND PREDICTION LATENCY')
+print('=' * 70)
+
+# Both models packed into one ensemble for the NumPy predictor used in serving
+predictor = TreeEnsemble.from_models([home_model, rent_model], feature_cols)
+X_test_f32 = np.ascontiguousarray(X_test, dtype=np.float32)  # serving passes float32 rows
+sklearn_pred = np.column_stack([home_model.predict(X_test_f32), rent_model.predict(X_test_f32)])
+max_diff = np.abs(predictor.predict(X_test_f32) - sklearn_pred).max()
+if max_diff > 1e-9:
+    raise RuntimeError(f'Exported trees disagree with the sklearn models (max diff {max_diff:.3g})')
+
+print(f'\n💾 Saving {predictor.n_trees} trees ({len(predictor.feature)} nodes, depth {predictor.depth}) to {TREES_PATH}...')
+predictor.save(TREES_PATH)
+print(f'   ✅ Saved! Max difference from sklearn: {max_diff:.3g}')
+
+latency = {
+    'sklearn (home + rent)': predict_latency_us(
+        lambda X: (home_model.predict(X), rent_model.predict(X)), X_test_f32),
+    'NumPy (packed)': predict_latency_us(predictor.predict, X_test_f32),
+}
+
 # ============================================================================
 # SUMMARY
 # ============================================================================
@@ -170,7 +402,35 @@ print(f'\n🏘️  Rent Growth Model:')
 print(f'   Baseline MAE:  {baseline_rent_mae:.6f}  |  ML Model MAE:  {rent_mae:.6f}')
 print(f'   Baseline RMSE: {baseline_rent_rmse:.6f}  |  ML Model RMSE: {rent_rmse:.6f}')
 
+print(f'\n⚡ Prediction latency ({args.model}, home + rent, batch of {len(X_test_f32)}):')
+for name, (single_us, batch_us) in latency.items():
+    print(f'   {name:<24} 1 row: {single_us:8.1f} µs  |  batched: {batch_us:6.2f} µs/row')
+
+# Append this run to the run log
+run = {
+    'finished_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    'model': args.model,
+    'data': 'windows' if cv_groups is not None else 'csv',
+    'train_rows': len(X_train),
+    'test_rows': len(X_test),
+    'search': {'folds': args.folds, 'results': search_results} if args.search else None,
+    'params': best_params,
+    'metrics': {
+        'home': {'mae': home_mae, 'rmse': home_rmse, 'baseline_mae': baseline_home_mae, 'baseline_rmse': baseline_home_rmse},
+        'rent': {'mae': rent_mae, 'rmse': rent_rmse, 'baseline_mae': baseline_rent_mae, 'baseline_rmse': baseline_rent_rmse},
+    },
+    'latency_us': {name: {'single_row': single_us, 'batched_per_row': batch_us}
+                   for name, (single_us, batch_us) in latency.items()},
+    'seconds': {'search': search_seconds, 'final_fit': fit_seconds, 'total': time.perf_counter() - run_start},
+    'n_jobs': args.n_jobs,
+    'cpu_count': os.cpu_count(),
+}
+with open(RUN_LOG_PATH, 'a') as f:
+    f.write(json.dumps(run, default=float) + '\n')
+print(f'\n📝 Run logged to {RUN_LOG_PATH}')
+
 print(f'\n✅ Training complete! Models saved to:')
 print(f'   {HOME_MODEL_PATH}')
 print(f'   {RENT_MODEL_PATH}')
+print(f'   {TREES_PATH}')
 